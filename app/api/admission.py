@@ -0,0 +1,78 @@
+"""
+ASGI-middleware допуска запросов: адаптивный лимит одновременной обработки и сроки клиентов.
+
+Клиент может передать оставшееся у него время в заголовке (по умолчанию X-Request-Timeout-Ms).
+Запрос с истекшим сроком не обрабатывается, а запрос, срок которого истек в очереди, снимается
+с нее до начала скоринга. При отказе сразу возвращается 503 с Retry-After и причиной в X-Shed-Reason.
+Пути из exempt (health, метрики, админка) обслуживаются всегда и в лимит не входят.
+"""
+import time
+from typing import Iterable, Optional, Tuple
+
+from app.api.responses import dumps
+from app.core.limiter import AdaptiveLimiter, admission_total
+
+SHED_DETAIL = "Scoring service is overloaded, retry later"
+
+
+class AdmissionMiddleware:
+    """Допуск запросов через AdaptiveLimiter; задержка обработки и ответы 503 управляют лимитом"""
+
+    def __init__(self, app, limiter: AdaptiveLimiter, deadline_header: str = "X-Request-Timeout-Ms",
+                 exempt: Iterable[str] = ("/health",), retry_after: int = 1):
+        self.app = app
+        self.limiter = limiter
+        self.deadline_header = deadline_header.lower().encode("latin-1")
+        self.exempt: Tuple[str, ...] = tuple(exempt)
+        self.retry_after = str(retry_after).encode()
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt):
+            await self.app(scope, receive, send)
+            return
+
+        deadline = self._deadline(scope)
+        reason = await self.limiter.acquire(deadline)
+        if reason is not None:
+            admission_total.inc(reason)
+            await self._shed(send, reason)
+            return
+        admission_total.inc("admitted")
+
+        status = 0
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.limiter.release(time.monotonic() - started, overloaded=status == 503)
+
+    def _deadline(self, scope) -> Optional[float]:
+        """Срок клиента по time.monotonic(); некорректное значение заголовка игнорируется"""
+        for name, value in scope["headers"]:
+            if name == self.deadline_header:
+                try:
+                    return time.monotonic() + float(value) / 1000
+                except ValueError:
+                    return None
+        return None
+
+    async def _shed(self, send, reason: str) -> None:
+        body = dumps({"detail": SHED_DETAIL})
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", self.retry_after),
+                (b"x-shed-reason", reason.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
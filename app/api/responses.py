@@ -0,0 +1,117 @@
+"""
+Быстрый путь ответа для данных, которые сформировал сам сервис.
+
+FastAPI для response_model выгружает модель в dict, валидирует ее заново и сериализует
+стандартным кодировщиком. Для результатов движка это лишняя работа: модели пишутся в байты
+сериализатором pydantic-core, обычные словари - через orjson (если установлен, иначе stdlib json),
+и отдаются готовым Response. Формат ответа тот же, что дает response_model.
+"""
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson необязателен
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """JSON в байтах: orjson, если доступен, иначе json из стандартной библиотеки в том же виде"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_default).encode()
+
+
+class RawJSONResponse(Response):
+    """Ответ с уже сериализованным JSON-телом"""
+
+    media_type = "application/json"
+
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def _dump_models(data: Any) -> bytes:
+    if data is None:
+        return b"null"
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, BaseModel):
+        return data.model_dump_json().encode()
+    if isinstance(data, list):
+        if not data:
+            return b"[]"
+        item_type = type(data[0])
+        adapter = _adapters.get(item_type)
+        if adapter is None:
+            adapter = _adapters[item_type] = TypeAdapter(List[item_type])
+        return adapter.dump_json(data)
+    return dumps(data)
+
+
+def envelope(data: Any = None, success: bool = True, error: Optional[str] = None,
+             timestamp: Optional[datetime] = None, extra: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Тело в формате *Response моделей: success, data, error, timestamp; bytes в data - готовый JSON.
+    extra - дополнительные поля ответа после timestamp
+    """
+    timestamp = timestamp or datetime.utcnow()
+    parts = [
+        b'{"success":', b"true" if success else b"false",
+        b',"data":', _dump_models(data),
+        b',"error":', dumps(error),
+        b',"timestamp":"', timestamp.isoformat().encode(), b'"',
+    ]
+    for key, value in (extra or {}).items():
+        parts += (b',', dumps(key), b':', dumps(value))
+    parts.append(b'}')
+    return b"".join(parts)
+
+
+def envelope_response(data: Any = None, success: bool = True, error: Optional[str] = None,
+                      status_code: int = 200, headers: Optional[Dict[str, str]] = None,
+                      extra: Optional[Dict[str, Any]] = None) -> RawJSONResponse:
+    return RawJSONResponse(envelope(data, success, error, extra=extra), status_code=status_code, headers=headers)
+
+
+class TemplateCache:
+    """
+    Сериализованные статические ответы по ключу (например, версии конфигурации).
+    Храним немного последних значений: ключи меняются только при перезагрузке конфигурации.
+    """
+
+    def __init__(self, max_size: int = 8):
+        self.max_size = max_size
+        self._data: Dict[Any, bytes] = {}
+
+    def get_or_build(self, key: Any, build) -> bytes:
+        payload = self._data.get(key)
+        if payload is None:
+            if len(self._data) >= self.max_size:
+                self._data.pop(next(iter(self._data)))
+            payload = self._data[key] = build()
+        return payload
+
+
+def splice(parts: Sequence[bytes], values: Sequence[Any]) -> bytes:
+    """Шаблон, разрезанный по подставляемым значениям: parts[0] + v0 + parts[1] + v1 + ..."""
+    out = [parts[0]]
+    for part, value in zip(parts[1:], values):
+        out.append(dumps(value))
+        out.append(part)
+    return b"".join(out)
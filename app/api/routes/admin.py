@@ -0,0 +1,129 @@
+from fastapi import APIRouter, HTTPException, Header, status
+from typing import Optional
+import asyncio
+import logging
+
+from app.schemas.scorecard import Scorecard
+from app.core.scorecard import CompiledScorecard, SharedScorecard, compile_scorecard
+from app.core.settings import settings
+from app.core.metrics import metrics
+from app.api.routes.scoring import (
+    scoring_engine, scoring_executor, result_cache, job_manager, audit_sink, bureau_client,
+    admission_limiter
+)
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Скоркарта, общая для воркеров app.serve: замена в одном воркере применяется во всех
+shared_scorecard = SharedScorecard(settings.shared_scorecard) if settings.shared_scorecard else None
+_scorecard_sync_lock = asyncio.Lock()
+
+def _check_admin_token(token: Optional[str]) -> None:
+    if settings.admin_token and token != settings.admin_token:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+async def apply_scorecard(compiled: CompiledScorecard) -> None:
+    """Подменить скоркарту движка атомарно; пулы процессов исполнителей пересоздаются в отдельном потоке"""
+    scoring_engine.load_scorecard(compiled)
+    await asyncio.to_thread(scoring_executor.reload)
+    await job_manager.reload_executor()
+    result_cache.sync_version(scoring_engine.config_version)
+
+async def sync_shared_scorecard() -> None:
+    """
+    Применить скоркарту, опубликованную другим воркером app.serve; вызывается перед обработкой запроса.
+    Поколение отмечается примененным только после пересоздания пулов исполнителей, поэтому запросы,
+    пришедшие во время замены, ждут ее окончания и не попадают в пул со старой скоркартой
+    """
+    if shared_scorecard is None or not shared_scorecard.changed():
+        return
+    async with _scorecard_sync_lock:
+        published = shared_scorecard.read() if shared_scorecard.changed() else None
+        if published is None:
+            return
+        generation, definition = published
+        compiled = compile_scorecard(definition)
+        previous_version = scoring_engine.scorecard.version
+        await apply_scorecard(compiled)
+        shared_scorecard.generation = generation
+        logger.info(f"Shared scorecard applied: {previous_version} -> {compiled.version} (generation {generation})")
+
+@router.get("/scorecard")
+async def get_scorecard(x_admin_token: Optional[str] = Header(None)):
+    """Текущая скоркарта"""
+    _check_admin_token(x_admin_token)
+    return {
+        "version": scoring_engine.scorecard.version,
+        "scorecard": scoring_engine.scorecard.definition
+    }
+
+@router.put("/scorecard")
+async def reload_scorecard(scorecard: Scorecard, x_admin_token: Optional[str] = Header(None)):
+    """
+    Горячая замена скоркарты: новая версия компилируется целиком и подменяется атомарно,
+    ответ возвращается после пересоздания пулов исполнителей. При запуске через app.serve
+    версия публикуется для всех воркеров
+    """
+    _check_admin_token(x_admin_token)
+    
+    compiled = compile_scorecard(scorecard)
+    previous_version = scoring_engine.scorecard.version
+    if shared_scorecard is None:
+        await apply_scorecard(compiled)
+    else:
+        # Под блокировкой синхронизации: запросы этого воркера ждут новых пулов, как и в остальных воркерах
+        async with _scorecard_sync_lock:
+            try:
+                generation = shared_scorecard.publish(compiled.definition)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+            await apply_scorecard(compiled)
+            shared_scorecard.generation = generation
+    
+    logger.info(f"Scorecard reloaded: {previous_version} -> {compiled.version}")
+    
+    return {
+        "previous_version": previous_version,
+        "version": compiled.version,
+        "config_version": scoring_engine.config_version
+    }
+
+@router.get("/metrics")
+async def get_metrics_state(x_admin_token: Optional[str] = Header(None)):
+    """Состояние сбора метрик"""
+    _check_admin_token(x_admin_token)
+    return {"enabled": metrics.enabled}
+
+@router.put("/metrics")
+async def switch_metrics(enabled: bool, reset: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """
+    Включение и выключение сбора метрик на лету; reset=true обнуляет накопленные значения
+    """
+    _check_admin_token(x_admin_token)
+    
+    metrics.enabled = enabled
+    if reset:
+        metrics.reset()
+    
+    logger.info(f"Metrics collection {'enabled' if enabled else 'disabled'}")
+    
+    return {"enabled": metrics.enabled}
+
+@router.get("/audit")
+async def get_audit_stats(x_admin_token: Optional[str] = Header(None)):
+    """Состояние журнала аудита: глубина очереди, отброшенные и записанные решения, fsync"""
+    _check_admin_token(x_admin_token)
+    return audit_sink.stats()
+
+@router.get("/bureau")
+async def get_bureau_stats(x_admin_token: Optional[str] = Header(None)):
+    """Состояние коннектора бюро: автомат отключения, кэш ответов, вызовы в процессе"""
+    _check_admin_token(x_admin_token)
+    return bureau_client.stats()
+
+@router.get("/admission")
+async def get_admission_stats(x_admin_token: Optional[str] = Header(None)):
+    """Состояние лимита одновременных запросов: текущий лимит, занято, очередь, порог задержки"""
+    _check_admin_token(x_admin_token)
+    return admission_limiter.stats()
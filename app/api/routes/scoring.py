@@ -1,17 +1,234 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Header, Request, status
+from fastapi import status as http_status
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+from pydantic import ValidationError
+from typing import Optional, AsyncIterator, Awaitable, Callable, List, Tuple, Union
+import asyncio
+import json
 import logging
+import re
+import time
 from datetime import datetime
 
-from app.schemas.scoring import ScoringRequest, ScoringResponse, ScoringResult
-from app.core.scoring_engine import ScoringEngine
+from app.schemas.scoring import (
+    ScoringRequest, ScoringResponse, ScoringResult, ScoringBatchRequest, ScoringBatchResponse, ScoringConfig,
+    ScoringDetail, ScoringExplainRequest, OfferGridRequest, OfferGridResponse, OfferGrid, ScheduleResponse,
+    ScoringStatus, ScoringJobRequest, ScoringJobResponse, ScoringJobResultsResponse, ScoringJobResultsPage,
+    ScoringRequestPatch
+)
+from app.core.scoring_engine import ScoringEngine, StaleFactorVector
+from app.core.scorecard import load_scorecard
+from app.core.executor import ScoringExecutor, ExecutorOverloaded
+from app.core.cache import ResultCache, SharedResultCache
+from app.core.jobs import JobManager, JobQueueFull
+from app.core.audit import AuditSink
+from app.core.bureau import BureauClient
+from app.core.limiter import AdaptiveLimiter
+from app.core.portfolio import PortfolioStats
+from app.core.warmup import sample_requests
+from app.core.coalescing import SingleFlight, coalesced_total
+from app.core.settings import settings
+from app.core.metrics import errors_total
+from app.api.timing import TimedRoute
+from app.api.responses import RawJSONResponse, TemplateCache, dumps, envelope, envelope_response, splice
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 logger = logging.getLogger(__name__)
 
-scoring_engine = ScoringEngine()
+scoring_engine = ScoringEngine(
+    ScoringConfig(deterministic_scoring=settings.deterministic_scoring),
+    load_scorecard(settings.scorecard_path) if settings.scorecard_path else None
+)
+scoring_executor = ScoringExecutor(
+    scoring_engine,
+    mode=settings.execution_mode,
+    workers=settings.executor_workers,
+    max_queue=settings.executor_max_queue
+)
+
+# Журнал аудита решений: запись в очередь в памяти, сегменты пишет фоновый поток
+audit_sink = AuditSink(
+    settings.audit_dir,
+    max_queue=settings.audit_max_queue,
+    policy=settings.audit_queue_policy,
+    block_timeout=settings.audit_block_timeout,
+    batch_size=settings.audit_batch_size,
+    flush_interval=settings.audit_flush_interval,
+    fsync_interval=settings.audit_fsync_interval,
+    segment_bytes=settings.audit_segment_bytes
+)
+
+# Кредитное бюро: риски паспорта и ИНН; без URL - оценка по хэшам номеров документов
+bureau_client = BureauClient(
+    settings.bureau_url,
+    timeout=settings.bureau_timeout,
+    pool_size=settings.bureau_pool_size,
+    cache_size=settings.bureau_cache_size,
+    cache_ttl=settings.bureau_cache_ttl,
+    failure_threshold=settings.bureau_breaker_failures,
+    reset_timeout=settings.bureau_breaker_reset
+)
+
+# Допуск запросов к API (AdmissionMiddleware в app.main)
+admission_limiter = AdaptiveLimiter(
+    initial_limit=settings.admission_initial_limit,
+    min_limit=settings.admission_min_limit,
+    max_limit=settings.admission_max_limit,
+    max_queue=settings.admission_max_queue,
+    queue_timeout=settings.admission_queue_timeout,
+    tolerance=settings.admission_latency_tolerance,
+    backoff=settings.admission_backoff,
+    target_latency=settings.admission_target_latency
+)
+
+# Отдельная мощность для фоновых заданий: свой пул исполнителей и своя очередь
+job_manager = JobManager(
+    ScoringExecutor(
+        scoring_engine,
+        mode=settings.jobs_execution_mode,
+        workers=settings.jobs_workers,
+        max_queue=settings.jobs_workers * 2
+    ),
+    workers=settings.jobs_workers,
+    max_queue=settings.jobs_max_queue,
+    chunk_size=settings.jobs_chunk_size,
+    ttl=settings.jobs_ttl,
+    audit=audit_sink,
+    bureau=bureau_client
+)
+
+# Под app.serve кэш результатов лежит в общей памяти и общий для всех воркеров
+if settings.shared_result_cache:
+    result_cache = SharedResultCache(
+        settings.shared_result_cache,
+        dumps=lambda result: result.model_dump_json().encode(),
+        loads=ScoringResult.model_validate_json,
+        max_size=settings.result_cache_size,
+        ttl=settings.result_cache_ttl,
+        slot_bytes=settings.result_cache_slot_bytes
+    )
+else:
+    result_cache = ResultCache(max_size=settings.result_cache_size, ttl=settings.result_cache_ttl)
+# Схлопывание конкурентных дублей и окно идемпотентности для повторов (ретраи, двойные отправки)
+single_flight = SingleFlight()
+idempotency_cache = ResultCache(
+    max_size=settings.idempotency_cache_size if settings.idempotency_window > 0 else 0,
+    ttl=settings.idempotency_window
+)
+# Последняя оценка каждой заявки (заявка и вектор факторов) для PATCH /evaluate/{application_id}
+rescore_cache = ResultCache(max_size=settings.rescore_cache_size, ttl=settings.rescore_cache_ttl)
+
+def _resolve_detail(
+    detail: Optional[ScoringDetail] = Query(None, description="Уровень детализации ответа: summary или full"),
+    x_scoring_detail: Optional[ScoringDetail] = Header(None)
+) -> ScoringDetail:
+    """Уровень детализации: параметр запроса, затем заголовок X-Scoring-Detail, по умолчанию full"""
+    return detail or x_scoring_detail or ScoringDetail.FULL
+
+async def _evaluate_cached(request: ScoringRequest, detail: ScoringDetail = ScoringDetail.FULL) -> ScoringResult:
+    """
+    Скоринг заявки с переиспользованием решений по отпечатку заявки:
+    окно идемпотентности, кэш результатов (только в детерминированном режиме)
+    и схлопывание одинаковых запросов, которые выполняются одновременно
+    """
+    use_cache = result_cache.enabled and scoring_engine.config.deterministic_scoring
+    # В режиме inline расчет не отдает управление event loop, одновременных дублей не бывает
+    coalesce = scoring_executor.mode != "inline"
+    if not (idempotency_cache.enabled or use_cache or coalesce):
+        return await _evaluate_and_remember(request, detail)
+    
+    version = scoring_engine.config_version
+    key = f"{scoring_engine.fingerprint(request)}:{detail.value}"
+    
+    if idempotency_cache.enabled:
+        idempotency_cache.sync_version(version)
+        result = idempotency_cache.get(key)
+        if result is not None:
+            coalesced_total.inc('idempotency')
+            return result
+    
+    if use_cache:
+        result_cache.sync_version(version)
+        result = result_cache.get(key)
+        if result is not None:
+            return result
+    
+    if coalesce:
+        result = await single_flight.do(f"{version}:{key}", lambda: _evaluate_and_remember(request, detail))
+    else:
+        result = await _evaluate_and_remember(request, detail)
+    
+    if use_cache:
+        result_cache.set(key, result)
+    if idempotency_cache.enabled:
+        idempotency_cache.set(key, result)
+    return result
+
+async def _evaluate_and_remember(request: ScoringRequest, detail: ScoringDetail) -> ScoringResult:
+    """
+    Скоринг заявки с данными бюро; вектор факторов сохраняется для повторной оценки через PATCH,
+    решение уходит в журнал аудита
+    """
+    bureau = await bureau_client.lookup(request)
+    if not (rescore_cache.enabled or audit_sink.enabled):
+        return await scoring_executor.run("evaluate_application", request, detail, bureau)
+    version = scoring_engine.config_version
+    result, vector = await scoring_executor.run("score_application", request, detail, bureau)
+    if audit_sink.enabled:
+        await audit_sink.submit(request, vector, result, version)
+    # Вектор, посчитанный до перезагрузки конфигурации, для повторной оценки не годится
+    if rescore_cache.enabled and scoring_engine.config_version == version:
+        rescore_cache.sync_version(version)
+        rescore_cache.set(request.application_id, (request, vector))
+    return result
+
+async def _evaluate_many(requests: List[ScoringRequest], detail: ScoringDetail,
+                         run: Optional[Callable[..., Awaitable]] = None,
+                         portfolio: Optional[PortfolioStats] = None) -> List[ScoringResult]:
+    """
+    Пакетный скоринг через run (по умолчанию - исполнитель скоринга); данные бюро по всем заявкам
+    пакета запрашиваются одновременно. При включенном аудите решения пакета уходят в журнал аудита,
+    результаты учитываются в аналитике портфеля, если она передана
+    """
+    run = run or scoring_executor.run
+    bureau = await bureau_client.lookup_many(requests)
+    if not (audit_sink.enabled or portfolio is not None):
+        return await run("evaluate_many", requests, detail, bureau)
+    version = scoring_engine.config_version
+    results, vectors = await run("score_many", requests, detail, bureau)
+    if audit_sink.enabled:
+        await audit_sink.submit_many(requests, vectors, results, version)
+    if portfolio is not None:
+        portfolio.update(requests, results, vectors)
+    return results
+
+async def warm_up(size: int) -> float:
+    """
+    Прогрев перед приемом запросов: синтетические заявки проходят одиночный и пакетный скоринг
+    на обоих уровнях детализации в каждом процессе исполнителя, результаты сериализуются.
+    Кэши решений, аудит и бюро не затрагиваются. Возвращает длительность прогрева, секунд
+    """
+    started = time.perf_counter()
+    requests = sample_requests(size)
+    # Задачи пакета одновременно, чтобы досталось каждому процессу пула
+    runs = scoring_executor.workers if scoring_executor.mode == "process" else 1
+    for detail in ScoringDetail:
+        batches = await asyncio.gather(*(_run_when_ready("evaluate_many", requests, detail) for _ in range(runs)))
+        envelope(batches[0])
+        for request in requests[:16]:
+            envelope(await _run_when_ready("evaluate_application", request, detail))
+    return time.perf_counter() - started
+
+def _overloaded() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Scoring service is overloaded, retry later",
+        headers={"Retry-After": "1"}
+    )
 
 @router.post("/evaluate", response_model=ScoringResponse)
-async def evaluate_application(request: ScoringRequest):
+async def evaluate_application(request: ScoringRequest, detail: ScoringDetail = Depends(_resolve_detail)):
     """
     Эмуляция банковского скоринга
     """
@@ -19,32 +236,489 @@ async def evaluate_application(request: ScoringRequest):
         logger.info(f"Processing scoring for application {request.application_id}")
         
         # Выполняем скоринг
-        result = scoring_engine.evaluate_application(request)
+        result = await _evaluate_cached(request, detail)
         
         logger.info(f"Scoring completed for application {request.application_id}: {result.status}")
         
+        return envelope_response(result)
+        
+    except ExecutorOverloaded:
+        logger.warning(f"Scoring queue is full, application {request.application_id} rejected")
+        errors_total.inc("evaluate", "overloaded")
+        raise _overloaded()
+    except Exception as e:
+        logger.error(f"Scoring error for application {request.application_id}: {str(e)}")
+        errors_total.inc("evaluate", type(e).__name__)
         return ScoringResponse(
-            success=True,
-            data=result,
+            success=False,
+            error=f"Scoring processing failed: {str(e)}",
             timestamp=datetime.utcnow()
         )
+
+@router.patch("/evaluate/{application_id}", response_model=ScoringResponse)
+async def rescore_application(
+    application_id: int, patch: ScoringRequestPatch, detail: ScoringDetail = Depends(_resolve_detail)
+):
+    """
+    Повторная оценка заявки после правки суммы, срока или зарплаты.
+    Заявка должна быть оценена через POST /evaluate текущей конфигурацией; пересчитываются
+    только факторы, зависящие от измененных полей
+    """
+    rescore_cache.sync_version(scoring_engine.config_version)
+    entry = rescore_cache.get(application_id) if rescore_cache.enabled else None
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Application {application_id} has no recent evaluation, submit it via POST /evaluate"
+        )
+    previous, vector = entry
+    version = scoring_engine.config_version
+    try:
+        request = ScoringRequest(**{**previous.model_dump(), **patch.model_dump(exclude_unset=True)})
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.errors(include_url=False))
+    
+    try:
+        changed = sorted(name for name in patch.model_fields_set if getattr(request, name) != getattr(previous, name))
+        logger.info(f"Rescoring application {application_id}: {', '.join(changed) or 'no changes'}")
+        result, vector = await scoring_executor.run("rescore", request, vector, changed, detail)
+        if audit_sink.enabled:
+            await audit_sink.submit(request, vector, result, version)
+        if scoring_engine.config_version == version:
+            rescore_cache.set(application_id, (request, vector))
+        
+        logger.info(f"Rescoring completed for application {application_id}: {result.status}")
+        
+        return envelope_response(result)
         
+    except ExecutorOverloaded:
+        logger.warning(f"Scoring queue is full, rescoring of application {application_id} rejected")
+        errors_total.inc("rescore", "overloaded")
+        raise _overloaded()
     except Exception as e:
-        logger.error(f"Scoring error for application {request.application_id}: {str(e)}")
+        logger.error(f"Rescoring error for application {application_id}: {str(e)}")
+        errors_total.inc("rescore", type(e).__name__)
         return ScoringResponse(
             success=False,
             error=f"Scoring processing failed: {str(e)}",
             timestamp=datetime.utcnow()
         )
 
+@router.post("/evaluate/batch", response_model=ScoringBatchResponse)
+async def evaluate_batch(
+    batch: ScoringBatchRequest,
+    detail: ScoringDetail = Depends(_resolve_detail),
+    analytics: bool = Query(False, description="Добавить в ответ аналитику портфеля пакета (поле portfolio)")
+):
+    """
+    Пакетный скоринг: все заявки пакета оцениваются одним векторизованным проходом
+    """
+    try:
+        logger.info(f"Processing batch scoring for {len(batch.requests)} applications")
+        
+        portfolio = PortfolioStats() if analytics else None
+        results = await _evaluate_many(batch.requests, detail, portfolio=portfolio)
+        
+        logger.info(f"Batch scoring completed for {len(results)} applications")
+        
+        if portfolio is not None:
+            return envelope_response(results, extra={"portfolio": portfolio.report()})
+        return envelope_response(results)
+        
+    except ExecutorOverloaded:
+        logger.warning(f"Scoring queue is full, batch of {len(batch.requests)} applications rejected")
+        errors_total.inc("evaluate_batch", "overloaded")
+        raise _overloaded()
+    except Exception as e:
+        logger.error(f"Batch scoring error: {str(e)}")
+        errors_total.inc("evaluate_batch", type(e).__name__)
+        return ScoringBatchResponse(
+            success=False,
+            error=f"Batch scoring processing failed: {str(e)}",
+            timestamp=datetime.utcnow()
+        )
+
+# Максимальная длина одной строки NDJSON; более длинные строки отклоняются без буферизации
+STREAM_MAX_LINE_BYTES = 64 * 1024
+
+async def _run_when_ready(method: str, *args):
+    """Выполнить задачу, дожидаясь свободного места в очереди исполнителя вместо отказа"""
+    while True:
+        try:
+            return await scoring_executor.run(method, *args)
+        except ExecutorOverloaded:
+            await asyncio.sleep(0.05)
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    Потоковый ответ, который отдается, пока тело запроса еще читается.
+    Стандартный StreamingResponse параллельно слушает receive() в ожидании отключения клиента
+    и забирает себе куски тела запроса; здесь отключение обнаруживается при чтении тела.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+def _stream_error(line_no: int, error: str) -> bytes:
+    errors_total.inc("evaluate_stream", "invalid_line")
+    return json.dumps({"line": line_no, "error": error}, ensure_ascii=False).encode() + b"\n"
+
+async def _score_ndjson(
+    chunks: AsyncIterator[bytes],
+    detail: ScoringDetail,
+    batch_size: int,
+    portfolio: Optional[PortfolioStats] = None
+) -> AsyncIterator[bytes]:
+    """
+    Потоковый скоринг NDJSON: входные строки читаются по мере поступления и оцениваются
+    микропакетами через evaluate_many. Следующая порция входа читается только после того,
+    как клиент забрал предыдущий ответ, поэтому память не зависит от размера потока.
+    С аналитикой портфеля последней строкой идет {"portfolio": {...}} по всем оцененным заявкам.
+    """
+    # Элементы микропакета в порядке строк: заявка или текст ошибки валидации
+    pending: List[Tuple[int, Union[ScoringRequest, str]]] = []
+    
+    async def flush() -> bytes:
+        requests = [item for _, item in pending if isinstance(item, ScoringRequest)]
+        results = iter(
+            await _evaluate_many(requests, detail, run=_run_when_ready, portfolio=portfolio) if requests else []
+        )
+        out = bytearray()
+        for line_no, item in pending:
+            if isinstance(item, ScoringRequest):
+                out += next(results).model_dump_json().encode() + b"\n"
+            else:
+                out += _stream_error(line_no, item)
+        pending.clear()
+        return bytes(out)
+    
+    buffer = b""
+    line_no = 0
+    skipping = False  # дочитываем слишком длинную строку до конца, не сохраняя ее
+    
+    try:
+        async for chunk in chunks:
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            
+            for raw in lines:
+                line_no += 1
+                if skipping:
+                    skipping = False
+                    continue
+                if not raw.strip():
+                    continue
+                if len(raw) > STREAM_MAX_LINE_BYTES:
+                    pending.append((line_no, f"Line exceeds {STREAM_MAX_LINE_BYTES} bytes"))
+                    continue
+                try:
+                    pending.append((line_no, ScoringRequest.model_validate_json(raw)))
+                except ValidationError as e:
+                    pending.append((line_no, str(e)))
+                
+                if len(pending) >= batch_size:
+                    yield await flush()
+            
+            if len(buffer) > STREAM_MAX_LINE_BYTES:
+                if not skipping:
+                    pending.append((line_no + 1, f"Line exceeds {STREAM_MAX_LINE_BYTES} bytes"))
+                    skipping = True
+                buffer = b""
+    except ClientDisconnect:
+        logger.info(f"Client disconnected from scoring stream after {line_no} lines")
+        return
+    
+    if buffer.strip() and not skipping:
+        line_no += 1
+        try:
+            pending.append((line_no, ScoringRequest.model_validate_json(buffer)))
+        except ValidationError as e:
+            pending.append((line_no, str(e)))
+    
+    if pending:
+        yield await flush()
+    if portfolio is not None:
+        yield dumps({"portfolio": portfolio.report()}) + b"\n"
+
+@router.post("/evaluate/stream")
+async def evaluate_stream(
+    http_request: Request,
+    detail: ScoringDetail = Depends(_resolve_detail),
+    batch_size: int = Query(256, ge=1, le=10000, description="Размер микропакета"),
+    analytics: bool = Query(False, description="Завершить поток строкой с аналитикой портфеля")
+):
+    """
+    Потоковый скоринг: тело - ScoringRequest в формате NDJSON (по одной заявке на строку),
+    ответ - ScoringResult по одному на строку в порядке входа.
+    Ошибки валидации возвращаются строкой {"line": N, "error": "..."} и не прерывают поток.
+    """
+    logger.info(f"Processing streaming scoring, batch size {batch_size}")
+    return DuplexStreamingResponse(
+        _score_ndjson(http_request.stream(), detail, batch_size, PortfolioStats() if analytics else None),
+        media_type="application/x-ndjson"
+    )
+
+@router.post("/offers/grid", response_model=OfferGridResponse)
+async def evaluate_offer_grid(applicant: OfferGridRequest):
+    """
+    Сетка предложений: решение, ставка и платеж для каждой комбинации суммы и срока
+    """
+    try:
+        bureau = await bureau_client.lookup(applicant)
+        offers = await scoring_executor.run("evaluate_offer_grid", applicant, bureau)
+        
+        return OfferGridResponse(
+            success=True,
+            data=OfferGrid(
+                application_id=applicant.application_id,
+                user_id=applicant.user_id,
+                amounts=applicant.amounts,
+                terms=applicant.terms,
+                offers=offers
+            ),
+            timestamp=datetime.utcnow()
+        )
+        
+    except ExecutorOverloaded:
+        logger.warning(f"Scoring queue is full, offer grid for application {applicant.application_id} rejected")
+        errors_total.inc("offer_grid", "overloaded")
+        raise _overloaded()
+    except Exception as e:
+        logger.error(f"Offer grid error for application {applicant.application_id}: {str(e)}")
+        errors_total.inc("offer_grid", type(e).__name__)
+        return OfferGridResponse(
+            success=False,
+            error=f"Offer grid processing failed: {str(e)}",
+            timestamp=datetime.utcnow()
+        )
+
+@router.get("/schedule", response_model=ScheduleResponse)
+async def get_schedule(
+    amount: float = Query(..., gt=0, description="Сумма кредита"),
+    rate: float = Query(..., ge=0, le=100, description="Годовая ставка, %"),
+    term: int = Query(..., gt=0, description="Срок, месяцев")
+):
+    """
+    График погашения аннуитетного кредита по сумме, ставке и сроку
+    """
+    if term > scoring_engine.config.max_loan_term:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Loan term must not exceed {scoring_engine.config.max_loan_term} months"
+        )
+    return ScheduleResponse(
+        success=True,
+        data=scoring_engine.build_schedule(amount, rate, term),
+        timestamp=datetime.utcnow()
+    )
+
+@router.post("/schedule", response_model=ScheduleResponse)
+async def evaluate_schedule(request: ScoringRequest):
+    """
+    Скоринг заявки и график погашения по одобренным сумме, сроку и ставке
+    """
+    try:
+        result = await _evaluate_cached(request, ScoringDetail.SUMMARY)
+        
+        if result.status != ScoringStatus.APPROVED:
+            return ScheduleResponse(
+                success=False,
+                error=f"Application is not approved: {result.status.value}",
+                timestamp=datetime.utcnow()
+            )
+        
+        return ScheduleResponse(
+            success=True,
+            data=scoring_engine.build_schedule(result.approved_amount, result.interest_rate, result.approved_term),
+            timestamp=datetime.utcnow()
+        )
+        
+    except ExecutorOverloaded:
+        logger.warning(f"Scoring queue is full, schedule for application {request.application_id} rejected")
+        errors_total.inc("schedule", "overloaded")
+        raise _overloaded()
+    except Exception as e:
+        logger.error(f"Schedule error for application {request.application_id}: {str(e)}")
+        errors_total.inc("schedule", type(e).__name__)
+        return ScheduleResponse(
+            success=False,
+            error=f"Schedule processing failed: {str(e)}",
+            timestamp=datetime.utcnow()
+        )
+
+@router.post("/jobs", response_model=ScoringJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(job_request: ScoringJobRequest, detail: ScoringDetail = Depends(_resolve_detail)):
+    """
+    Фоновое задание: заявки ставятся в очередь, результаты забираются по job_id
+    """
+    try:
+        job = job_manager.submit(job_request.requests, detail)
+    except JobQueueFull:
+        logger.warning(f"Job queue is full, job of {len(job_request.requests)} applications rejected")
+        errors_total.inc("jobs", "queue_full")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Job queue is full, retry later",
+            headers={"Retry-After": str(settings.jobs_retry_after)}
+        )
+    
+    logger.info(f"Scoring job {job.job_id} queued: {job.total} applications")
+    
+    return ScoringJobResponse(
+        success=True,
+        data=job.snapshot(job_manager.ttl),
+        timestamp=datetime.utcnow()
+    )
+
+@router.get("/jobs")
+async def get_jobs_stats():
+    """Состояние очереди фоновых заданий"""
+    return job_manager.stats()
+
+def _get_job_or_404(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found or expired")
+    return job
+
+@router.get("/jobs/{job_id}", response_model=ScoringJobResponse)
+async def get_job(job_id: str):
+    """Состояние и прогресс задания"""
+    job = _get_job_or_404(job_id)
+    return ScoringJobResponse(
+        success=True,
+        data=job.snapshot(job_manager.ttl),
+        timestamp=datetime.utcnow()
+    )
+
+@router.get("/jobs/{job_id}/results", response_model=ScoringJobResultsResponse)
+async def get_job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000)
+):
+    """
+    Постраничная выдача готовых результатов; доступна и во время выполнения задания
+    """
+    job = _get_job_or_404(job_id)
+    results = job_manager.results(job, offset, limit)
+    next_offset = offset + len(results)
+    has_more = next_offset < job.processed or (not job.finished and next_offset < job.total)
+    
+    return ScoringJobResultsResponse(
+        success=True,
+        data=ScoringJobResultsPage(
+            job_id=job.job_id,
+            status=job.status,
+            offset=offset,
+            limit=limit,
+            total=job.total,
+            processed=job.processed,
+            next_offset=next_offset if has_more else None,
+            results=results
+        ),
+        timestamp=datetime.utcnow()
+    )
+
+@router.delete("/jobs/{job_id}", response_model=ScoringJobResponse)
+async def cancel_job(job_id: str):
+    """
+    Отмена задания; уже посчитанные результаты остаются доступны до истечения срока хранения
+    """
+    job = _get_job_or_404(job_id)
+    job_manager.cancel(job_id)
+    logger.info(f"Scoring job {job_id} cancellation requested")
+    return ScoringJobResponse(
+        success=True,
+        data=job.snapshot(job_manager.ttl),
+        timestamp=datetime.utcnow()
+    )
+
+@router.post("/explain", response_model=ScoringResponse)
+async def explain_application(explain: ScoringExplainRequest):
+    """
+    Полные пояснения по вектору факторов из краткого ответа (detail=summary)
+    """
+    try:
+        result = scoring_engine.explain(explain.request, explain.factor_vector)
+    except StaleFactorVector:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Factor vector was built with a different scorecard version, re-evaluate the application"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    
+    return envelope_response(result)
+
+@router.get("/executor")
+async def get_executor_stats():
+    """Состояние исполнителя скоринга: глубина очереди и время ожидания"""
+    return scoring_executor.stats()
+
+@router.get("/coalescing")
+async def get_coalescing_stats():
+    """Статистика схлопывания дублей и окна идемпотентности"""
+    return {
+        "single_flight": single_flight.stats(),
+        "idempotency": {"window": settings.idempotency_window, **idempotency_cache.stats()}
+    }
+
+@router.get("/cache")
+async def get_cache_stats():
+    """Статистика кэша результатов скоринга и кэша векторов для повторной оценки"""
+    return {**result_cache.stats(), "rescore": rescore_cache.stats()}
+
+# Сериализованная конфигурация по версии: меняется только при перезагрузке конфигурации или скоркарты
+_config_payloads = TemplateCache()
+
 @router.get("/config")
 async def get_scoring_config():
     """Получить текущую конфигурацию скоринга"""
-    return {
-        "min_score_approval": scoring_engine.config.min_score_approval,
-        "max_loan_amount": scoring_engine.config.max_loan_amount,
-        "base_interest_rate": scoring_engine.config.base_interest_rate
-    }
+    def build() -> bytes:
+        return dumps({
+            "min_score_approval": scoring_engine.config.min_score_approval,
+            "max_loan_amount": scoring_engine.config.max_loan_amount,
+            "base_interest_rate": scoring_engine.config.base_interest_rate,
+            "deterministic_scoring": scoring_engine.config.deterministic_scoring,
+            "scorecard_version": scoring_engine.scorecard.version,
+            "config_version": scoring_engine.config_version
+        })
+    
+    return RawJSONResponse(_config_payloads.get_or_build(scoring_engine.config_version, build))
+
+SIMULATED_STATUSES = {
+    "approved": ScoringStatus.APPROVED,
+    "rejected": ScoringStatus.REJECTED,
+    "manual": ScoringStatus.MANUAL_REVIEW
+}
+_SIMULATE_MARKER = re.compile(rb'"__(\w+)__"')
+
+def _simulate_template(status_name: str) -> Tuple[List[bytes], List[str]]:
+    """
+    Фиктивный результат, сериализованный один раз: поля из запроса заменены маркерами,
+    шаблон режется по маркерам и при ответе собирается с подставленными значениями
+    """
+    approved = status_name == "approved"
+    result = ScoringResult.model_construct(
+        application_id="__application_id__",
+        user_id="__user_id__",
+        status=SIMULATED_STATUSES[status_name],
+        score=800 if approved else 400,
+        approved_amount="__loan_amount__" if approved else None,
+        approved_term="__loan_term__" if approved else None,
+        interest_rate=10.5 if approved else None,
+        monthly_payment=15000.0 if approved else None,
+        rejection_reason="Тестовый отказ" if status_name == "rejected" else None,
+        insurance_required=False,
+        details={"simulated": True}
+    )
+    pieces = _SIMULATE_MARKER.split(result.model_dump_json(warnings=False).encode())
+    return pieces[0::2], [name.decode() for name in pieces[1::2]]
+
+_SIMULATE_TEMPLATES = {name: _simulate_template(name) for name in SIMULATED_STATUSES}
 
 @router.post("/simulate/{status}")
 async def simulate_scoring_result(
@@ -54,37 +728,15 @@ async def simulate_scoring_result(
     """
     Эмуляция конкретного результата скоринга (для тестирования)
     """
-    from app.schemas.scoring import ScoringStatus
-    
-    status_map = {
-        "approved": ScoringStatus.APPROVED,
-        "rejected": ScoringStatus.REJECTED,
-        "manual": ScoringStatus.MANUAL_REVIEW
-    }
-    
-    if status not in status_map:
+    template = _SIMULATE_TEMPLATES.get(status)
+    if template is None:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
+            status_code=http_status.HTTP_400_BAD_REQUEST,
             detail="Invalid status. Use: approved, rejected, or manual"
         )
     
-    # Создаем фиктивный результат
-    result = ScoringResult(
-        application_id=request.application_id,
-        user_id=request.user_id,
-        status=status_map[status],
-        score=800 if status == "approved" else 400,
-        approved_amount=request.loan_amount if status == "approved" else None,
-        approved_term=request.loan_term if status == "approved" else None,
-        interest_rate=10.5 if status == "approved" else None,
-        monthly_payment=15000 if status == "approved" else None,
-        rejection_reason="Тестовый отказ" if status == "rejected" else None,
-        insurance_required=False,
-        details={"simulated": True}
-    )
+    # Фиктивный результат из заранее сериализованного шаблона
+    parts, fields = template
+    data = splice(parts, [getattr(request, field) for field in fields])
     
-    return ScoringResponse(
-        success=True,
-        data=result,
-        timestamp=datetime.utcnow()
-    )
\ No newline at end of file
+    return envelope_response(data)
@@ -0,0 +1,23 @@
+"""
+ASGI-middleware синхронизации скоркарты между воркерами app.serve.
+
+Перед обработкой запроса к API процесс сверяет поколение скоркарты в общей памяти (SharedScorecard)
+со своим и, если другой воркер опубликовал замену, применяет ее до скоринга. Проверка - одно
+чтение из общей памяти. Запрос, заставший замену, ждет ее окончания вместе с пересозданием пулов
+исполнителей (секунды в режиме process), зато не оценивается старой скоркартой.
+"""
+from typing import Awaitable, Callable, Iterable, Tuple
+
+
+class ScorecardSyncMiddleware:
+    """Вызов sync перед каждым HTTP-запросом к путям из paths"""
+
+    def __init__(self, app, sync: Callable[[], Awaitable[None]], paths: Iterable[str] = ("/api/",)):
+        self.app = app
+        self.sync = sync
+        self.paths: Tuple[str, ...] = tuple(paths)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(self.paths):
+            await self.sync()
+        await self.app(scope, receive, send)
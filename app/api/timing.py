@@ -0,0 +1,102 @@
+"""
+Замер этапов HTTP-обработки для маршрутов FastAPI.
+
+TimedRoute делит время запроса на этапы:
+    validation    - чтение тела, разбор JSON и валидация параметров до вызова обработчика;
+    handler       - сам обработчик маршрута;
+    serialization - проверка и сериализация ответа после обработчика;
+    total         - весь запрос целиком.
+Границы этапов отмечает обертка обработчика через contextvar; при выключенных метриках замер пропускается.
+"""
+import asyncio
+import functools
+import time
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+from starlette.responses import Response
+
+from app.core.metrics import Histogram, metrics
+
+HTTP_STAGE_METRIC = 'scoring_http_stage_duration_seconds'
+HTTP_STAGE_HELP = 'Duration of HTTP request handling stages'
+
+http_responses_total = metrics.counter('scoring_http_responses_total', 'HTTP responses by route and status code',
+                                       ('route', 'code'))
+
+# Отметки [начало обработчика, конец обработчика] текущего запроса
+_marks: ContextVar[Optional[List[int]]] = ContextVar('scoring_stage_marks', default=None)
+
+
+def _mark_endpoint(endpoint: Callable) -> Callable:
+    @functools.wraps(endpoint)
+    async def marked(*args, **kwargs):
+        marks = _marks.get()
+        if marks is None:
+            return await endpoint(*args, **kwargs)
+        marks[0] = time.perf_counter_ns()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            marks[1] = time.perf_counter_ns()
+
+    marked.__stage_marked__ = True
+    return marked
+
+
+class TimedRoute(APIRoute):
+    """Маршрут с гистограммами этапов обработки; подключается через APIRouter(route_class=TimedRoute)"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        # include_router пересоздает маршруты с префиксом из уже обернутого обработчика
+        if asyncio.iscoroutinefunction(endpoint) and not getattr(endpoint, '__stage_marked__', False):
+            endpoint = _mark_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        route = self.path
+        # Гистограммы создаются при первом запросе: маршруты роутера без префикса запросов не получают
+        histograms: List[Histogram] = []
+
+        async def timed_handler(request: Request) -> Response:
+            if not metrics.enabled:
+                return await handler(request)
+            if not histograms:
+                histograms.extend(
+                    metrics.histogram(HTTP_STAGE_METRIC, HTTP_STAGE_HELP, route=route, stage=stage)
+                    for stage in ('validation', 'handler', 'serialization', 'total')
+                )
+            validation, handling, serialization, total = histograms
+            marks = [0, 0]
+            token = _marks.set(marks)
+            started = time.perf_counter_ns()
+            code = 500
+            served = False
+            try:
+                response = await handler(request)
+                code = response.status_code
+                served = True
+                return response
+            except HTTPException as e:
+                code = e.status_code
+                raise
+            except RequestValidationError:
+                code = 422
+                raise
+            finally:
+                finished = time.perf_counter_ns()
+                _marks.reset(token)
+                if marks[0]:
+                    validation.observe_ns(marks[0] - started)
+                    if marks[1]:
+                        handling.observe_ns(marks[1] - marks[0])
+                        if served:
+                            serialization.observe_ns(finished - marks[1])
+                total.observe_ns(finished - started)
+                http_responses_total.inc(route, str(code))
+
+        return timed_handler
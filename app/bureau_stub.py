@@ -0,0 +1,96 @@
+"""
+Локальная заглушка кредитного бюро для разработки и нагрузочных проверок.
+
+    python -m app.bureau_stub --port 8090 --latency-ms 20 --error-rate 0.01
+    SCORING_BUREAU_URL=http://127.0.0.1:8090 uvicorn app.main:app
+
+Отвечает на GET /passport/{номер} и GET /inn/{номер} JSON-ом {"number": ..., "risk": ...}.
+Риск совпадает с оценкой по хэшу номера (плюс --shift), поэтому решения с заглушкой и без бюро
+сопоставимы. Задержка и доля ошибок (HTTP 503) задаются параметрами; start_stub_server
+поднимает заглушку в фоновом потоке того же процесса.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+from app.core.bureau import INN, PASSPORT, inn_hash_score, passport_hash_score
+
+_SCORES = {PASSPORT: passport_hash_score, INN: inn_hash_score}
+
+
+class BureauStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, чтобы пул соединений клиента переиспользовался
+
+    def do_GET(self) -> None:
+        server = self.server
+        server.requests += 1
+        parts = self.path.strip('/').split('/')
+        if parts == ['health']:
+            self._reply(200, {"status": "ok", "requests": server.requests})
+            return
+        if len(parts) != 2 or parts[0] not in _SCORES or not parts[1]:
+            self._reply(404, {"error": "not found"})
+            return
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and random.random() < server.error_rate:
+            self._reply(503, {"error": "bureau unavailable"})
+            return
+        kind, number = parts
+        self._reply(200, {"number": number, "risk": _SCORES[kind](number) + server.shift})
+
+    def _reply(self, code: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # Клиент не дождался ответа (таймаут на его стороне)
+            self.close_connection = True
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def start_stub_server(host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                      error_rate: float = 0.0, shift: int = 0) -> ThreadingHTTPServer:
+    """Заглушка в фоновом потоке; порт 0 - свободный порт (server.server_address), остановка - shutdown()"""
+    server = ThreadingHTTPServer((host, port), BureauStubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.error_rate = error_rate
+    server.shift = shift
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, name='bureau-stub', daemon=True).start()
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m app.bureau_stub', description='Заглушка кредитного бюро')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Задержка ответа, мс')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Доля ответов 503')
+    parser.add_argument('--shift', type=int, default=0, help='Сдвиг риска относительно оценки по хэшу')
+    args = parser.parse_args(argv)
+
+    server = start_stub_server(args.host, args.port, args.latency_ms / 1000, args.error_rate, args.shift)
+    print(f"bureau stub listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
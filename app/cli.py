@@ -0,0 +1,503 @@
+"""
+Офлайн-скоринг больших файлов без HTTP-стека.
+
+    python -m app.cli score input.csv -o output.csv --workers 8 --portfolio portfolio.json
+    python -m app.cli audit /var/lib/scoring/audit --export decisions.jsonl
+    python -m app.cli replay requests.jsonl --new-scorecard new.json --set base_interest_rate=13.5
+
+Вход отображается в память (mmap) и делится на байтовые диапазоны по границам строк.
+Диапазоны обрабатываются пулом процессов порциями, каждый пишет свой временный файл,
+затем части склеиваются в порядке диапазонов - порядок строк входа сохраняется.
+"""
+import argparse
+import csv
+import json
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from pydantic import ValidationError
+
+from app.core.audit import STATUSES, iter_records, read_segment, segment_paths, to_dicts, to_requests
+from app.core.portfolio import PortfolioStats
+from app.core.replay import ReplayStats
+from app.core.scorecard import load_scorecard
+from app.core.scoring_engine import ScoringEngine
+from app.schemas.scoring import ScoringConfig, ScoringDetail, ScoringRequest, ScoringResult
+
+# Колонки выходного CSV
+OUTPUT_COLUMNS = (
+    'application_id', 'user_id', 'status', 'score', 'approved_amount', 'approved_term',
+    'interest_rate', 'monthly_payment', 'insurance_required', 'rejection_reason', 'error',
+)
+
+# Размер порции, которую процесс читает из своего диапазона за один раз
+BLOCK_BYTES = 4 * 1024 * 1024
+
+
+def _detect_format(path: str, explicit: Optional[str]) -> str:
+    if explicit:
+        return explicit
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def split_ranges(mm: mmap.mmap, start: int, parts: int) -> List[Tuple[int, int]]:
+    """Деление [start, len) на диапазоны, выровненные по концам строк"""
+    size = len(mm)
+    if start >= size:
+        return []
+    step = max(1, (size - start) // parts)
+    ranges = []
+    pos = start
+    while pos < size:
+        end = pos + step
+        if end >= size:
+            end = size
+        else:
+            newline = mm.find(b'\n', end)
+            end = size if newline == -1 else newline + 1
+        ranges.append((pos, end))
+        pos = end
+    return ranges
+
+
+def iter_blocks(mm: mmap.mmap, start: int, end: int, block_bytes: int = BLOCK_BYTES) -> Iterator[Tuple[int, bytes]]:
+    """Порции диапазона, выровненные по концам строк: (смещение порции, байты)"""
+    pos = start
+    while pos < end:
+        stop = min(end, pos + block_bytes)
+        if stop < end:
+            newline = mm.find(b'\n', stop, end)
+            stop = end if newline == -1 else newline + 1
+        yield pos, mm[pos:stop]
+        pos = stop
+
+
+def _parse_block(block: bytes, offset: int, fmt: str,
+                 header: Optional[List[str]]) -> List[Tuple[int, Any]]:
+    """Разбор порции: (смещение строки, ScoringRequest или текст ошибки)"""
+    items = []
+    line_offset = offset
+    for raw in block.split(b'\n'):
+        current = line_offset
+        line_offset += len(raw) + 1
+        if not raw.strip():
+            continue
+        try:
+            if fmt == 'csv':
+                row = next(csv.reader([raw.decode('utf-8').rstrip('\r')]))
+                data = {name: (value if value != '' else None) for name, value in zip(header, row)}
+                items.append((current, ScoringRequest.model_validate(data)))
+            else:
+                items.append((current, ScoringRequest.model_validate_json(raw)))
+        except (ValidationError, ValueError, StopIteration) as e:
+            items.append((current, str(e)))
+    return items
+
+
+def _csv_row(result: Optional[ScoringResult], error: Optional[str] = None) -> List[Any]:
+    if result is None:
+        return [''] * (len(OUTPUT_COLUMNS) - 1) + [error]
+    return [
+        result.application_id, result.user_id, result.status.value, result.score,
+        result.approved_amount, result.approved_term, result.interest_rate, result.monthly_payment,
+        result.insurance_required, result.rejection_reason, '',
+    ]
+
+
+def build_engine(deterministic: bool, scorecard_path: Optional[str]) -> ScoringEngine:
+    return ScoringEngine(
+        ScoringConfig(deterministic_scoring=deterministic),
+        load_scorecard(scorecard_path) if scorecard_path else None,
+    )
+
+
+_shard_engine: Optional[ScoringEngine] = None
+
+
+def _init_shard_worker(deterministic: bool, scorecard_path: Optional[str]) -> None:
+    global _shard_engine
+    _shard_engine = build_engine(deterministic, scorecard_path)
+
+
+def score_shard(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Обработка одного диапазона входного файла; результат пишется во временный файл,
+    аналитика портфеля диапазона (если запрошена) возвращается для сложения с остальными
+    """
+    engine = _shard_engine or build_engine(task['deterministic'], task['scorecard'])
+    detail = ScoringDetail(task['detail'])
+    fmt = task['format']
+    out_fmt = task['output_format']
+    portfolio = PortfolioStats() if task['portfolio'] else None
+    rows = errors = 0
+
+    with open(task['input'], 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+            open(task['part'], 'w', encoding='utf-8', newline='') as out:
+        writer = csv.writer(out) if out_fmt == 'csv' else None
+        for offset, block in iter_blocks(mm, task['start'], task['end'], task['block_bytes']):
+            items = _parse_block(block, offset, fmt, task['header'])
+            requests = [item for _, item in items if isinstance(item, ScoringRequest)]
+            if portfolio is not None:
+                results, vectors = engine.score_many(requests, detail)
+                portfolio.update(requests, results, vectors)
+                results = iter(results)
+            else:
+                results = iter(engine.evaluate_many(requests, detail))
+            for line_offset, item in items:
+                if isinstance(item, ScoringRequest):
+                    result = next(results)
+                    rows += 1
+                    if writer is not None:
+                        writer.writerow(_csv_row(result))
+                    else:
+                        out.write(result.model_dump_json())
+                        out.write('\n')
+                else:
+                    errors += 1
+                    if writer is not None:
+                        writer.writerow(_csv_row(None, f"offset {line_offset}: {item}"))
+                    else:
+                        out.write(json.dumps({"offset": line_offset, "error": item}, ensure_ascii=False))
+                        out.write('\n')
+
+    return {'rows': rows, 'errors': errors, 'bytes': task['end'] - task['start'], 'portfolio': portfolio}
+
+
+def run_score(args: argparse.Namespace) -> int:
+    fmt = _detect_format(args.input, args.format)
+    out_fmt = _detect_format(args.output, args.output_format)
+    workers = max(1, args.workers)
+    started = time.perf_counter()
+
+    with open(args.input, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            ranges, header = [], None
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                header = None
+                data_start = 0
+                if fmt == 'csv':
+                    newline = mm.find(b'\n')
+                    header_end = len(mm) if newline == -1 else newline
+                    header = next(csv.reader([mm[:header_end].decode('utf-8-sig').rstrip('\r')]))
+                    data_start = header_end + 1
+                # Диапазонов больше, чем процессов, чтобы сгладить неравномерность
+                ranges = split_ranges(mm, data_start, workers * 4 if workers > 1 else 1)
+
+    tmp_dir = tempfile.mkdtemp(prefix='scoring-', dir=os.path.dirname(os.path.abspath(args.output)))
+    tasks = [
+        {
+            'input': args.input, 'start': start, 'end': end, 'format': fmt, 'header': header,
+            'output_format': out_fmt, 'part': os.path.join(tmp_dir, f'part-{i:06d}'),
+            'detail': args.detail, 'deterministic': args.deterministic, 'scorecard': args.scorecard,
+            'block_bytes': args.block_size, 'portfolio': bool(args.portfolio),
+        }
+        for i, (start, end) in enumerate(ranges)
+    ]
+
+    try:
+        if workers == 1:
+            stats = [score_shard(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_shard_worker,
+                                     initargs=(args.deterministic, args.scorecard)) as pool:
+                stats = list(pool.map(score_shard, tasks))
+
+        with open(args.output, 'w', encoding='utf-8', newline='') as out:
+            if out_fmt == 'csv':
+                csv.writer(out).writerow(OUTPUT_COLUMNS)
+            out.flush()
+            for task in tasks:
+                with open(task['part'], 'r', encoding='utf-8', newline='') as part:
+                    shutil.copyfileobj(part, out, 1024 * 1024)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if args.portfolio:
+        portfolio = PortfolioStats()
+        for s in stats:
+            portfolio.merge(s['portfolio'])
+        with open(args.portfolio, 'w', encoding='utf-8') as out:
+            json.dump(portfolio.report(args.top_risks), out, ensure_ascii=False, indent=2)
+            out.write('\n')
+
+    elapsed = time.perf_counter() - started
+    rows = sum(s['rows'] for s in stats)
+    errors = sum(s['errors'] for s in stats)
+    size_mb = sum(s['bytes'] for s in stats) / (1024 * 1024)
+    print(
+        f"scored {rows} rows ({errors} errors) in {elapsed:.2f}s with {workers} workers: "
+        f"{rows / elapsed if elapsed else 0:.0f} rows/s, {size_mb / elapsed if elapsed else 0:.1f} MB/s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def run_audit(args: argparse.Namespace) -> int:
+    """Сводка по журналу аудита; записи читаются порциями из отображенных в память сегментов"""
+    started = time.perf_counter()
+    paths = segment_paths(args.directory)
+    total = 0
+    score_sum = 0
+    first_ns = last_ns = None
+    statuses = np.zeros(len(STATUSES), dtype=np.int64)
+    versions: Counter = Counter()
+    out = open(args.export, 'w', encoding='utf-8') if args.export else None
+    try:
+        for records in iter_records(paths, args.batch_records):
+            total += len(records)
+            score_sum += int(records['score'].sum(dtype=np.int64))
+            statuses += np.bincount(records['status'], minlength=len(STATUSES))[:len(STATUSES)]
+            timestamps = records['timestamp_ns']
+            first_ns = int(timestamps.min()) if first_ns is None else min(first_ns, int(timestamps.min()))
+            last_ns = int(timestamps.max()) if last_ns is None else max(last_ns, int(timestamps.max()))
+            values, counts = np.unique(records['config_version'], return_counts=True)
+            versions.update(dict(zip((v.decode() for v in values.tolist()), counts.tolist())))
+            if out is not None:
+                for row in to_dicts(records):
+                    out.write(json.dumps(row, ensure_ascii=False))
+                    out.write('\n')
+    finally:
+        if out is not None:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        'segments': len(paths),
+        'records': total,
+        'first': datetime.utcfromtimestamp(first_ns / 1e9).isoformat() if first_ns is not None else None,
+        'last': datetime.utcfromtimestamp(last_ns / 1e9).isoformat() if last_ns is not None else None,
+        'statuses': {status.value: int(count) for status, count in zip(STATUSES, statuses)},
+        'mean_score': round(score_sum / total, 2) if total else None,
+        'config_versions': dict(versions.most_common()),
+    }
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    print(f"read {total} records in {elapsed:.2f}s: {total / elapsed if elapsed else 0:.0f} records/s",
+          file=sys.stderr)
+    return 0
+
+
+def _parse_value(raw: str) -> Any:
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+# Поля ScoringConfig, от которых зависят решения движка. Пороги одобрения и лимиты суммы и срока
+# задаются полосами скоркарты (--old-scorecard/--new-scorecard), а не конфигурацией
+REPLAY_CONFIG_FIELDS = ('base_interest_rate',)
+
+
+def replay_engine_spec(config_path: Optional[str], scorecard_path: Optional[str],
+                       overrides: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Описание версии движка для процессов: поля ScoringConfig (файл + KEY=VALUE) и путь к скоркарте.
+    Поля, которые движок не читает, отклоняются: иначе сравнение молча покажет отсутствие изменений
+    """
+    config: Dict[str, Any] = {}
+    if config_path:
+        with open(config_path, encoding='utf-8') as f:
+            config.update(json.load(f))
+    for item in overrides or ():
+        key, sep, value = item.partition('=')
+        if not sep:
+            raise ValueError(f"override must be KEY=VALUE: {item}")
+        config[key.strip()] = _parse_value(value.strip())
+    unused = sorted(set(config) - set(REPLAY_CONFIG_FIELDS))
+    if unused:
+        raise ValueError(
+            f"config fields not used by the scoring engine: {', '.join(unused)} "
+            f"(supported: {', '.join(REPLAY_CONFIG_FIELDS)}; approval thresholds are scorecard status_bands)"
+        )
+    # Ошибки в конфигурации видны до запуска процессов
+    ScoringConfig(**config)
+    return {'config': config, 'scorecard': scorecard_path}
+
+
+def build_replay_engine(spec: Dict[str, Any]) -> ScoringEngine:
+    """
+    Движок для сравнения версий: случайная корректировка детерминирована и выводится из общего
+    для обеих версий зерна, а не из версии конфигурации
+    """
+    engine = ScoringEngine(
+        ScoringConfig(**{**spec['config'], 'deterministic_scoring': True}),
+        load_scorecard(spec['scorecard']) if spec['scorecard'] else None,
+    )
+    engine.random_seed = spec.get('seed')
+    return engine
+
+
+_replay_engines: Optional[Tuple[ScoringEngine, ScoringEngine]] = None
+
+
+def _init_replay_worker(old_spec: Dict[str, Any], new_spec: Dict[str, Any]) -> None:
+    global _replay_engines
+    _replay_engines = build_replay_engine(old_spec), build_replay_engine(new_spec)
+
+
+def _replay_batches(task: Dict[str, Any]) -> Iterator[Tuple[List[ScoringRequest], int]]:
+    """Порции заявок диапазона задачи и число строк, которые не удалось разобрать"""
+    if task['format'] == 'audit':
+        records = read_segment(task['input'])[task['start']:task['end']]
+        for start in range(0, len(records), task['batch_records']):
+            yield to_requests(records[start:start + task['batch_records']]), 0
+        return
+    with open(task['input'], 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for offset, block in iter_blocks(mm, task['start'], task['end'], task['block_bytes']):
+            items = _parse_block(block, offset, task['format'], task['header'])
+            requests = [item for _, item in items if isinstance(item, ScoringRequest)]
+            yield requests, len(items) - len(requests)
+
+
+def replay_shard(task: Dict[str, Any]) -> ReplayStats:
+    """Прогон диапазона корпуса через обе версии; результат - агрегаты фиксированного размера"""
+    old, new = _replay_engines or (build_replay_engine(task['old']), build_replay_engine(task['new']))
+    stats = ReplayStats()
+    for requests, errors in _replay_batches(task):
+        stats.errors += errors
+        stats.update(
+            requests,
+            old.evaluate_many(requests, ScoringDetail.SUMMARY),
+            new.evaluate_many(requests, ScoringDetail.SUMMARY),
+        )
+    return stats
+
+
+def _replay_tasks(args: argparse.Namespace, parts: int) -> List[Dict[str, Any]]:
+    """Диапазоны корпуса: байтовые для CSV/JSONL, диапазоны записей для каталога аудита"""
+    common = {'block_bytes': args.block_size, 'batch_records': args.batch_records}
+    if os.path.isdir(args.input):
+        counts = [(path, len(read_segment(path))) for path in segment_paths(args.input)]
+        step = max(1, sum(count for _, count in counts) // parts)
+        return [
+            {**common, 'input': path, 'format': 'audit', 'header': None, 'start': start,
+             'end': min(count, start + step)}
+            for path, count in counts for start in range(0, count, step)
+        ]
+
+    fmt = _detect_format(args.input, args.format)
+    with open(args.input, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header = None
+            data_start = 0
+            if fmt == 'csv':
+                newline = mm.find(b'\n')
+                header_end = len(mm) if newline == -1 else newline
+                header = next(csv.reader([mm[:header_end].decode('utf-8-sig').rstrip('\r')]))
+                data_start = header_end + 1
+            ranges = split_ranges(mm, data_start, parts)
+    return [
+        {**common, 'input': args.input, 'format': fmt, 'header': header, 'start': start, 'end': end}
+        for start, end in ranges
+    ]
+
+
+def run_replay(args: argparse.Namespace) -> int:
+    """
+    Сравнение старой и новой версий конфигурации/скоркарты на корпусе заявок.
+    Каждый процесс строит обе версии один раз и возвращает агрегаты своих диапазонов, которые складываются.
+    """
+    try:
+        old_spec = replay_engine_spec(args.old_config, args.old_scorecard, args.old_set)
+        new_spec = replay_engine_spec(args.new_config, args.new_scorecard, args.set)
+    except ValueError as e:
+        print(f"replay: {e}", file=sys.stderr)
+        return 2
+    old_spec['seed'] = new_spec['seed'] = args.seed
+    workers = max(1, args.workers)
+    started = time.perf_counter()
+    tasks = _replay_tasks(args, workers * 4 if workers > 1 else 1)
+    for task in tasks:
+        task['old'], task['new'] = old_spec, new_spec
+
+    stats = ReplayStats()
+    if workers == 1:
+        for task in tasks:
+            stats.merge(replay_shard(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_replay_worker,
+                                 initargs=(old_spec, new_spec)) as pool:
+            for part in pool.map(replay_shard, tasks):
+                stats.merge(part)
+
+    elapsed = time.perf_counter() - started
+    report = stats.report(args.top)
+    report['old']['config_version'] = build_replay_engine(old_spec).config_version
+    report['new']['config_version'] = build_replay_engine(new_spec).config_version
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as out:
+            out.write(payload)
+            out.write('\n')
+    else:
+        print(payload)
+    print(f"replayed {stats.records} records ({stats.errors} errors) in {elapsed:.2f}s with {workers} workers: "
+          f"{stats.records / elapsed if elapsed else 0:.0f} records/s", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m app.cli', description='Офлайн-инструменты скоринга')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    score = commands.add_parser('score', help='Скоринг CSV/JSONL файла')
+    score.add_argument('input', help='Входной файл: CSV с заголовком или JSONL')
+    score.add_argument('-o', '--output', required=True, help='Выходной файл: CSV или JSONL')
+    score.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Число процессов')
+    score.add_argument('--format', choices=('csv', 'jsonl'), help='Формат входа (по умолчанию по расширению)')
+    score.add_argument('--output-format', choices=('csv', 'jsonl'), help='Формат выхода (по умолчанию по расширению)')
+    score.add_argument('--detail', choices=[d.value for d in ScoringDetail], default=ScoringDetail.SUMMARY.value,
+                       help='Уровень детализации результатов')
+    score.add_argument('--deterministic', action='store_true',
+                       help='Детерминированная случайная корректировка (воспроизводимые результаты)')
+    score.add_argument('--scorecard', help='Путь к JSON-скоркарте (по умолчанию встроенная)')
+    score.add_argument('--block-size', type=int, default=BLOCK_BYTES, help='Размер порции чтения, байт')
+    score.add_argument('--portfolio', help='Файл JSON с аналитикой портфеля по сегментам сумма x срок')
+    score.add_argument('--top-risks', type=int, default=5, help='Число частых факторов риска в аналитике')
+    score.set_defaults(handler=run_score)
+
+    audit = commands.add_parser('audit', help='Сводка и выгрузка журнала аудита решений')
+    audit.add_argument('directory', help='Каталог сегментов аудита')
+    audit.add_argument('--export', help='Выгрузить записи в JSONL')
+    audit.add_argument('--batch-records', type=int, default=65536, help='Записей в порции чтения')
+    audit.set_defaults(handler=run_audit)
+
+    replay = commands.add_parser('replay', help='Сравнение двух версий конфигурации/скоркарты на корпусе заявок')
+    replay.add_argument('input', help='Корпус: CSV с заголовком, JSONL или каталог сегментов аудита')
+    replay.add_argument('-o', '--output', help='Файл отчета JSON (по умолчанию stdout)')
+    replay.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Число процессов')
+    replay.add_argument('--format', choices=('csv', 'jsonl'), help='Формат входа (по умолчанию по расширению)')
+    replay.add_argument('--old-config', help='JSON с полями ScoringConfig старой версии (из REPLAY_CONFIG_FIELDS)')
+    replay.add_argument('--new-config', help='JSON с полями ScoringConfig новой версии (из REPLAY_CONFIG_FIELDS)')
+    replay.add_argument('--old-scorecard', help='Скоркарта старой версии (по умолчанию встроенная)')
+    replay.add_argument('--new-scorecard', help='Скоркарта новой версии (по умолчанию встроенная)')
+    replay.add_argument('--old-set', action='append', metavar='KEY=VALUE', help='Поле конфигурации старой версии (из REPLAY_CONFIG_FIELDS)')
+    replay.add_argument('--set', action='append', metavar='KEY=VALUE', help='Поле конфигурации новой версии (из REPLAY_CONFIG_FIELDS)')
+    replay.add_argument('--seed', default='replay', help='Зерно случайной корректировки, общее для обеих версий')
+    replay.add_argument('--top', type=int, default=10, help='Число сегментов с наибольшими изменениями')
+    replay.add_argument('--block-size', type=int, default=BLOCK_BYTES, help='Размер порции чтения, байт')
+    replay.add_argument('--batch-records', type=int, default=8192, help='Записей аудита в порции')
+    replay.set_defaults(handler=run_replay)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
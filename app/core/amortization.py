@@ -0,0 +1,74 @@
+from functools import lru_cache
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+
+@lru_cache(maxsize=8192)
+def annuity_terms(rate: float, term: int) -> Tuple[float, float]:
+    """
+    Числитель и знаменатель аннуитетного коэффициента для годовой ставки в процентах:
+    платеж = сумма * числитель / знаменатель. Ставки берутся из небольшого дискретного набора,
+    сроки ограничены, поэтому степень считается один раз на пару (ставка, срок).
+    """
+    monthly_rate = rate / 100 / 12
+    if monthly_rate == 0:
+        return 1.0, float(term)
+    growth = (1 + monthly_rate) ** term
+    return monthly_rate * growth, growth - 1
+
+
+def warm_annuity_cache(rates: Iterable[float], max_term: int) -> int:
+    """Заполнить кэш для всех сочетаний ставок и сроков 1..max_term; возвращает число пар"""
+    count = 0
+    for rate in set(rates):
+        for term in range(1, max_term + 1):
+            annuity_terms(rate, term)
+            count += 1
+    return count
+
+
+def monthly_payment(amount: float, rate: float, term: int) -> float:
+    """Аннуитетный платеж, округленный до копеек"""
+    numerator, denominator = annuity_terms(rate, term)
+    return round(amount * numerator / denominator, 2)
+
+
+def amortization_schedule(amount: float, rate: float, term: int) -> Dict[str, np.ndarray]:
+    """
+    График погашения, рассчитанный массивами по закрытой формуле остатка долга.
+
+    Все месяцы, кроме последнего, платеж равен monthly_payment(amount, rate, term);
+    последний платеж закрывает остаток, поэтому сумма погашенного основного долга равна сумме кредита.
+    Расчет ведется в копейках: платеж = основной долг + проценты в каждой строке.
+    """
+    payment = monthly_payment(amount, rate, term)
+    monthly_rate = rate / 100 / 12
+    months = np.arange(1, term + 1)
+
+    # Остаток после k-го платежа: B_k = A * g^k - P * (g^k - 1) / r
+    if monthly_rate == 0:
+        balances = amount - payment * np.arange(0, term + 1)
+    else:
+        growth = np.power(1 + monthly_rate, np.arange(0, term + 1))
+        balances = amount * growth - payment * (growth - 1) / monthly_rate
+
+    balance_cents = np.rint(balances * 100).astype(np.int64)
+    balance_cents[0] = int(round(amount * 100))
+    balance_cents[-1] = 0
+    balance_cents = np.maximum(balance_cents, 0)
+
+    principal_cents = balance_cents[:-1] - balance_cents[1:]
+    payment_cents = np.full(term, int(round(payment * 100)), dtype=np.int64)
+    interest_cents = payment_cents - principal_cents
+    # Последний платеж: остаток долга плюс проценты на него
+    interest_cents[-1] = int(np.rint(balances[term - 1] * monthly_rate * 100))
+    payment_cents[-1] = principal_cents[-1] + interest_cents[-1]
+
+    return {
+        'month': months,
+        'payment': payment_cents / 100,
+        'principal': principal_cents / 100,
+        'interest': interest_cents / 100,
+        'balance': balance_cents[1:] / 100,
+    }
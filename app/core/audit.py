@@ -0,0 +1,392 @@
+"""
+Аудит решений: неблокирующая запись каждого решения в сегментные файлы и быстрое чтение.
+
+Обработчик запроса только кладет ссылку на решение (заявка, вектор факторов, результат, версия
+конфигурации) в очередь в памяти. Фоновый поток забирает очередь порциями, кодирует записи
+фиксированного размера и дописывает их в текущий сегмент одним вызовом write; fsync выполняется
+не чаще fsync_interval. Сегмент закрывается при достижении segment_bytes, следующий получает
+следующий свободный номер (несколько процессов сервиса пишут в общий каталог в разные сегменты).
+
+При заполненной очереди поведение задает policy:
+    drop  - запись отбрасывается сразу (задержка ответа не растет);
+    block - запрос ждет места в очереди до block_timeout, затем запись отбрасывается.
+Отброшенные записи видны в stats() и в счетчике scoring_audit_records_total{outcome="dropped"}.
+
+Формат сегмента: заголовок HEADER_BYTES (MAGIC, размер записи, число факторов), затем записи
+RECORD_DTYPE подряд. Читатель отображает сегмент в память и отдает записи массивами numpy
+без разбора по одной; недописанная запись в конце сегмента (после сбоя) пропускается.
+"""
+import asyncio
+import logging
+import math
+import os
+import struct
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.core.factors import FactorVector
+from app.core.metrics import metrics
+from app.schemas.scorecard import SCORECARD_FACTORS
+from app.schemas.scoring import ScoringRequest, ScoringResult, ScoringStatus
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SCAUDIT1'
+HEADER_BYTES = 32
+SEGMENT_SUFFIX = '.audit'
+N_FACTORS = len(SCORECARD_FACTORS)
+
+STATUSES = tuple(ScoringStatus)
+_STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Числа с отсутствующим значением (зарплата, условия отказа) хранятся как NaN, срок - как 0
+RECORD_DTYPE = np.dtype([
+    ('timestamp_ns', '<i8'),
+    ('application_id', '<i8'),
+    ('user_id', '<i8'),
+    ('inn', 'S12'),
+    ('passport_number', 'S10'),
+    ('loan_amount', '<f8'),
+    ('loan_term', '<i4'),
+    ('user_salary', '<f8'),
+    ('config_version', 'S16'),
+    ('codes', 'u1', (N_FACTORS,)),
+    ('points', '<i4', (N_FACTORS,)),
+    ('random_factor', '<i4'),
+    ('score', '<i4'),
+    ('status', 'u1'),
+    ('approved_amount', '<f8'),
+    ('approved_term', '<i4'),
+    ('interest_rate', '<f8'),
+    ('monthly_payment', '<f8'),
+    ('insurance_required', '?'),
+])
+_RECORD = struct.Struct(f'<qqq12s10sdid16s{N_FACTORS}B{N_FACTORS}iiiBdiddB')
+_HEADER = struct.Struct('<8sIH')
+assert _RECORD.size == RECORD_DTYPE.itemsize
+
+AuditEntry = Tuple[int, ScoringRequest, FactorVector, ScoringResult, str]
+
+audit_records_total = metrics.counter(
+    'scoring_audit_records_total', 'Audit records by outcome: written, dropped, failed', ('outcome',)
+)
+
+_NAN = float('nan')
+
+
+def _optional(value: Optional[float]) -> float:
+    return _NAN if value is None else value
+
+
+def encode_record(entry: AuditEntry) -> bytes:
+    timestamp_ns, request, vector, result, config_version = entry
+    return _RECORD.pack(
+        timestamp_ns, request.application_id, request.user_id,
+        request.inn.encode(), request.passport_number.encode(),
+        request.loan_amount, request.loan_term, _optional(request.user_salary),
+        config_version.encode(),
+        *vector.codes, *vector.points, vector.random_factor, vector.score,
+        _STATUS_CODES[result.status],
+        _optional(result.approved_amount), result.approved_term or 0,
+        _optional(result.interest_rate), _optional(result.monthly_payment),
+        result.insurance_required,
+    )
+
+
+class AuditSink:
+    """
+    Очередь решений и фоновый писатель сегментов.
+
+    Запись в очередь не выполняет ввода-вывода и кодирования: это append в deque под GIL.
+    Писатель просыпается, когда накопилась порция batch_size, или раз в flush_interval.
+    """
+
+    def __init__(self, directory: str, max_queue: int = 100000, policy: str = 'drop',
+                 block_timeout: float = 1.0, batch_size: int = 1024, flush_interval: float = 0.2,
+                 fsync_interval: float = 1.0, segment_bytes: int = 64 * 1024 * 1024):
+        if policy not in ('drop', 'block'):
+            raise ValueError(f"Unknown audit queue policy: {policy}")
+        self.directory = directory
+        self.max_queue = max_queue
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        # 0 - fsync после каждой порции, отрицательное значение - без fsync (только сброс в ОС)
+        self.fsync_interval = fsync_interval
+        self.segment_bytes = segment_bytes
+
+        self._pending: Deque[AuditEntry] = deque()
+        self._wake = threading.Event()
+        self._closing = False
+        self._thread: Optional[threading.Thread] = None
+        self._fd: Optional[int] = None
+        self._segment_path: Optional[str] = None
+        self._segment_size = 0
+        self._segment_seq = 0
+        self._last_fsync = 0.0
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.written = 0
+        self.failed = 0
+        self.bytes_written = 0
+        self.batches = 0
+        self.fsyncs = 0
+        self.segments = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def start(self) -> None:
+        if not self.enabled or self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        existing = segment_paths(self.directory)
+        self._segment_seq = _segment_number(existing[-1]) + 1 if existing else 0
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Дописать очередь, выполнить fsync и закрыть сегмент"""
+        if self._thread is None:
+            return
+        self._closing = True
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def offer(self, entry: AuditEntry) -> bool:
+        """Поставить запись в очередь без ожидания; False - очередь заполнена"""
+        pending = self._pending
+        if len(pending) >= self.max_queue:
+            return False
+        pending.append(entry)
+        self.enqueued += 1
+        if len(pending) == self.batch_size:
+            self._wake.set()
+        return True
+
+    async def submit(self, request: ScoringRequest, vector: FactorVector, result: ScoringResult,
+                     config_version: str) -> bool:
+        """Записать решение с учетом политики переполнения; False - запись отброшена"""
+        entry = (time.time_ns(), request, vector, result, config_version)
+        if self.offer(entry):
+            return True
+        if self.policy == 'block' and await self._wait_for_room():
+            return self.offer(entry) or self._drop(1)
+        return self._drop(1)
+
+    async def submit_many(self, requests: Sequence[ScoringRequest], vectors: Sequence[FactorVector],
+                          results: Sequence[ScoringResult], config_version: str) -> int:
+        """Записать решения пакета; возвращает число принятых записей"""
+        timestamp_ns = time.time_ns()
+        accepted = 0
+        for request, vector, result in zip(requests, vectors, results):
+            entry = (timestamp_ns, request, vector, result, config_version)
+            if self.offer(entry):
+                accepted += 1
+            elif self.policy == 'block' and await self._wait_for_room() and self.offer(entry):
+                accepted += 1
+            else:
+                self._drop(len(results) - accepted)
+                break
+        return accepted
+
+    async def _wait_for_room(self) -> bool:
+        self.blocked += 1
+        self._wake.set()
+        deadline = time.monotonic() + self.block_timeout
+        while len(self._pending) >= self.max_queue:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(min(self.flush_interval, 0.005))
+        return True
+
+    def _drop(self, count: int) -> bool:
+        self.dropped += count
+        audit_records_total.inc('dropped', amount=count)
+        return False
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            closing = self._closing
+            try:
+                self._drain()
+            except Exception as e:
+                logger.error(f"Audit writer failed: {str(e)}")
+            if closing and not self._pending:
+                break
+        self._close_segment()
+
+    def _drain(self) -> None:
+        pending = self._pending
+        while pending:
+            batch = []
+            for _ in range(min(self.batch_size, len(pending))):
+                try:
+                    batch.append(encode_record(pending.popleft()))
+                except (struct.error, KeyError, AttributeError, TypeError) as e:
+                    self.failed += 1
+                    audit_records_total.inc('failed')
+                    logger.error(f"Audit record skipped: {str(e)}")
+            if batch:
+                self._write(batch)
+        self._maybe_fsync()
+
+    def _write(self, batch: List[bytes]) -> None:
+        data = b''.join(batch)
+        if self._fd is None or self._segment_size + len(data) > self.segment_bytes:
+            self._open_segment()
+        try:
+            os.write(self._fd, data)
+        except OSError as e:
+            self.failed += len(batch)
+            audit_records_total.inc('failed', amount=len(batch))
+            logger.error(f"Audit write to {self._segment_path} failed: {str(e)}")
+            return
+        self._segment_size += len(data)
+        self.bytes_written += len(data)
+        self.written += len(batch)
+        self.batches += 1
+        audit_records_total.inc('written', amount=len(batch))
+
+    def _maybe_fsync(self) -> None:
+        if self._fd is None or self.fsync_interval < 0:
+            return
+        now = time.monotonic()
+        if now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._fd)
+            self._last_fsync = now
+            self.fsyncs += 1
+
+    def _open_segment(self) -> None:
+        """Новый сегмент со следующим свободным номером; в один каталог могут писать несколько процессов"""
+        self._close_segment()
+        while True:
+            path = os.path.join(self.directory, f'{self._segment_seq:010d}{SEGMENT_SUFFIX}')
+            self._segment_seq += 1
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o644)
+                break
+            except FileExistsError:
+                continue
+        header = _HEADER.pack(MAGIC, RECORD_DTYPE.itemsize, N_FACTORS)
+        os.write(fd, header.ljust(HEADER_BYTES, b'\0'))
+        self._fd = fd
+        self._segment_path = path
+        self._segment_size = HEADER_BYTES
+        self.segments += 1
+
+    def _close_segment(self) -> None:
+        if self._fd is None:
+            return
+        try:
+            if self.fsync_interval >= 0 or self._closing:
+                os.fsync(self._fd)
+                self.fsyncs += 1
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "directory": self.directory,
+            "policy": self.policy,
+            "queue_depth": len(self._pending),
+            "max_queue": self.max_queue,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "blocked": self.blocked,
+            "written": self.written,
+            "failed": self.failed,
+            "bytes_written": self.bytes_written,
+            "batches": self.batches,
+            "fsyncs": self.fsyncs,
+            "segments": self.segments,
+            "current_segment": self._segment_path,
+        }
+
+
+def _segment_number(path: str) -> int:
+    return int(os.path.basename(path)[:-len(SEGMENT_SUFFIX)])
+
+
+def segment_paths(directory: str) -> List[str]:
+    """Сегменты каталога в порядке записи"""
+    names = [
+        name for name in os.listdir(directory)
+        if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit()
+    ]
+    return [os.path.join(directory, name) for name in sorted(names)]
+
+
+def read_segment(path: str) -> np.ndarray:
+    """Записи сегмента: структурированный массив RECORD_DTYPE, отображенный в память"""
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_BYTES)
+        size = os.fstat(f.fileno()).st_size
+    if len(header) < HEADER_BYTES:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    magic, record_size, n_factors = _HEADER.unpack_from(header)
+    if magic != MAGIC or record_size != RECORD_DTYPE.itemsize or n_factors != N_FACTORS:
+        raise ValueError(f"{path}: not an audit segment of this format")
+    count = (size - HEADER_BYTES) // record_size
+    if count == 0:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_BYTES, shape=(count,))
+
+
+def iter_records(source: Union[str, Iterable[str]], batch_records: int = 65536) -> Iterator[np.ndarray]:
+    """
+    Записи каталога (или списка сегментов) порциями до batch_records без копирования.
+    Поля порции доступны как столбцы: records['score'], records['status'], records['codes'] и т.д.
+    """
+    paths = segment_paths(source) if isinstance(source, str) else list(source)
+    for path in paths:
+        records = read_segment(path)
+        for start in range(0, len(records), batch_records):
+            yield records[start:start + batch_records]
+
+
+def to_requests(records: np.ndarray) -> List[ScoringRequest]:
+    """Исходные заявки из записей аудита (например, для повторного прогона)"""
+    salaries = records['user_salary'].tolist()
+    return [
+        ScoringRequest.model_construct(
+            application_id=application_id, user_id=user_id, inn=inn.decode(),
+            passport_number=passport.decode(), loan_amount=amount, loan_term=term,
+            user_salary=None if math.isnan(salary) else salary,
+        )
+        for application_id, user_id, inn, passport, amount, term, salary in zip(
+            records['application_id'].tolist(), records['user_id'].tolist(), records['inn'].tolist(),
+            records['passport_number'].tolist(), records['loan_amount'].tolist(),
+            records['loan_term'].tolist(), salaries,
+        )
+    ]
+
+
+def to_dicts(records: np.ndarray) -> Iterator[Dict[str, Any]]:
+    """Записи в виде словарей (медленный путь для выгрузки и отладки)"""
+    for record in records.tolist():
+        row = dict(zip(RECORD_DTYPE.names, record))
+        for name in ('inn', 'passport_number', 'config_version'):
+            row[name] = row[name].decode()
+        for name in ('user_salary', 'approved_amount', 'interest_rate', 'monthly_payment'):
+            if math.isnan(row[name]):
+                row[name] = None
+        row['approved_term'] = row['approved_term'] or None
+        row['status'] = STATUSES[row['status']].value
+        row['codes'] = row['codes'].tolist()
+        row['points'] = row['points'].tolist()
+        yield row
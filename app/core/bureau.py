@@ -0,0 +1,245 @@
+"""
+Коннектор к кредитному бюро: риск по паспорту и по ИНН.
+
+HTTP-вызовы идут через один requests.Session с пулом соединений (HTTPAdapter) в отдельном
+пуле потоков, event loop их только ждет. Паспорт и ИНН заявки (и все документы пакета)
+запрашиваются одновременно, не больше pool_size вызовов сразу; таймаут считается от начала
+вызова, а не от постановки в очередь. Ответы кэшируются по номеру документа (LRU + TTL), одновременные
+запросы одного документа схлопываются в один вызов. После серии ошибок подряд автомат
+(circuit breaker) перестает обращаться к бюро до пробного вызова.
+
+Если бюро не настроено, недоступно или вызов не уложился в таймаут, используется прежняя
+оценка по хэшу номера документа (passport_hash_score, inn_hash_score) - заявка не отклоняется
+из-за бюро. Такие значения не кэшируются.
+"""
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.cache import ResultCache
+from app.core.metrics import metrics
+
+PASSPORT = 'passport'
+INN = 'inn'
+
+bureau_lookups_total = metrics.counter(
+    'scoring_bureau_lookups_total', 'Credit bureau lookups by document kind and outcome', ('kind', 'outcome')
+)
+_REQUEST_DURATION = {
+    kind: metrics.histogram('scoring_bureau_request_duration_seconds', 'Credit bureau HTTP call duration',
+                            kind=kind)
+    for kind in (PASSPORT, INN)
+}
+
+
+def passport_hash_score(passport: str) -> int:
+    """Риск по паспорту без бюро: значение из хэша номера, от -20 до 20"""
+    return int.from_bytes(hashlib.md5(passport.encode()).digest(), 'big') % 41 - 20
+
+
+def inn_hash_score(inn: str) -> int:
+    """Риск по ИНН без бюро: значение из хэша номера, от -15 до 15"""
+    return int.from_bytes(hashlib.sha256(inn.encode()).digest(), 'big') % 31 - 15
+
+
+_FALLBACK = {PASSPORT: passport_hash_score, INN: inn_hash_score}
+
+
+def _release(slots: asyncio.Semaphore, call: asyncio.Future) -> None:
+    slots.release()
+    # Ошибка вызова, завершившегося после таймаута, уже учтена как таймаут
+    if not call.cancelled():
+        call.exception()
+
+
+class BureauScores(NamedTuple):
+    """Входы факторов passport_risk и inn_risk, полученные от бюро"""
+    passport: int
+    inn: int
+
+
+class CircuitBreaker:
+    """
+    Автомат отключения: closed - вызовы разрешены; после failure_threshold ошибок подряд - open,
+    вызовы не выполняются reset_timeout секунд; затем half_open - разрешен один пробный вызов,
+    успех закрывает автомат, ошибка снова открывает.
+    Используется из одного event loop, блокировки не нужны.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.state == 'closed':
+            return True
+        if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = 'half_open'
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.state = 'closed'
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == 'half_open' or self.failures >= self.failure_threshold:
+            if self.state != 'open':
+                self.opens += 1
+            self.state = 'open'
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opens": self.opens,
+            "rejected": self.rejected,
+        }
+
+
+class BureauClient:
+    """
+    Клиент бюро: GET {base_url}/passport/{номер} и GET {base_url}/inn/{номер},
+    ответ - JSON с полем risk (целое, в шкале оценки по хэшу)
+    """
+
+    def __init__(self, base_url: str, timeout: float = 0.5, pool_size: int = 32,
+                 cache_size: int = 100000, cache_ttl: float = 3600.0,
+                 failure_threshold: int = 5, reset_timeout: float = 10.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.cache = ResultCache(max_size=cache_size, ttl=cache_ttl)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._session: Optional[requests.Session] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.base_url)
+
+    def start(self) -> None:
+        if not self.enabled or self._session is not None:
+            return
+        session = requests.Session()
+        # Соединения переиспользуются: пул размером с число потоков, без повторов внутри requests
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        self._session = session
+        self._pool = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix='bureau')
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    async def lookup(self, request: Any) -> Optional[BureauScores]:
+        """Данные бюро для заявки (нужны passport_number и inn); None, если бюро не настроено"""
+        if not self.enabled:
+            return None
+        return (await self.lookup_many((request,)))[0]
+
+    async def lookup_many(self, batch: Sequence[Any]) -> Optional[List[BureauScores]]:
+        """
+        Данные бюро для пакета заявок в том же порядке. Кэш проверяется сразу,
+        каждый недостающий документ запрашивается один раз, все запросы идут одновременно
+        """
+        if not self.enabled:
+            return None
+        values: Dict[Tuple[str, str], int] = {}
+        missing: Dict[Tuple[str, str], None] = {}
+        for request in batch:
+            for key in ((PASSPORT, request.passport_number), (INN, request.inn)):
+                if key in values or key in missing:
+                    continue
+                value = self.cache.get(key)
+                if value is None:
+                    missing[key] = None
+                else:
+                    bureau_lookups_total.inc(key[0], 'cache')
+                    values[key] = value
+        if missing:
+            fetched = await asyncio.gather(*(self._risk(key) for key in missing))
+            values.update(zip(missing, fetched))
+        return [BureauScores(values[(PASSPORT, r.passport_number)], values[(INN, r.inn)]) for r in batch]
+
+    async def _risk(self, key: Tuple[str, str]) -> int:
+        """Вызов бюро по документу; одновременные запросы одного документа ждут один вызов"""
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(*key))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._in_flight.pop(key, None))
+        else:
+            bureau_lookups_total.inc(key[0], 'coalesced')
+        return await asyncio.shield(future)
+
+    async def _fetch(self, kind: str, number: str) -> int:
+        if self._session is None:
+            self.start()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        slots = self._slots
+        await slots.acquire()
+        # Автомат проверяется после ожидания слота: за это время он мог открыться
+        if not self.breaker.allow():
+            slots.release()
+            bureau_lookups_total.inc(kind, 'circuit_open')
+            return _FALLBACK[kind](number)
+
+        started = time.perf_counter_ns()
+        call = asyncio.get_running_loop().run_in_executor(self._pool, self._get, kind, number)
+        # Слот освобождается, когда поток действительно закончил вызов (и после таймаута тоже)
+        call.add_done_callback(lambda done: _release(slots, done))
+        try:
+            value = await asyncio.wait_for(asyncio.shield(call), self.timeout)
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+        except (requests.RequestException, ValueError, KeyError, TypeError):
+            outcome = 'error'
+        else:
+            if metrics.enabled:
+                _REQUEST_DURATION[kind].observe_ns(time.perf_counter_ns() - started)
+            self.breaker.record_success()
+            self.cache.set((kind, number), value)
+            bureau_lookups_total.inc(kind, 'ok')
+            return value
+
+        self.breaker.record_failure()
+        bureau_lookups_total.inc(kind, outcome)
+        return _FALLBACK[kind](number)
+
+    def _get(self, kind: str, number: str) -> int:
+        response = self._session.get(f"{self.base_url}/{kind}/{number}", timeout=self.timeout)
+        response.raise_for_status()
+        return int(response.json()['risk'])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "base_url": self.base_url,
+            "timeout": self.timeout,
+            "pool_size": self.pool_size,
+            "in_flight": len(self._in_flight),
+            "breaker": self.breaker.stats(),
+            "cache": self.cache.stats(),
+        }
@@ -0,0 +1,254 @@
+import hashlib
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+
+class ResultCache:
+    """
+    Потокобезопасный LRU-кэш с ограничением по числу записей и времени жизни.
+    Кэш привязан к версии конфигурации: при смене версии все записи сбрасываются.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version: Optional[str] = None
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def sync_version(self, version: str) -> None:
+        """Сбросить кэш, если версия конфигурации изменилась"""
+        if version == self.version:
+            return
+        with self._lock:
+            if version != self.version:
+                if self.version is not None:
+                    self.invalidations += 1
+                self._data.clear()
+                self.version = version
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < now:
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# Заголовок слота общего кэша: счетчик записи (нечетный - идет запись), хэш ключа, срок,
+# длина значения, CRC32 значения
+_SLOT_HEADER = struct.Struct('<QQdII')
+_SEQ = struct.Struct('<Q')
+_SLOT_FIELDS = struct.Struct('<QdII')
+_SLOT_DTYPE_FIELDS = {
+    'names': ['seq', 'key', 'expires', 'length', 'crc'],
+    'formats': ['<u8', '<u8', '<f8', '<u4', '<u4'],
+    'offsets': [0, 8, 16, 24, 28],
+}
+# Слотов в наборе: ключ может лежать в любом из них, вытесняется запись с самым ранним сроком
+SHARED_CACHE_WAYS = 2
+
+
+class SharedResultCache:
+    """
+    Кэш с тем же интерфейсом, что ResultCache, в сегменте multiprocessing.shared_memory,
+    общий для всех процессов сервиса: решение, посчитанное одним воркером, достается остальным,
+    и кэш не дублируется в памяти каждого процесса.
+
+    Сегмент - таблица слотов фиксированного размера slot_bytes, значения хранятся сериализованными
+    (dumps/loads). Ключ ищется в наборе из SHARED_CACHE_WAYS слотов по хэшу ключа вместе с версией
+    конфигурации, поэтому записи другой версии просто не находятся и сбрасывать кэш не нужно.
+    Блокировок между процессами нет: запись выставляет нечетный счетчик слота, пишет значение
+    и поля заголовка, затем четный счетчик; чтение проверяет, что счетчик не менялся и CRC значения
+    сходится, иначе это промах.
+    Значения длиннее слота не кэшируются. hits/misses считаются в своем процессе.
+    """
+
+    def __init__(self, name: str, dumps: Callable[[Any], bytes], loads: Callable[[bytes], Any],
+                 max_size: int = 10000, ttl: float = 300.0, slot_bytes: int = 4096, create: bool = False):
+        if slot_bytes <= _SLOT_HEADER.size:
+            raise ValueError(f"slot_bytes must exceed {_SLOT_HEADER.size}")
+        if create:
+            sets = max(1, max_size // SHARED_CACHE_WAYS)
+            self._shm = SharedMemory(name=name, create=True, size=sets * SHARED_CACHE_WAYS * slot_bytes)
+        else:
+            self._shm = SharedMemory(name=name)
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+        self.ttl = ttl
+        self.slot_bytes = slot_bytes
+        self.max_size = self._shm.size // slot_bytes // SHARED_CACHE_WAYS * SHARED_CACHE_WAYS
+        self.version: Optional[str] = None
+        self._sets = self.max_size // SHARED_CACHE_WAYS
+        self._buf = self._shm.buf
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.oversized = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def sync_version(self, version: str) -> None:
+        if version != self.version:
+            if self.version is not None:
+                self.invalidations += 1
+            self.version = version
+
+    def _slots(self, key: str):
+        digest = hashlib.blake2b(f"{self.version}:{key}".encode(), digest_size=8).digest()
+        key_hash = int.from_bytes(digest, 'little') or 1  # 0 - пустой слот
+        first = key_hash % self._sets * SHARED_CACHE_WAYS
+        return key_hash, range(first, first + SHARED_CACHE_WAYS)
+
+    def get(self, key: str) -> Optional[Any]:
+        key_hash, slots = self._slots(key)
+        buf = self._buf
+        now = time.monotonic()
+        for slot in slots:
+            offset = slot * self.slot_bytes
+            seq, slot_key, expires, length, crc = _SLOT_HEADER.unpack_from(buf, offset)
+            if slot_key != key_hash or seq & 1:
+                continue
+            if expires < now:
+                break
+            data = bytes(buf[offset + _SLOT_HEADER.size:offset + _SLOT_HEADER.size + length])
+            # Слот перезаписан другим процессом во время чтения
+            if _SLOT_HEADER.unpack_from(buf, offset)[0] != seq or zlib.crc32(data) != crc:
+                break
+            self.hits += 1
+            return self.loads(data)
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        data = self.dumps(value)
+        if len(data) > self.slot_bytes - _SLOT_HEADER.size:
+            self.oversized += 1
+            return
+        key_hash, slots = self._slots(key)
+        buf = self._buf
+        now = time.monotonic()
+
+        target = None
+        oldest = None
+        for slot in slots:
+            seq, slot_key, expires, _, _ = _SLOT_HEADER.unpack_from(buf, slot * self.slot_bytes)
+            if slot_key == key_hash or slot_key == 0 or expires < now:
+                target = slot
+                break
+            if oldest is None or expires < oldest[1]:
+                oldest = (slot, expires)
+        if target is None:
+            target = oldest[0]
+            self.evictions += 1
+
+        offset = target * self.slot_bytes
+        seq = _SLOT_HEADER.unpack_from(buf, offset)[0]
+        if seq & 1:
+            return  # слот сейчас пишет другой процесс
+        _SEQ.pack_into(buf, offset, seq + 1)
+        buf[offset + _SLOT_HEADER.size:offset + _SLOT_HEADER.size + len(data)] = data
+        _SLOT_FIELDS.pack_into(buf, offset + _SEQ.size, key_hash, now + self.ttl, len(data), zlib.crc32(data))
+        # Четный счетчик - последним, после всех полей заголовка
+        _SEQ.pack_into(buf, offset, seq + 2)
+
+    def _headers(self) -> np.ndarray:
+        dtype = np.dtype({**_SLOT_DTYPE_FIELDS, 'itemsize': self.slot_bytes})
+        return np.ndarray((self.max_size,), dtype=dtype, buffer=self._buf)
+
+    def clear(self) -> None:
+        headers = self._headers()
+        headers['key'] = 0
+        del headers
+
+    def __len__(self) -> int:
+        headers = self._headers()
+        size = int(np.count_nonzero((headers['key'] != 0) & (headers['expires'] >= time.monotonic())))
+        del headers
+        return size
+
+    def close(self) -> None:
+        self._buf = None
+        self._shm.close()
+
+    def unlink(self) -> None:
+        self._shm.unlink()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "shared": self.name,
+            "size": len(self),
+            "max_size": self.max_size,
+            "slot_bytes": self.slot_bytes,
+            "ttl": self.ttl,
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "oversized": self.oversized,
+        }
@@ -0,0 +1,50 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from app.core.metrics import metrics
+
+coalesced_total = metrics.counter(
+    'scoring_coalesced_requests_total', 'Requests served from another in-flight or recent evaluation',
+    ('source',)
+)
+
+
+class SingleFlight:
+    """
+    Схлопывание одинаковых конкурентных вызовов: пока вычисление по ключу выполняется,
+    повторные вызовы с тем же ключом ждут его результат (или исключение) вместо нового расчета.
+
+    Вычисление запускается отдельной задачей, поэтому отмена запроса, который его начал,
+    не отменяет ожидание остальных.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            coalesced_total.inc('in_flight')
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(factory())
+        self._in_flight[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        self.leaders += 1
+        return await asyncio.shield(future)
+
+    def _forget(self, key: str, future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._in_flight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,161 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from app.core.metrics import metrics
+from app.core.scorecard import compile_scorecard
+from app.core.scoring_engine import ScoringEngine
+from app.schemas.scorecard import Scorecard
+from app.schemas.scoring import ScoringConfig
+
+
+class ExecutorOverloaded(Exception):
+    """Очередь исполнителя заполнена, задача не принята"""
+
+
+# Экземпляр движка внутри процесса-исполнителя, создается один раз при старте процесса
+_worker_engine: Optional[ScoringEngine] = None
+
+
+def _init_worker(config_data: Dict[str, Any], scorecard_data: Dict[str, Any]) -> None:
+    global _worker_engine
+    _worker_engine = ScoringEngine(ScoringConfig(**config_data), compile_scorecard(Scorecard(**scorecard_data)))
+
+
+def _warm_up_worker() -> int:
+    return multiprocessing.current_process().pid
+
+
+def _call_in_worker(method: str, args: tuple, metrics_enabled: bool = True) -> tuple:
+    # Переключатель метрик передается с каждой задачей, приращения метрик возвращаются с результатом
+    metrics.enabled = metrics_enabled
+    started = time.monotonic()
+    result = getattr(_worker_engine, method)(*args)
+    return started, result, metrics.drain() if metrics_enabled else None
+
+
+class ScoringExecutor:
+    """
+    Исполнитель скоринга для асинхронных роутов.
+
+    inline  - движок вызывается прямо в event loop (для отладки и малой нагрузки);
+    thread  - пул потоков с общим экземпляром движка;
+    process - пул процессов, в каждом свой прогретый экземпляр движка.
+
+    Число принятых, но не завершенных задач ограничено max_queue:
+    сверх лимита run() сразу поднимает ExecutorOverloaded, а не копит очередь.
+    """
+
+    def __init__(self, engine: ScoringEngine, mode: str = "inline", workers: int = 4, max_queue: int = 256):
+        self.engine = engine
+        self.mode = mode
+        self.workers = workers
+        self.max_queue = max_queue
+        self._pool: Optional[Executor] = None
+        # Создание и замена пула; reload выполняется в отдельном потоке, не в event loop
+        self._lock = threading.Lock()
+
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def start(self) -> None:
+        """Создание пула и прогрев исполнителей"""
+        if self.mode == "inline" or self._pool is not None:
+            return
+        with self._lock:
+            if self._pool is None:
+                self._pool = self._create_pool()
+
+    def _create_pool(self) -> Executor:
+        if self.mode == "thread":
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scoring")
+        if self.mode == "process":
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.engine.config.model_dump(), self.engine.scorecard.definition.model_dump()),
+            )
+            # Поднимаем все процессы заранее, чтобы первые запросы не ждали их запуска
+            for future in [pool.submit(_warm_up_worker) for _ in range(self.workers)]:
+                future.result()
+            return pool
+        raise ValueError(f"Unknown execution mode: {self.mode}")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def reload(self) -> None:
+        """
+        Применить текущие конфигурацию и скоркарту движка.
+        Потоки и режим inline используют общий движок напрямую; пул процессов пересоздается:
+        новый пул поднимается и прогревается целиком, пока задачи идут в старый, затем пулы
+        подменяются, и уже принятые задачи старый пул дорабатывает сам. Блокирует до прогрева
+        нового пула, поэтому из async-кода вызывается через asyncio.to_thread; одновременные
+        перезагрузки выполняются по очереди.
+        """
+        if self.mode != "process":
+            return
+        with self._lock:
+            if self._pool is None:
+                return
+            old_pool, self._pool = self._pool, self._create_pool()
+        old_pool.shutdown(wait=False)
+
+    async def run(self, method: str, *args: Any) -> Any:
+        """Выполнить метод ScoringEngine с учетом режима исполнения"""
+        if self._in_flight >= self.max_queue:
+            self._rejected += 1
+            raise ExecutorOverloaded(f"Scoring queue is full ({self.max_queue} tasks in flight)")
+
+        self._in_flight += 1
+        submitted = time.monotonic()
+        try:
+            if self.mode == "inline":
+                started, result = submitted, getattr(self.engine, method)(*args)
+            else:
+                if self._pool is None:
+                    self.start()
+                loop = asyncio.get_running_loop()
+                if self.mode == "thread":
+                    started, result = await loop.run_in_executor(self._pool, self._call_local, method, args)
+                else:
+                    started, result, delta = await loop.run_in_executor(
+                        self._pool, _call_in_worker, method, args, metrics.enabled
+                    )
+                    metrics.merge(delta)
+        finally:
+            self._in_flight -= 1
+
+        wait = max(0.0, started - submitted)
+        self._completed += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        return result
+
+    def _call_local(self, method: str, args: tuple) -> tuple:
+        started = time.monotonic()
+        return started, getattr(self.engine, method)(*args)
+
+    def stats(self) -> Dict[str, Any]:
+        workers = 0 if self.mode == "inline" else self.workers
+        return {
+            "mode": self.mode,
+            "workers": workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": max(0, self._in_flight - workers) if workers else 0,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "avg_wait_ms": round(self._wait_total / self._completed * 1000, 3) if self._completed else 0.0,
+            "max_wait_ms": round(self._wait_max * 1000, 3),
+        }
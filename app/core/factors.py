@@ -0,0 +1,214 @@
+"""
+Внутреннее представление оценки: вектор факторов и решение.
+
+Внутри движка факторы, факторы риска, причины отказа и рекомендации хранятся целыми кодами:
+индексом фактора, кодом полосы скоркарты, кодом серьезности и номером текста в таблицах ниже.
+Словари и строки собираются только при формировании ответа API.
+"""
+from typing import List, Optional, Tuple
+
+from app.schemas.scorecard import SCORECARD_FACTORS
+from app.schemas.scoring import ScoringStatus
+
+# Индексы факторов в векторе - порядок SCORECARD_FACTORS
+LOAN_AMOUNT_RATIO = SCORECARD_FACTORS.index('loan_amount_ratio')
+LOAN_TERM_RATIO = SCORECARD_FACTORS.index('loan_term_ratio')
+PASSPORT_RISK = SCORECARD_FACTORS.index('passport_risk')
+INN_RISK = SCORECARD_FACTORS.index('inn_risk')
+APPLICATION_RISK = SCORECARD_FACTORS.index('application_risk')
+INCOME_SUFFICIENCY = SCORECARD_FACTORS.index('income_sufficiency')
+SALARY_STABILITY = SCORECARD_FACTORS.index('salary_stability')
+
+# Поля заявки, от которых зависит каждый фактор (по индексам факторов)
+FACTOR_INPUTS = (
+    ('loan_amount',),
+    ('loan_term',),
+    ('passport_number',),
+    ('inn',),
+    ('application_id',),
+    ('loan_amount', 'loan_term', 'user_salary'),
+    ('user_salary',),
+)
+# Обратная таблица: индексы факторов, зависящих от поля заявки
+FACTORS_BY_FIELD = {
+    field: tuple(index for index, inputs in enumerate(FACTOR_INPUTS) if field in inputs)
+    for field in sorted({field for inputs in FACTOR_INPUTS for field in inputs})
+}
+
+# Факторы риска вне скоркарты продолжают нумерацию факторов
+OVERALL_SCORE = len(SCORECARD_FACTORS)
+SALARY_MISSING = OVERALL_SCORE + 1
+RISK_FACTOR_NAMES = SCORECARD_FACTORS + ('overall_score', 'salary_missing')
+# Описание и влияние для факторов риска вне скоркарты
+EXTRA_RISKS = {
+    OVERALL_SCORE: ('Общий кредитный рейтинг слишком низкий', -50),
+    SALARY_MISSING: ('Зарплата не указана - невозможно оценить платежеспособность', -20),
+}
+
+HIGH = 0
+MEDIUM = 1
+SEVERITY_NAMES = ('high', 'medium')
+
+RANDOM_FACTOR_DESCRIPTION = 'Случайная корректировка'
+
+REJECTION_REASONS = (
+    "Недостаточный кредитный рейтинг",
+    "Низкий уровень кредитоспособности",
+    "Недостаточный уровень дохода для запрашиваемой суммы",
+    "Не указана зарплата - невозможно оценить платежеспособность",
+    "Запрашиваемая сумма превышает допустимые лимиты",
+    "Общий уровень риска превышает допустимые значения",
+    "Запрашиваемый срок кредита несет повышенные риски",
+    "Требуется дополнительная проверка паспортных данных",
+    "Уровень дохода недостаточен для комфортного обслуживания кредита",
+    "Требуется ручная проверка данных заявителя",
+    "Несоответствие требованиям кредитной политики банка",
+)
+(REASON_LOW_SCORE, REASON_LOW_CREDITWORTHINESS, REASON_INCOME, REASON_SALARY_MISSING, REASON_AMOUNT,
+ REASON_OVERALL_RISK, REASON_TERM, REASON_PASSPORT, REASON_SALARY_LEVEL, REASON_MANUAL_REVIEW,
+ REASON_POLICY) = range(len(REJECTION_REASONS))
+
+# Причины по факторам высокого риска и по первым двум факторам среднего риска
+_HIGH_RISK_REASONS = {
+    INCOME_SUFFICIENCY: REASON_INCOME,
+    SALARY_MISSING: REASON_SALARY_MISSING,
+    LOAN_AMOUNT_RATIO: REASON_AMOUNT,
+    OVERALL_SCORE: REASON_OVERALL_RISK,
+}
+_MEDIUM_RISK_REASONS = {
+    LOAN_TERM_RATIO: REASON_TERM,
+    PASSPORT_RISK: REASON_PASSPORT,
+    SALARY_STABILITY: REASON_SALARY_LEVEL,
+}
+
+RECOMMENDATIONS = (
+    "Рекомендуем обратиться за кредитом с меньшей суммой",
+    "Рассмотрите возможность увеличения срока кредита",
+    "Укажите вашу зарплату для более точной оценки платежеспособности",
+    "Предоставьте документы, подтверждающие дополнительный доход",
+    "Укажите вашу зарплату в личном кабинете",
+    "Подготовьте дополнительные документы, подтверждающие доход",
+    "Будьте готовы к звонку от кредитного специалиста",
+    "Рекомендуем указать зарплату для ускорения проверки",
+    "Рассмотрите возможность страхования кредита для снижения ставки",
+    "Для уточнения деталей обратитесь в отделение банка",
+)
+(ADVICE_SMALLER_AMOUNT, ADVICE_LONGER_TERM, ADVICE_PROVIDE_SALARY, ADVICE_EXTRA_INCOME, ADVICE_SALARY_IN_PROFILE,
+ ADVICE_INCOME_DOCUMENTS, ADVICE_EXPECT_CALL, ADVICE_SALARY_SPEEDUP, ADVICE_INSURANCE,
+ ADVICE_CONTACT_BRANCH) = range(len(RECOMMENDATIONS))
+
+_HIGH_RISK_ADVICE = {
+    INCOME_SUFFICIENCY: ADVICE_EXTRA_INCOME,
+    SALARY_MISSING: ADVICE_SALARY_IN_PROFILE,
+}
+
+Risk = Tuple[int, int]  # (индекс фактора риска, серьезность)
+
+
+class FactorVector:
+    """
+    Баллы одной заявки: коды полос и баллы факторов в порядке скоркарты, случайная корректировка
+    и итоговый балл. Факторы риска вычисляются по баллам один раз и хранятся кодами.
+    """
+
+    __slots__ = ('codes', 'points', 'random_factor', 'score', 'salary_missing', '_risks')
+
+    def __init__(self, codes: List[int], points: List[int], random_factor: int, score: int,
+                 salary_missing: bool):
+        self.codes = codes
+        self.points = points
+        self.random_factor = random_factor
+        self.score = score
+        self.salary_missing = salary_missing
+        self._risks: Optional[List[Risk]] = None
+
+    @property
+    def risks(self) -> List[Risk]:
+        """Факторы риска в порядке ответа: факторы скоркарты, затем общий балл и отсутствие зарплаты"""
+        risks = self._risks
+        if risks is None:
+            risks = []
+            for index, points in enumerate(self.points):
+                if points < -10:
+                    risks.append((index, HIGH))
+                elif points < 0:
+                    risks.append((index, MEDIUM))
+            if self.score < 500:
+                risks.append((OVERALL_SCORE, HIGH))
+            if self.salary_missing:
+                risks.append((SALARY_MISSING, MEDIUM))
+            self._risks = risks
+        return risks
+
+    def rejection_reasons(self, manual_review: bool = False) -> List[int]:
+        """Коды причин отказа (номера в REJECTION_REASONS)"""
+        reasons = []
+        if self.score < 500:
+            reasons.append(REASON_LOW_SCORE)
+        elif self.score < 550:
+            reasons.append(REASON_LOW_CREDITWORTHINESS)
+
+        risks = self.risks
+        for index, severity in risks:
+            if severity == HIGH and index in _HIGH_RISK_REASONS:
+                reasons.append(_HIGH_RISK_REASONS[index])
+        # Учитываются только первые два фактора среднего риска
+        medium = [index for index, severity in risks if severity == MEDIUM][:2]
+        for index in medium:
+            if index in _MEDIUM_RISK_REASONS:
+                reasons.append(_MEDIUM_RISK_REASONS[index])
+
+        if not reasons:
+            reasons.append(REASON_MANUAL_REVIEW if manual_review else REASON_POLICY)
+        return reasons
+
+    def recommendations(self, status: ScoringStatus, risk_level: str, user_salary: Optional[float]) -> List[int]:
+        """Коды рекомендаций (номера в RECOMMENDATIONS)"""
+        advice = []
+        if status == ScoringStatus.REJECTED:
+            if self.score < 550:
+                advice.append(ADVICE_SMALLER_AMOUNT)
+                advice.append(ADVICE_LONGER_TERM)
+            if not user_salary:
+                advice.append(ADVICE_PROVIDE_SALARY)
+            for index, severity in self.risks:
+                if severity == HIGH and index in _HIGH_RISK_ADVICE:
+                    advice.append(_HIGH_RISK_ADVICE[index])
+        elif status == ScoringStatus.MANUAL_REVIEW:
+            advice.append(ADVICE_INCOME_DOCUMENTS)
+            advice.append(ADVICE_EXPECT_CALL)
+            if not user_salary:
+                advice.append(ADVICE_SALARY_SPEEDUP)
+        elif status == ScoringStatus.APPROVED:
+            if risk_level == 'MEDIUM':
+                advice.append(ADVICE_INSURANCE)
+
+        if not advice:
+            advice.append(ADVICE_CONTACT_BRANCH)
+        return advice
+
+
+class Decision:
+    """Решение по заявке; условия кредита заполнены только для одобренных заявок"""
+
+    __slots__ = ('status', 'approved_amount', 'approved_term', 'interest_rate', 'monthly_payment',
+                 'insurance_required')
+
+    def __init__(self, status: ScoringStatus, approved_amount: Optional[float] = None,
+                 approved_term: Optional[int] = None, interest_rate: Optional[float] = None,
+                 monthly_payment: Optional[float] = None, insurance_required: bool = False):
+        self.status = status
+        self.approved_amount = approved_amount
+        self.approved_term = approved_term
+        self.interest_rate = interest_rate
+        self.monthly_payment = monthly_payment
+        self.insurance_required = insurance_required
+
+
+# Решения без условий кредита одинаковы для всех заявок с тем же статусом и не изменяются
+_DECLINED = {status: Decision(status) for status in ScoringStatus}
+
+
+def declined(status: ScoringStatus) -> Decision:
+    """Решение без одобрения (отказ или ручная проверка)"""
+    return _DECLINED[status]
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.core.audit import AuditSink
+from app.core.bureau import BureauClient
+from app.core.executor import ScoringExecutor
+from app.schemas.scoring import JobStatus, ScoringDetail, ScoringJob, ScoringRequest, ScoringResult
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class JobQueueFull(Exception):
+    """Очередь заданий заполнена, задание не принято"""
+
+
+class Job:
+    """Фоновое задание скоринга: заявки, накопленные результаты и состояние"""
+
+    def __init__(self, requests: List[ScoringRequest], detail: ScoringDetail):
+        self.job_id = uuid.uuid4().hex
+        self.requests: Optional[List[ScoringRequest]] = requests
+        self.detail = detail
+        self.total = len(requests)
+        self.results: List[ScoringResult] = []
+        self.status = JobStatus.QUEUED
+        self.error: Optional[str] = None
+        self.cancel_requested = False
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.expires_monotonic: Optional[float] = None
+
+    @property
+    def processed(self) -> int:
+        return len(self.results)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def finish(self, status: JobStatus, ttl: float, error: Optional[str] = None) -> None:
+        self.status = status
+        self.error = error
+        self.finished_at = datetime.utcnow()
+        self.expires_monotonic = time.monotonic() + ttl
+        # Входные заявки больше не нужны, держим только результаты
+        self.requests = None
+
+    def snapshot(self, ttl: float) -> ScoringJob:
+        return ScoringJob(
+            job_id=self.job_id,
+            status=self.status,
+            detail=self.detail,
+            total=self.total,
+            processed=self.processed,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            expires_at=self.finished_at + timedelta(seconds=ttl) if self.finished_at else None,
+            error=self.error
+        )
+
+
+class JobManager:
+    """
+    Очередь фоновых заданий скоринга.
+
+    Задания ждут в ограниченной очереди (max_queue), сверх лимита submit() поднимает JobQueueFull.
+    Фиксированное число воркеров берет задания по одному и оценивает их порциями через
+    собственный ScoringExecutor - отдельный от интерактивного пула, поэтому большие задания
+    не занимают мощность /evaluate. Отмена срабатывает между порциями. Завершенные задания
+    хранятся ttl секунд, затем удаляются вместе с результатами. Решения порций уходят в журнал
+    аудита, если он передан и включен.
+    """
+
+    def __init__(self, executor: ScoringExecutor, workers: int = 2, max_queue: int = 100,
+                 chunk_size: int = 1000, ttl: float = 3600.0, audit: Optional[AuditSink] = None,
+                 bureau: Optional[BureauClient] = None):
+        self.executor = executor
+        self.audit = audit
+        self.bureau = bureau
+        self.workers = workers
+        self.max_queue = max_queue
+        self.chunk_size = chunk_size
+        self.ttl = ttl
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._executor_lock: Optional[asyncio.Lock] = None
+
+        self._submitted = 0
+        self._rejected = 0
+        self._expired = 0
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._executor_lock = asyncio.Lock()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._cleanup_loop()))
+
+    async def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.executor.shutdown()
+
+    def submit(self, requests: List[ScoringRequest], detail: ScoringDetail) -> Job:
+        if self._queue is None:
+            self.start()
+        job = Job(requests, detail)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._rejected += 1
+            raise JobQueueFull(f"Job queue is full ({self.max_queue} jobs waiting)")
+        self._jobs[job.job_id] = job
+        self._submitted += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is not None and job.expires_monotonic is not None and job.expires_monotonic <= time.monotonic():
+            self._remove(job_id)
+            return None
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Отмена: ожидающее задание снимается сразу, выполняющееся - после текущей порции"""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.cancel_requested = True
+        if job.status == JobStatus.QUEUED:
+            job.finish(JobStatus.CANCELLED, self.ttl)
+        return job
+
+    def results(self, job: Job, offset: int, limit: int) -> List[ScoringResult]:
+        return job.results[offset:offset + limit]
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if not job.finished:
+                    await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Scoring job {job.job_id} failed: {str(e)}")
+                job.finish(JobStatus.FAILED, self.ttl, error=str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _start_executor(self) -> None:
+        # Пул поднимается при первом задании в отдельном потоке, не блокируя event loop
+        async with self._executor_lock:
+            await asyncio.to_thread(self.executor.start)
+
+    async def reload_executor(self) -> None:
+        """
+        Пересоздать пул исполнителя после замены скоркарты в отдельном потоке, не блокируя event loop.
+        Под той же блокировкой, что и запуск пула; порции, уже отправленные в старый пул, в нем и досчитываются
+        """
+        if self._executor_lock is None:
+            await asyncio.to_thread(self.executor.reload)
+            return
+        async with self._executor_lock:
+            await asyncio.to_thread(self.executor.reload)
+
+    async def _run(self, job: Job) -> None:
+        await self._start_executor()
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        logger.info(f"Scoring job {job.job_id} started: {job.total} applications")
+
+        requests = job.requests
+        for start in range(0, job.total, self.chunk_size):
+            if job.cancel_requested:
+                break
+            chunk = requests[start:start + self.chunk_size]
+            bureau = await self.bureau.lookup_many(chunk) if self.bureau is not None else None
+            if self.audit is not None and self.audit.enabled:
+                version = self.executor.engine.config_version
+                results, vectors = await self.executor.run("score_many", chunk, job.detail, bureau)
+                await self.audit.submit_many(chunk, vectors, results, version)
+            else:
+                results = await self.executor.run("evaluate_many", chunk, job.detail, bureau)
+            job.results.extend(results)
+
+        status = JobStatus.CANCELLED if job.cancel_requested else JobStatus.COMPLETED
+        job.finish(status, self.ttl)
+        logger.info(f"Scoring job {job.job_id} {status.value}: {job.processed}/{job.total} applications")
+
+    async def _cleanup_loop(self) -> None:
+        interval = min(60.0, max(1.0, self.ttl / 10))
+        while True:
+            await asyncio.sleep(interval)
+            self.cleanup()
+
+    def cleanup(self) -> int:
+        """Удалить задания с истекшим сроком хранения"""
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.expires_monotonic is not None and job.expires_monotonic <= now
+        ]
+        for job_id in expired:
+            self._remove(job_id)
+        return len(expired)
+
+    def _remove(self, job_id: str) -> None:
+        if self._jobs.pop(job_id, None) is not None:
+            self._expired += 1
+
+    def stats(self) -> Dict[str, Any]:
+        by_status: Dict[str, int] = {status.value: 0 for status in JobStatus}
+        for job in self._jobs.values():
+            by_status[job.status.value] += 1
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "chunk_size": self.chunk_size,
+            "ttl": self.ttl,
+            "jobs": by_status,
+            "submitted": self._submitted,
+            "rejected": self._rejected,
+            "expired": self._expired,
+            "executor": self.executor.stats(),
+        }
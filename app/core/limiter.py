@@ -0,0 +1,181 @@
+"""
+Адаптивное ограничение числа одновременно обрабатываемых запросов (AIMD по задержке).
+
+Лимит растет на 1/limit с каждым запросом, завершившимся быстрее порога, пока лимит используется
+хотя бы наполовину (примерно +1 за "оборот" лимита), и умножается на backoff, если задержка превысила
+порог или сервис ответил перегрузкой - не чаще одного раза за порог, чтобы одна волна медленных
+ответов не обрушила лимит. Порог - target_latency или базовая задержка * tolerance; базовая задержка -
+минимум задержки за текущее и предыдущее окно BASELINE_WINDOW: под перегрузкой она не подтягивается
+к задержкам с очередью, а после смены характера нагрузки обновляется за одно-два окна.
+
+Запросы сверх лимита ждут в очереди FIFO ограниченной длины не дольше queue_timeout. Запрос со сроком
+(deadline) ждет, только пока успевает обработаться за оставшееся время: если ожидаемое ожидание
+(очередь впереди проходит по limit запросов за текущую задержку) плюс сама обработка не укладываются
+в срок, отказ дается сразу, без ожидания. Используется из одного event loop, блокировки не нужны.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from app.core.metrics import metrics
+
+# Нижняя граница порога задержки, секунд: доли миллисекунды - это шум, а не перегрузка
+MIN_LATENCY_THRESHOLD = 0.005
+# Длина окна минимума задержки, секунд
+BASELINE_WINDOW = 10.0
+# Вес нового наблюдения в скользящей средней задержки (оценка времени обработки для сроков)
+LATENCY_SMOOTHING = 0.1
+
+admission_total = metrics.counter(
+    'scoring_admission_total', 'Admission decisions of the concurrency limiter', ('outcome',)
+)
+
+
+class AdaptiveLimiter:
+    """Лимит одновременных запросов с очередью ожидания; limit - дробный, сравнивается с in_flight"""
+
+    def __init__(self, initial_limit: int = 32, min_limit: int = 4, max_limit: int = 512,
+                 max_queue: int = 512, queue_timeout: float = 1.0, tolerance: float = 2.0,
+                 backoff: float = 0.9, target_latency: float = 0.0):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.baseline: Optional[float] = None
+        self.latency: Optional[float] = None
+        self._window_started = time.monotonic()
+        self._window_min: Optional[float] = None
+        self._previous_min: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def threshold(self) -> Optional[float]:
+        if self.target_latency > 0:
+            return self.target_latency
+        if self.baseline is None:
+            return None
+        return max(self.baseline * self.tolerance, MIN_LATENCY_THRESHOLD)
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def acquire(self, deadline: Optional[float] = None) -> Optional[str]:
+        """
+        Занять место; deadline - срок клиента по time.monotonic().
+        None - место получено, иначе причина отказа: queue_full, deadline или queue_timeout
+        """
+        if deadline is not None and deadline <= time.monotonic():
+            return 'deadline'
+        if self.in_flight < self.limit:
+            # Ушедшие из очереди не должны задерживать новых
+            while self._waiters and self._waiters[0].done():
+                self._waiters.popleft()
+            if not self._waiters:
+                self.in_flight += 1
+                return None
+        if len(self._waiters) >= self.max_queue:
+            self._prune()
+            if len(self._waiters) >= self.max_queue:
+                return 'queue_full'
+
+        timeout = self.queue_timeout
+        reason = 'queue_timeout'
+        if deadline is not None:
+            service = self.latency or 0.0
+            # Время, после которого обработка уже не успеет к сроку
+            remaining = deadline - time.monotonic() - service
+            if remaining <= len(self._waiters) * service / self.limit:
+                return 'deadline'
+            if remaining < timeout:
+                timeout, reason = remaining, 'deadline'
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            return None
+        except asyncio.TimeoutError:
+            # Место могло освободиться в тот же момент: тогда оно уже наше
+            if waiter.done() and not waiter.cancelled():
+                return None
+            waiter.cancel()
+            return reason
+        except asyncio.CancelledError:
+            # Клиент ушел из очереди; переданное место возвращается
+            if waiter.done() and not waiter.cancelled():
+                self.in_flight -= 1
+                self._wake()
+            waiter.cancel()
+            raise
+
+    def release(self, latency: float, overloaded: bool = False) -> None:
+        """Освободить место и учесть задержку обработки; overloaded - ответ о перегрузке (503)"""
+        utilized = self.in_flight >= self.limit / 2
+        self.in_flight -= 1
+        now = time.monotonic()
+        self._observe(latency, now)
+
+        threshold = self.threshold
+        if overloaded or latency > threshold:
+            if now - self._last_decrease >= threshold:
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._last_decrease = now
+                self.decreases += 1
+        elif utilized and self.limit < self.max_limit:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            self.increases += 1
+        self._wake()
+
+    def _observe(self, latency: float, now: float) -> None:
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += (latency - self.latency) * LATENCY_SMOOTHING
+        if now - self._window_started >= BASELINE_WINDOW:
+            self._previous_min, self._window_min = self._window_min, None
+            self._window_started = now
+        if self._window_min is None or latency < self._window_min:
+            self._window_min = latency
+        if self._previous_min is None:
+            self.baseline = self._window_min
+        else:
+            self.baseline = min(self._window_min, self._previous_min)
+
+    def _wake(self) -> None:
+        """Передать освободившиеся места ожидающим по порядку"""
+        waiters = self._waiters
+        while waiters and self.in_flight < self.limit:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _prune(self) -> None:
+        self._waiters = deque(waiter for waiter in self._waiters if not waiter.done())
+
+    def stats(self) -> Dict[str, Any]:
+        threshold = self.threshold
+        return {
+            "limit": round(self.limit, 2),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "latency_ms": round(self.latency * 1000, 3) if self.latency is not None else None,
+            "baseline_latency_ms": round(self.baseline * 1000, 3) if self.baseline is not None else None,
+            "latency_threshold_ms": round(threshold * 1000, 3) if threshold is not None else None,
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
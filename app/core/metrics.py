@@ -0,0 +1,237 @@
+"""
+Легковесные метрики: гистограммы с фиксированными корзинами и счетчики, вывод в текстовом формате Prometheus.
+
+Наблюдение - это чтение часов, выбор корзины по битовой длине и пара сложений, без блокировок
+и аллокаций. Последовательные этапы меряются отсечками (lap): конец одного этапа - начало
+следующего, поэтому на этап приходится одно чтение часов. При выключенных метриках остается
+проверка флага. Детальные этапы (отдельные факторы, части объяснения) вложены в этапы верхнего
+уровня и меряются у каждого DETAIL_SAMPLE_EVERY-го вызова: их на заявку больше десятка.
+Под GIL редкая потеря инкремента при переключении потоков допустима для мониторинга.
+
+В режиме процессов метрики копятся в каждом процессе-исполнителе отдельно: исполнитель
+возвращает приращения вместе с результатом (drain), родитель добавляет их к своим (merge).
+"""
+import functools
+import itertools
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Границы корзин - степени двойки в наносекундах, от 2^10 (~1 мкс) до 2^30 (~1.07 с):
+# номер корзины берется из int.bit_length() без поиска по границам
+BUCKET_MIN_BITS = 10
+BUCKET_MAX_BITS = 30
+BUCKETS_NS = tuple(1 << bits for bits in range(BUCKET_MIN_BITS, BUCKET_MAX_BITS + 1))
+# Номер корзины по битовой длине длительности; последняя корзина - +Inf
+_BUCKET_INDEX = tuple(
+    min(max(bits - BUCKET_MIN_BITS, 0), len(BUCKETS_NS)) for bits in range(65)
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Гистограмма длительностей с корзинами BUCKETS_NS и корзиной +Inf"""
+
+    __slots__ = ('registry', 'counts', 'sum_ns')
+
+    def __init__(self, registry: 'MetricsRegistry'):
+        self.registry = registry
+        self.counts = [0] * (len(BUCKETS_NS) + 1)
+        self.sum_ns = 0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe_ns(self, value: int) -> None:
+        # Значение из [2^(b-1), 2^b) попадает в корзину с границей 2^b
+        self.counts[_BUCKET_INDEX[value.bit_length()]] += 1
+        self.sum_ns += value
+
+    def lap(self, started: int) -> int:
+        """Закрыть этап, начатый в started, и вернуть отсечку - начало следующего этапа"""
+        now = perf_counter_ns()
+        value = now - started
+        self.counts[_BUCKET_INDEX[value.bit_length()]] += 1
+        self.sum_ns += value
+        return now
+
+    def timed(self, func: Callable) -> Callable:
+        """Декоратор: длительность каждого вызова func попадает в гистограмму"""
+        registry = self.registry
+        counts = self.counts
+        index = _BUCKET_INDEX
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return func(*args, **kwargs)
+            started = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                value = perf_counter_ns() - started
+                counts[index[value.bit_length()]] += 1
+                self.sum_ns += value
+
+        return wrapper
+
+    def reset(self) -> None:
+        # Список обнуляется на месте: на него ссылаются обертки timed
+        self.counts[:] = [0] * len(self.counts)
+        self.sum_ns = 0
+
+
+class Counter:
+    """Семейство счетчиков с фиксированным набором имен меток"""
+
+    __slots__ = ('registry', 'label_names', 'values')
+
+    def __init__(self, registry: 'MetricsRegistry', label_names: Tuple[str, ...]):
+        self.registry = registry
+        self.label_names = label_names
+        self.values: Dict[Tuple[str, ...], int] = {}
+
+    def inc(self, *label_values: str, amount: int = 1) -> None:
+        if self.registry.enabled:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def reset(self) -> None:
+        self.values = {}
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса; enabled переключается на лету"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[str, Counter] = {}
+
+    def histogram(self, name: str, help: str, **labels: str) -> Histogram:
+        self._help.setdefault(name, ('histogram', help))
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(self)
+        return histogram
+
+    def counter(self, name: str, help: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        self._help.setdefault(name, ('counter', help))
+        counter = self._counters.get(name)
+        if counter is None:
+            counter = self._counters[name] = Counter(self, label_names)
+        return counter
+
+    def drain(self) -> Optional[Dict[str, Any]]:
+        """Приращения с прошлого вызова (для передачи из процесса-исполнителя); None, если их нет"""
+        histograms = []
+        for (name, labels), histogram in self._histograms.items():
+            if any(histogram.counts):
+                histograms.append((name, labels, list(histogram.counts), histogram.sum_ns))
+                histogram.reset()
+        counters = []
+        for name, counter in self._counters.items():
+            if counter.values:
+                counters.append((name, counter.values))
+                counter.reset()
+        if not histograms and not counters:
+            return None
+        return {'histograms': histograms, 'counters': counters}
+
+    def merge(self, delta: Optional[Dict[str, Any]]) -> None:
+        if not delta:
+            return
+        for name, labels, counts, sum_ns in delta['histograms']:
+            key = (name, labels)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self)
+            for i, value in enumerate(counts):
+                histogram.counts[i] += value
+            histogram.sum_ns += sum_ns
+        for name, values in delta['counters']:
+            counter = self._counters.get(name)
+            if counter is None:
+                continue
+            for label_values, value in values.items():
+                counter.values[label_values] = counter.values.get(label_values, 0) + value
+
+    def reset(self) -> None:
+        for histogram in self._histograms.values():
+            histogram.reset()
+        for counter in self._counters.values():
+            counter.reset()
+
+    def render(self) -> str:
+        """Текстовый формат Prometheus 0.0.4; длительности - в секундах"""
+        lines: List[str] = []
+        families: Dict[str, List[Tuple[Labels, Histogram]]] = {}
+        for (name, labels), histogram in self._histograms.items():
+            families.setdefault(name, []).append((labels, histogram))
+
+        for name, items in families.items():
+            kind, help = self._help.get(name, ('histogram', ''))
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, histogram in sorted(items, key=lambda item: item[0]):
+                base = [f'{k}="{_escape(v)}"' for k, v in labels]
+                cumulative = 0
+                for bound, value in zip(BUCKETS_NS + (None,), histogram.counts):
+                    cumulative += value
+                    le = '+Inf' if bound is None else _format_float(bound / 1e9)
+                    bucket_labels = ','.join(base + [f'le="{le}"'])
+                    lines.append(f"{name}_bucket{{{bucket_labels}}} {cumulative}")
+                suffix = '{' + ','.join(base) + '}' if base else ''
+                lines.append(f"{name}_sum{suffix} {_format_float(histogram.sum_ns / 1e9)}")
+                lines.append(f"{name}_count{suffix} {histogram.count}")
+
+        for name, counter in self._counters.items():
+            kind, help = self._help[name]
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for label_values, value in sorted(counter.values.items()):
+                labels = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(counter.label_names, label_values))
+                lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+
+        lines.append("# HELP scoring_metrics_enabled Whether instrumentation is currently recording")
+        lines.append("# TYPE scoring_metrics_enabled gauge")
+        lines.append(f"scoring_metrics_enabled {int(self.enabled)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value))
+
+
+metrics = MetricsRegistry()
+
+STAGE_METRIC = 'scoring_stage_duration_seconds'
+STAGE_HELP = 'Duration of scoring pipeline stages'
+DETAIL_SAMPLE_EVERY = 16
+_detail_calls = itertools.count()
+
+
+def stage_clock() -> int:
+    """Отсечка начала этапов; 0, если метрики выключены"""
+    return perf_counter_ns() if metrics.enabled else 0
+
+
+def detail_clock(started: int) -> int:
+    """Отсечка начала детальных этапов: started у каждого DETAIL_SAMPLE_EVERY-го вызова, иначе 0"""
+    return started if started and not next(_detail_calls) % DETAIL_SAMPLE_EVERY else 0
+
+
+def stage(name: str) -> Histogram:
+    """Гистограмма этапа конвейера скоринга"""
+    return metrics.histogram(STAGE_METRIC, STAGE_HELP, stage=name)
+
+
+decisions_total = metrics.counter('scoring_decisions_total', 'Scoring decisions by status', ('status',))
+errors_total = metrics.counter('scoring_errors_total', 'Scoring errors by endpoint and error type',
+                               ('endpoint', 'error'))
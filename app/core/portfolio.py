@@ -0,0 +1,182 @@
+"""
+Аналитика портфеля по оцененным заявкам в постоянной памяти.
+
+PortfolioStats обновляется порциями результатов по мере их получения и хранит только агрегаты
+по сегментам сумма x срок: счетчики статусов, гистограмму баллов, скетчи квантилей ставки и платежа
+и счетчики факторов риска. Результаты не сохраняются; части, посчитанные разными процессами или
+запросами, складываются merge() в любом порядке с тем же итогом.
+
+Скетч квантилей - логарифмические корзины с относительной точностью SKETCH_ACCURACY (как DDSketch):
+корзины фиксированы, поэтому скетчи складываются поэлементно без потери точности.
+"""
+import math
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.factors import FactorVector, RISK_FACTOR_NAMES, SEVERITY_NAMES
+from app.core.segments import (
+    AMOUNT_LABELS, SCORE_BIN, SCORE_BINS, TERM_LABELS, amount_bands, score_bins, score_percentile, term_bands
+)
+from app.schemas.scoring import ScoringRequest, ScoringResult, ScoringStatus
+
+STATUSES = tuple(ScoringStatus)
+_STATUS_INDEX = {status: index for index, status in enumerate(STATUSES)}
+SEGMENTS_SHAPE = (len(AMOUNT_LABELS), len(TERM_LABELS))
+N_SEGMENTS = SEGMENTS_SHAPE[0] * SEGMENTS_SHAPE[1]
+
+SKETCH_ACCURACY = 0.005
+SKETCH_MIN = 0.01
+SKETCH_MAX = 1e9
+_GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+_SKETCH_OFFSET = math.ceil(math.log(SKETCH_MIN) / _LOG_GAMMA)
+SKETCH_BINS = math.ceil(math.log(SKETCH_MAX) / _LOG_GAMMA) - _SKETCH_OFFSET + 1
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def sketch_bins(values: np.ndarray) -> np.ndarray:
+    """Номера корзин скетча; значения вне [SKETCH_MIN, SKETCH_MAX] попадают в крайние корзины"""
+    index = np.ceil(np.log(np.clip(values, SKETCH_MIN, SKETCH_MAX)) / _LOG_GAMMA).astype(np.int64)
+    return np.clip(index - _SKETCH_OFFSET, 0, SKETCH_BINS - 1)
+
+
+def sketch_quantile(counts: np.ndarray, q: float) -> Optional[float]:
+    """Квантиль по скетчу: середина корзины, относительная ошибка не больше SKETCH_ACCURACY"""
+    total = counts.sum()
+    if not total:
+        return None
+    index = int(np.searchsorted(np.cumsum(counts), q * total))
+    return 2 * _GAMMA ** (index + _SKETCH_OFFSET) / (_GAMMA + 1)
+
+
+class PortfolioStats:
+    """Агрегаты портфеля по сегментам сумма x срок; итог по портфелю - сумма сегментов"""
+
+    def __init__(self):
+        self.statuses = np.zeros((N_SEGMENTS, len(STATUSES)), dtype=np.int64)
+        self.score_hist = np.zeros((N_SEGMENTS, SCORE_BINS), dtype=np.int64)
+        self.score_sum = np.zeros(N_SEGMENTS, dtype=np.int64)
+        # Ставка и платеж есть только у одобренных заявок
+        self.priced = np.zeros(N_SEGMENTS, dtype=np.int64)
+        self.rate_sketch = np.zeros((N_SEGMENTS, SKETCH_BINS), dtype=np.int64)
+        self.rate_sum = np.zeros(N_SEGMENTS)
+        self.payment_sketch = np.zeros((N_SEGMENTS, SKETCH_BINS), dtype=np.int64)
+        self.payment_sum = np.zeros(N_SEGMENTS)
+        self.risks = np.zeros((N_SEGMENTS, len(RISK_FACTOR_NAMES), len(SEVERITY_NAMES)), dtype=np.int64)
+
+    @property
+    def count(self) -> int:
+        return int(self.statuses.sum())
+
+    def update(self, requests: Sequence[ScoringRequest], results: Sequence[ScoringResult],
+               vectors: Sequence[FactorVector]) -> None:
+        """Учесть порцию заявок с их результатами и векторами факторов (в одном порядке)"""
+        n = len(results)
+        if n == 0:
+            return
+        amounts = np.fromiter((r.loan_amount for r in requests), dtype=float, count=n)
+        terms = np.fromiter((r.loan_term for r in requests), dtype=np.int64, count=n)
+        segment = np.ravel_multi_index((amount_bands(amounts), term_bands(terms)), SEGMENTS_SHAPE)
+
+        status = np.fromiter((_STATUS_INDEX[r.status] for r in results), dtype=np.int64, count=n)
+        scores = np.fromiter((r.score for r in results), dtype=np.int64, count=n)
+        np.add.at(self.statuses, (segment, status), 1)
+        np.add.at(self.score_hist, (segment, score_bins(scores)), 1)
+        self.score_sum += np.bincount(segment, weights=scores, minlength=N_SEGMENTS).astype(np.int64)
+
+        rates = np.fromiter((np.nan if r.interest_rate is None else r.interest_rate for r in results),
+                            dtype=float, count=n)
+        payments = np.fromiter((np.nan if r.monthly_payment is None else r.monthly_payment for r in results),
+                               dtype=float, count=n)
+        priced = ~np.isnan(rates) & ~np.isnan(payments)
+        if priced.any():
+            priced_segment = segment[priced]
+            rates = rates[priced]
+            payments = payments[priced]
+            self.priced += np.bincount(priced_segment, minlength=N_SEGMENTS)
+            np.add.at(self.rate_sketch, (priced_segment, sketch_bins(rates)), 1)
+            np.add.at(self.payment_sketch, (priced_segment, sketch_bins(payments)), 1)
+            self.rate_sum += np.bincount(priced_segment, weights=rates, minlength=N_SEGMENTS)
+            self.payment_sum += np.bincount(priced_segment, weights=payments, minlength=N_SEGMENTS)
+
+        # Факторы риска - коды (индекс фактора, серьезность) из вектора, без текстов результата
+        flat = []
+        width = self.risks.shape[1] * self.risks.shape[2]
+        severities = self.risks.shape[2]
+        for seg, vector in zip(segment.tolist(), vectors):
+            base = seg * width
+            for index, severity in vector.risks:
+                flat.append(base + index * severities + severity)
+        if flat:
+            self.risks += np.bincount(flat, minlength=self.risks.size).reshape(self.risks.shape)
+
+    def merge(self, other: 'PortfolioStats') -> 'PortfolioStats':
+        for name, value in vars(other).items():
+            setattr(self, name, getattr(self, name) + value)
+        return self
+
+    @staticmethod
+    def _distribution(sketch: np.ndarray, total: float, count: int) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {"count": count, "mean": round(total / count, 2) if count else None}
+        for q in QUANTILES:
+            value = sketch_quantile(sketch, q)
+            summary[f"p{round(q * 100)}"] = round(value, 2) if value is not None else None
+        return summary
+
+    def _summary(self, rows: Any, top_risks: int, histogram: bool = False) -> Dict[str, Any]:
+        statuses = self.statuses[rows].reshape(-1, len(STATUSES)).sum(axis=0).tolist()
+        count = sum(statuses)
+        hist = self.score_hist[rows].reshape(-1, SCORE_BINS).sum(axis=0)
+        priced = int(np.sum(self.priced[rows]))
+        risks = self.risks[rows].reshape(-1, *self.risks.shape[1:]).sum(axis=0)
+        by_factor = risks.sum(axis=1).tolist()
+
+        summary: Dict[str, Any] = {
+            "count": count,
+            "statuses": {status.value: n for status, n in zip(STATUSES, statuses)},
+            "rates": {status.value: round(n / count, 6) if count else 0.0 for status, n in zip(STATUSES, statuses)},
+            "score": {
+                "mean": round(float(np.sum(self.score_sum[rows])) / count, 2) if count else None,
+                "p10": score_percentile(hist, 0.1),
+                "p50": score_percentile(hist, 0.5),
+                "p90": score_percentile(hist, 0.9),
+            },
+            "interest_rate": self._distribution(
+                self.rate_sketch[rows].reshape(-1, SKETCH_BINS).sum(axis=0), float(np.sum(self.rate_sum[rows])), priced
+            ),
+            "monthly_payment": self._distribution(
+                self.payment_sketch[rows].reshape(-1, SKETCH_BINS).sum(axis=0),
+                float(np.sum(self.payment_sum[rows])), priced
+            ),
+            "risk_factors": [
+                {
+                    "factor": RISK_FACTOR_NAMES[index],
+                    "count": by_factor[index],
+                    "share": round(by_factor[index] / count, 6),
+                    **{severity: int(risks[index, level]) for level, severity in enumerate(SEVERITY_NAMES)},
+                }
+                for index in sorted(range(len(by_factor)), key=lambda i: -by_factor[i])[:top_risks] if by_factor[index]
+            ],
+        }
+        if histogram:
+            summary["score"]["histogram"] = {
+                f"{i * SCORE_BIN}-{i * SCORE_BIN + SCORE_BIN - 1}": int(n) for i, n in enumerate(hist.tolist()) if n
+            }
+        return summary
+
+    def report(self, top_risks: int = 5) -> Dict[str, Any]:
+        """Сводка по портфелю и по непустым сегментам сумма x срок"""
+        segments: List[Dict[str, Any]] = []
+        for index in np.flatnonzero(self.statuses.sum(axis=1)).tolist():
+            amount, term = np.unravel_index(index, SEGMENTS_SHAPE)
+            segments.append({
+                "loan_amount": AMOUNT_LABELS[amount],
+                "loan_term": TERM_LABELS[term],
+                **self._summary(index, top_risks),
+            })
+        return {
+            "total": self._summary(slice(None), top_risks, histogram=True),
+            "segments": segments,
+        }
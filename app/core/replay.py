@@ -0,0 +1,171 @@
+"""
+Сравнение двух версий конфигурации или скоркарты на исторических заявках.
+
+ReplayStats копит агрегаты фиксированного размера: матрицу переходов статусов старая -> новая,
+гистограммы баллов, гистограмму изменения балла и счетчики по сегментам (сумма x срок x зарплата).
+Память не зависит от числа заявок, а части, посчитанные разными процессами, складываются merge().
+"""
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from app.core.segments import (
+    AMOUNT_LABELS, SALARY_LABELS, SCORE_BINS, TERM_LABELS, amount_bands, salary_bands, score_bins,
+    score_percentile, term_bands
+)
+from app.schemas.scoring import ScoringRequest, ScoringResult, ScoringStatus
+
+STATUSES = tuple(ScoringStatus)
+_STATUS_INDEX = {status: index for index, status in enumerate(STATUSES)}
+_APPROVED = _STATUS_INDEX[ScoringStatus.APPROVED]
+
+# Границы корзин изменения балла (новый - старый)
+DELTA_EDGES = (-100, -50, -20, -10, -5, -1, 0, 1, 5, 10, 20, 50, 100)
+
+# Сегменты: сумма x срок x зарплата
+SEGMENTS_SHAPE = (len(AMOUNT_LABELS), len(TERM_LABELS), len(SALARY_LABELS))
+
+
+def _delta_labels() -> List[str]:
+    labels = [f"<{DELTA_EDGES[0]}"]
+    labels += [f"[{low},{high})" for low, high in zip(DELTA_EDGES, DELTA_EDGES[1:])]
+    labels.append(f">={DELTA_EDGES[-1]}")
+    return labels
+
+
+class ReplayStats:
+    """Агрегаты повторного прогона заявок через старую и новую версии движка"""
+
+    def __init__(self):
+        self.records = 0
+        self.errors = 0
+        self.transitions = np.zeros((len(STATUSES), len(STATUSES)), dtype=np.int64)
+        self.score_hist_old = np.zeros(SCORE_BINS, dtype=np.int64)
+        self.score_hist_new = np.zeros(SCORE_BINS, dtype=np.int64)
+        self.score_sum_old = 0
+        self.score_sum_new = 0
+        self.delta_hist = np.zeros(len(DELTA_EDGES) + 1, dtype=np.int64)
+        # Ставка по заявкам, одобренным обеими версиями
+        self.both_approved = 0
+        self.rate_sum_old = 0.0
+        self.rate_sum_new = 0.0
+        self.segment_records = np.zeros(SEGMENTS_SHAPE, dtype=np.int64)
+        self.segment_flips = np.zeros(SEGMENTS_SHAPE, dtype=np.int64)
+        self.segment_approved_old = np.zeros(SEGMENTS_SHAPE, dtype=np.int64)
+        self.segment_approved_new = np.zeros(SEGMENTS_SHAPE, dtype=np.int64)
+
+    def update(self, requests: Sequence[ScoringRequest], old: Sequence[ScoringResult],
+               new: Sequence[ScoringResult]) -> None:
+        """Учесть порцию заявок и решения по ним обеих версий (в одном порядке)"""
+        n = len(requests)
+        if n == 0:
+            return
+        self.records += n
+        old_status = np.fromiter((_STATUS_INDEX[r.status] for r in old), dtype=np.int64, count=n)
+        new_status = np.fromiter((_STATUS_INDEX[r.status] for r in new), dtype=np.int64, count=n)
+        old_score = np.fromiter((r.score for r in old), dtype=np.int64, count=n)
+        new_score = np.fromiter((r.score for r in new), dtype=np.int64, count=n)
+
+        np.add.at(self.transitions, (old_status, new_status), 1)
+        self.score_hist_old += np.bincount(score_bins(old_score), minlength=SCORE_BINS)
+        self.score_hist_new += np.bincount(score_bins(new_score), minlength=SCORE_BINS)
+        self.score_sum_old += int(old_score.sum())
+        self.score_sum_new += int(new_score.sum())
+        self.delta_hist += np.bincount(
+            np.searchsorted(DELTA_EDGES, new_score - old_score, side='right'), minlength=len(self.delta_hist)
+        )
+
+        old_approved = old_status == _APPROVED
+        new_approved = new_status == _APPROVED
+        both = np.flatnonzero(old_approved & new_approved).tolist()
+        self.both_approved += len(both)
+        self.rate_sum_old += sum(old[i].interest_rate for i in both)
+        self.rate_sum_new += sum(new[i].interest_rate for i in both)
+
+        amounts = np.fromiter((r.loan_amount for r in requests), dtype=float, count=n)
+        terms = np.fromiter((r.loan_term for r in requests), dtype=np.int64, count=n)
+        salaries = np.fromiter((r.user_salary or 0.0 for r in requests), dtype=float, count=n)
+        segment = np.ravel_multi_index(
+            (amount_bands(amounts), term_bands(terms), salary_bands(salaries)), SEGMENTS_SHAPE
+        )
+        size = self.segment_records.size
+        self.segment_records += np.bincount(segment, minlength=size).reshape(SEGMENTS_SHAPE)
+        self.segment_flips += np.bincount(segment, weights=old_status != new_status,
+                                          minlength=size).astype(np.int64).reshape(SEGMENTS_SHAPE)
+        self.segment_approved_old += np.bincount(segment, weights=old_approved,
+                                                 minlength=size).astype(np.int64).reshape(SEGMENTS_SHAPE)
+        self.segment_approved_new += np.bincount(segment, weights=new_approved,
+                                                 minlength=size).astype(np.int64).reshape(SEGMENTS_SHAPE)
+
+    def merge(self, other: 'ReplayStats') -> 'ReplayStats':
+        for name, value in vars(other).items():
+            setattr(self, name, getattr(self, name) + value)
+        return self
+
+    def _side(self, statuses: np.ndarray, hist: np.ndarray, score_sum: int) -> Dict[str, Any]:
+        n = self.records
+        return {
+            "statuses": {status.value: int(count) for status, count in zip(STATUSES, statuses)},
+            "approval_rate": round(statuses[_APPROVED] / n, 6) if n else 0.0,
+            "mean_score": round(score_sum / n, 3) if n else 0.0,
+            # Верхние границы корзин по 10 баллов
+            "score_p10": score_percentile(hist, 0.1),
+            "score_p50": score_percentile(hist, 0.5),
+            "score_p90": score_percentile(hist, 0.9),
+        }
+
+    def report(self, top: int = 10) -> Dict[str, Any]:
+        """Отчет о различиях: доли одобрений, сдвиг баллов, смены решений и сегменты с наибольшими изменениями"""
+        n = self.records
+        old = self._side(self.transitions.sum(axis=1), self.score_hist_old, self.score_sum_old)
+        new = self._side(self.transitions.sum(axis=0), self.score_hist_new, self.score_sum_new)
+        flips = int(self.transitions.sum() - np.trace(self.transitions))
+        transitions = {
+            f"{STATUSES[i].value}->{STATUSES[j].value}": int(self.transitions[i, j])
+            for i in range(len(STATUSES)) for j in range(len(STATUSES))
+            if i != j and self.transitions[i, j]
+        }
+
+        segments = []
+        flat_flips = self.segment_flips.ravel()
+        for index in np.argsort(-flat_flips, kind='stable')[:top].tolist():
+            if not flat_flips[index]:
+                break
+            a, t, s = np.unravel_index(index, SEGMENTS_SHAPE)
+            records = int(self.segment_records[a, t, s])
+            approval_old = self.segment_approved_old[a, t, s] / records
+            approval_new = self.segment_approved_new[a, t, s] / records
+            segments.append({
+                "loan_amount": AMOUNT_LABELS[a],
+                "loan_term": TERM_LABELS[t],
+                "user_salary": SALARY_LABELS[s],
+                "records": records,
+                "flips": int(flat_flips[index]),
+                "flip_rate": round(flat_flips[index] / records, 6),
+                "approval_rate_old": round(float(approval_old), 6),
+                "approval_rate_new": round(float(approval_new), 6),
+                "approval_rate_change": round(float(approval_new - approval_old), 6),
+            })
+
+        return {
+            "records": n,
+            "errors": self.errors,
+            "old": old,
+            "new": new,
+            "approval_rate_change": round(new["approval_rate"] - old["approval_rate"], 6),
+            "score_shift": {
+                "mean_delta": round((self.score_sum_new - self.score_sum_old) / n, 3) if n else 0.0,
+                "delta_histogram": dict(zip(_delta_labels(), self.delta_hist.tolist())),
+            },
+            "interest_rate_shift": {
+                "both_approved": self.both_approved,
+                "mean_old": round(self.rate_sum_old / self.both_approved, 4) if self.both_approved else None,
+                "mean_new": round(self.rate_sum_new / self.both_approved, 4) if self.both_approved else None,
+            },
+            "flips": {
+                "total": flips,
+                "rate": round(flips / n, 6) if n else 0.0,
+                "transitions": transitions,
+            },
+            "top_segments": segments,
+        }
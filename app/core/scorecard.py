@@ -0,0 +1,246 @@
+import fcntl
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import zlib
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.schemas.scorecard import Scorecard, ScorecardFactor, StatusBand, SCORECARD_FACTORS
+from app.schemas.scoring import ScoringStatus
+
+DEFAULT_SCORECARD_PATH = Path(__file__).resolve().parent.parent / "scorecards" / "default.json"
+
+
+class Ladder:
+    """
+    Отсортированная таблица порогов: значение попадает в первую полосу, граница которой его покрывает.
+    Поштучный поиск идет через bisect, пакетный - через np.searchsorted по тем же границам,
+    поэтому оба пути всегда дают одинаковые полосы. Стоимость поиска - O(log числа полос).
+    """
+
+    def __init__(self, uppers: Sequence[Optional[float]], values: Sequence[Any], inclusive: bool = True):
+        # inclusive=True: value <= upper, иначе value < upper. Последняя полоса - без границы
+        self.bounds = [float(u) for u in uppers[:-1]]
+        self.values = list(values)
+        self.inclusive = inclusive
+        self._bounds_array = np.asarray(self.bounds, dtype=float)
+        self._values_array = np.asarray(self.values)
+        self._side = 'left' if inclusive else 'right'
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def index(self, value: float) -> int:
+        if self.inclusive:
+            return bisect_left(self.bounds, value)
+        return bisect_right(self.bounds, value)
+
+    def index_many(self, values: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self._bounds_array, values, side=self._side)
+
+    def lookup(self, value: float) -> Any:
+        return self.values[self.index(value)]
+
+    def lookup_many(self, values: np.ndarray) -> np.ndarray:
+        return self._values_array[self.index_many(values)]
+
+
+class CompiledFactor:
+    """
+    Скомпилированный фактор скоркарты.
+    Коды полос сквозные: сначала основные полосы, затем полосы для заявок без зарплаты.
+    """
+
+    def __init__(self, definition: ScorecardFactor):
+        self.name = definition.name
+        self.weight = definition.weight
+
+        bands = list(definition.bands)
+        missing_bands = list(definition.missing_bands or [])
+        self.ladder = Ladder([b.upper for b in bands], range(len(bands)), definition.upper_inclusive)
+        self.missing_ladder = (
+            Ladder([b.upper for b in missing_bands], range(len(missing_bands)), definition.upper_inclusive)
+            if missing_bands else None
+        )
+        self.missing_offset = len(bands)
+
+        all_bands = bands + missing_bands
+        self.points = [b.points for b in all_bands]
+        self.descriptions = [b.description for b in all_bands]
+        self._points_array = np.asarray([p if p is not None else 0 for p in self.points], dtype=np.int64)
+        self._use_value = np.asarray([p is None for p in self.points], dtype=bool)
+
+    def code(self, value: float, missing: bool = False) -> int:
+        if missing and self.missing_ladder is not None:
+            return self.missing_offset + self.missing_ladder.index(value)
+        return self.ladder.index(value)
+
+    def points_for(self, code: int, value: float) -> int:
+        points = self.points[code]
+        return points if points is not None else int(value)
+
+    def evaluate(self, value: float, missing: bool = False) -> Tuple[int, str]:
+        code = self.code(value, missing)
+        return self.points_for(code, value), self.descriptions[code]
+
+    def evaluate_many(self, values: np.ndarray, missing: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Коды полос и баллы для массива значений"""
+        codes = self.ladder.index_many(values)
+        if missing is not None and self.missing_ladder is not None:
+            codes = np.where(missing, self.missing_offset + self.missing_ladder.index_many(values), codes)
+        points = np.where(self._use_value[codes], np.trunc(values), self._points_array[codes]).astype(np.int64)
+        return codes, points
+
+
+class CompiledScorecard:
+    """Скоркарта, скомпилированная в таблицы порогов. Объект неизменяем после создания"""
+
+    def __init__(self, definition: Scorecard):
+        self.definition = definition
+        self.version = hashlib.sha256(definition.model_dump_json().encode()).hexdigest()[:16]
+
+        self.base_score = definition.base_score
+        self.min_score = definition.min_score
+        self.max_score = definition.max_score
+        self.random_spread = definition.random_spread
+        self.apply_weights = definition.apply_weights
+        self.assumed_income = definition.assumed_income
+
+        by_name = {f.name: f for f in definition.factors}
+        # Порядок факторов фиксирован, от него зависит порядок детализации в ответе
+        self.factors = tuple(CompiledFactor(by_name[name]) for name in SCORECARD_FACTORS)
+        self._factors_by_name = {f.name: f for f in self.factors}
+
+        self.status_bands: Tuple[StatusBand, ...] = tuple(definition.status_bands)
+        self.status_ladder = Ladder(
+            [b.upper for b in self.status_bands], range(len(self.status_bands)), inclusive=False
+        )
+        self.approved_mask = np.asarray([b.status == ScoringStatus.APPROVED for b in self.status_bands])
+        self.limited_mask = np.asarray([b.limited for b in self.status_bands])
+        self.status_values = tuple(b.status for b in self.status_bands)
+
+        self.risk_level_ladder = Ladder(
+            [b.upper for b in definition.risk_level_bands], [b.level for b in definition.risk_level_bands],
+            inclusive=False
+        )
+        self.score_rate_ladder = Ladder(
+            [b.upper for b in definition.score_rate_bands], [b.adjustment for b in definition.score_rate_bands],
+            inclusive=False
+        )
+        self.term_rate_ladder = Ladder(
+            [b.upper for b in definition.term_rate_bands], [b.adjustment for b in definition.term_rate_bands],
+            inclusive=True
+        )
+
+        self.limited_max_amount = definition.limited_max_amount
+        self.limited_max_term = definition.limited_max_term
+        self.min_interest_rate = definition.min_interest_rate
+        self.insurance_amount_over = definition.insurance_amount_over
+        self.insurance_score_below = definition.insurance_score_below
+        self.insurance_salary_below = definition.insurance_salary_below
+
+    def factor(self, name: str) -> CompiledFactor:
+        return self._factors_by_name[name]
+
+    def status_band(self, score: int) -> StatusBand:
+        return self.status_bands[self.status_ladder.index(score)]
+
+
+def compile_scorecard(definition: Scorecard) -> CompiledScorecard:
+    return CompiledScorecard(definition)
+
+
+def load_scorecard(path: Union[str, Path]) -> CompiledScorecard:
+    with open(path, encoding='utf-8') as f:
+        return compile_scorecard(Scorecard(**json.load(f)))
+
+
+@lru_cache(maxsize=1)
+def default_scorecard() -> CompiledScorecard:
+    return load_scorecard(DEFAULT_SCORECARD_PATH)
+
+
+# Заголовок общей скоркарты: счетчик записи (нечетный - идет запись), поколение, длина и CRC32 определения
+_SHARED_HEADER = struct.Struct('<QQII')
+_SHARED_SEQ = struct.Struct('<Q')
+_SHARED_FIELDS = struct.Struct('<QII')
+SHARED_SCORECARD_BYTES = 1 << 20
+
+
+class SharedScorecard:
+    """
+    Скоркарта, общая для процессов app.serve: определение в JSON и номер поколения в сегменте
+    multiprocessing.shared_memory. Воркер, принявший горячую замену, публикует новое определение
+    (publish); остальные сверяют поколение перед обработкой запроса (changed) и загружают его (read).
+    Поколение 0 - публикаций не было, действует скоркарта из настроек. Процесс отмечает поколение
+    примененным (generation) сам, когда замена закончена во всех его исполнителях.
+
+    Запись идет под файловой блокировкой, поэтому одновременные замены в разных воркерах выполняются
+    по очереди, и побеждает последняя. Как в SharedResultCache, на время записи счетчик нечетный,
+    а чтение проверяет счетчик и CRC; прочитанное во время записи определение не используется.
+    """
+
+    def __init__(self, name: str, size: int = SHARED_SCORECARD_BYTES, create: bool = False):
+        if create:
+            self._shm = SharedMemory(name=name, create=True, size=size)
+        else:
+            self._shm = SharedMemory(name=name)
+        self.name = name
+        # Поколение, примененное в этом процессе
+        self.generation = 0
+        self._buf = self._shm.buf
+        self._lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+
+    def changed(self) -> bool:
+        """Опубликовано поколение, которое этот процесс еще не применил"""
+        return _SHARED_SEQ.unpack_from(self._buf, _SHARED_SEQ.size)[0] != self.generation
+
+    def read(self) -> Optional[Tuple[int, Scorecard]]:
+        """Поколение и опубликованное определение; None, если публикаций нет или запись еще идет"""
+        buf = self._buf
+        seq, generation, length, crc = _SHARED_HEADER.unpack_from(buf, 0)
+        if seq & 1 or generation == 0:
+            return None
+        data = bytes(buf[_SHARED_HEADER.size:_SHARED_HEADER.size + length])
+        if _SHARED_SEQ.unpack_from(buf, 0)[0] != seq or zlib.crc32(data) != crc:
+            return None
+        return generation, Scorecard.model_validate_json(data)
+
+    def publish(self, definition: Scorecard) -> int:
+        """
+        Опубликовать определение для всех процессов; возвращает новое поколение. Примененным в этом процессе
+        оно становится, когда вызывающий код присвоит generation - после замены скоркарты в пулах исполнителей
+        """
+        data = definition.model_dump_json().encode()
+        if len(data) > self._shm.size - _SHARED_HEADER.size:
+            raise ValueError(f"scorecard definition exceeds {self._shm.size - _SHARED_HEADER.size} bytes")
+        buf = self._buf
+        with open(self._lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            seq, generation = _SHARED_HEADER.unpack_from(buf, 0)[:2]
+            generation += 1
+            _SHARED_SEQ.pack_into(buf, 0, seq + 1)
+            buf[_SHARED_HEADER.size:_SHARED_HEADER.size + len(data)] = data
+            _SHARED_FIELDS.pack_into(buf, _SHARED_SEQ.size, generation, len(data), zlib.crc32(data))
+            # Четный счетчик - последним, после всех полей заголовка
+            _SHARED_SEQ.pack_into(buf, 0, seq + 2)
+        return generation
+
+    def close(self) -> None:
+        self._buf = None
+        self._shm.close()
+
+    def unlink(self) -> None:
+        self._shm.unlink()
+        try:
+            os.unlink(self._lock_path)
+        except FileNotFoundError:
+            pass
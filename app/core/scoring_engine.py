@@ -1,403 +1,807 @@
 import random
 import hashlib
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime
 
-from app.schemas.scoring import ScoringRequest, ScoringResult, ScoringStatus, ScoringConfig
+import numpy as np
+
+from app.schemas.scoring import (
+    ScoringRequest, ScoringResult, ScoringStatus, ScoringConfig, ScoringDetail, ScoringFactorVector,
+    OfferGridRequest, AmortizationSchedule, ScheduleRow
+)
+from app.core.scorecard import CompiledScorecard, default_scorecard
+from app.core.bureau import BureauScores, passport_hash_score, inn_hash_score
+from app.core.factors import (
+    FactorVector, Decision, declined, FACTORS_BY_FIELD, RISK_FACTOR_NAMES, EXTRA_RISKS, SEVERITY_NAMES,
+    RANDOM_FACTOR_DESCRIPTION, REJECTION_REASONS, RECOMMENDATIONS,
+    LOAN_AMOUNT_RATIO, LOAN_TERM_RATIO, PASSPORT_RISK, INN_RISK, APPLICATION_RISK, INCOME_SUFFICIENCY
+)
+from app.core.metrics import detail_clock, stage, stage_clock, decisions_total
+from app.core.amortization import annuity_terms, monthly_payment, warm_annuity_cache, amortization_schedule
+
+
+class StaleFactorVector(ValueError):
+    """Вектор факторов построен другой версией скоркарты"""
+
+
+def _passport_input(request: ScoringRequest, bureau: Optional[BureauScores]) -> int:
+    return bureau.passport if bureau is not None else passport_hash_score(request.passport_number)
+
+
+def _inn_input(request: ScoringRequest, bureau: Optional[BureauScores]) -> int:
+    return bureau.inn if bureau is not None else inn_hash_score(request.inn)
+
+
+def _salary_missing(salary: Optional[float]) -> bool:
+    return not salary or salary <= 0
+
+
+# Гистограммы этапов конвейера; последовательные этапы закрываются отсечками (Histogram.lap),
+# factor.* и explain.* вложены в calculate_score и build_result и меряются выборочно (detail_clock)
+_STAGE_EVALUATE = stage('evaluate_application')
+_STAGE_CALCULATE_SCORE = stage('calculate_score')
+_STAGE_AMOUNT_RATIO = stage('factor.loan_amount_ratio')
+_STAGE_TERM_RATIO = stage('factor.loan_term_ratio')
+_STAGE_PASSPORT_RISK = stage('factor.passport_risk')
+_STAGE_INN_RISK = stage('factor.inn_risk')
+_STAGE_APPLICATION_RISK = stage('factor.application_risk')
+_STAGE_INCOME_SUFFICIENCY = stage('factor.income_sufficiency')
+_STAGE_SALARY_STABILITY = stage('factor.salary_stability')
+# Этапы факторов в порядке скоркарты
+_FACTOR_STAGES = (
+    _STAGE_AMOUNT_RATIO, _STAGE_TERM_RATIO, _STAGE_PASSPORT_RISK, _STAGE_INN_RISK,
+    _STAGE_APPLICATION_RISK, _STAGE_INCOME_SUFFICIENCY, _STAGE_SALARY_STABILITY
+)
+_STAGE_FACTOR_VECTOR = stage('factor_vector')
+_STAGE_RESCORE = stage('rescore')
+_STAGE_DECISION = stage('decision')
+_STAGE_SCORE_DETAILS = stage('explain.score_details')
+_STAGE_RISK_FACTORS = stage('explain.risk_factors')
+_STAGE_REJECTION_REASONS = stage('explain.rejection_reasons')
+_STAGE_RECOMMENDATIONS = stage('explain.recommendations')
+_STAGE_BUILD_RESULT = stage('build_result')
+
 
 class ScoringEngine:
-    def __init__(self, config: ScoringConfig = None):
+    def __init__(self, config: ScoringConfig = None, scorecard: CompiledScorecard = None):
+        self._scorecard = scorecard or default_scorecard()
+        # Основа детерминированной корректировки вместо версии конфигурации: при сравнении версий
+        # обе получают одну и ту же, чтобы различия в решениях не зависели от случайной составляющей
+        self.random_seed: Optional[str] = None
         self.config = config or ScoringConfig()
     
-    def calculate_score(self, request: ScoringRequest) -> Dict[str, Any]:
+    @property
+    def config(self) -> ScoringConfig:
+        return self._config
+    
+    @config.setter
+    def config(self, config: ScoringConfig) -> None:
+        self._config = config
+        self._update_version()
+    
+    @property
+    def scorecard(self) -> CompiledScorecard:
+        return self._scorecard
+    
+    def load_scorecard(self, scorecard: CompiledScorecard) -> None:
+        """
+        Атомарная замена скоркарты. Каждая оценка берет ссылку на скоркарту один раз в начале,
+        поэтому заявки в обработке дорабатывают по старой версии, а новые - по новой.
+        """
+        self._scorecard = scorecard
+        self._update_version()
+    
+    def _update_version(self) -> None:
+        raw = f"{self._config.model_dump_json()}|{self._scorecard.version}"
+        self.config_version = hashlib.sha256(raw.encode()).hexdigest()[:16]
+        warm_annuity_cache(self.possible_interest_rates(), self._config.max_loan_term)
+    
+    def possible_interest_rates(self) -> List[float]:
+        """Все ставки, которые может выдать _calculate_interest_rate при текущих конфигурации и скоркарте"""
+        sc = self._scorecard
+        return sorted({
+            max(sc.min_interest_rate, self._config.base_interest_rate + rate_adjustment + term_adjustment)
+            for rate_adjustment in sc.score_rate_ladder.values
+            for term_adjustment in sc.term_rate_ladder.values
+        })
+    
+    def fingerprint(self, request: ScoringRequest, version: Optional[str] = None) -> str:
+        """Отпечаток заявки: хэш всех полей запроса и версии конфигурации"""
+        return self._fingerprint(
+            request.application_id, request.user_id, request.inn, request.passport_number,
+            request.loan_amount, request.loan_term, request.user_salary, version
+        )
+    
+    def _fingerprint(self, application_id: int, user_id: int, inn: str, passport_number: str,
+                     loan_amount: float, loan_term: int, user_salary: Optional[float],
+                     version: Optional[str] = None) -> str:
+        raw = (
+            f"{version or self.config_version}|{application_id}|{user_id}|{inn}|"
+            f"{passport_number}|{loan_amount!r}|{loan_term}|{user_salary!r}"
+        )
+        return hashlib.sha256(raw.encode()).hexdigest()
+    
+    @staticmethod
+    def _adjustment_from_fingerprint(fingerprint: str, spread: int) -> int:
+        return int(fingerprint[:16], 16) % (2 * spread + 1) - spread
+    
+    def _random_adjustment(self, request: ScoringRequest, scorecard: Optional[CompiledScorecard] = None) -> int:
+        """Случайная корректировка балла; в детерминированном режиме выводится из отпечатка заявки"""
+        spread = (scorecard or self.scorecard).random_spread
+        if self.config.deterministic_scoring:
+            return self._adjustment_from_fingerprint(self.fingerprint(request, self.random_seed), spread)
+        return random.randint(-spread, spread)
+    
+    def calculate_score(self, request: ScoringRequest, scorecard: Optional[CompiledScorecard] = None) -> Dict[str, Any]:
         """Расчет скорингового балла с учетом зарплаты"""
-        base_score = 500
-        
-        factors = {
-            'loan_amount_ratio': self._calculate_amount_ratio(request.loan_amount),
-            'loan_term_ratio': self._calculate_term_ratio(request.loan_term),
-            'passport_risk': self._calculate_passport_risk(request.passport_number),
-            'inn_risk': self._calculate_inn_risk(request.inn),
-            'application_risk': self._calculate_application_risk(request.application_id),
-            'income_sufficiency': self._calculate_income_sufficiency(
-                request.loan_amount, 
-                request.loan_term, 
-                request.user_salary
-            ),
-            'salary_stability': self._calculate_salary_stability(request.user_salary)
-        }
-        
-        # Применяем веса
-        score = base_score
-        score_details = {}
-        
-        for factor_name, (factor_score, factor_description) in factors.items():
-            score += factor_score
-            score_details[factor_name] = {
-                'score': factor_score,
-                'description': factor_description,
-                'weight': self._get_factor_weight(factor_name)
-            }
+        sc = scorecard or self.scorecard
+        return self._describe_score(self._score_vector(request, sc), sc)
+    
+    def _score_vector(self, request: ScoringRequest, scorecard: CompiledScorecard,
+                      bureau: Optional[BureauScores] = None) -> FactorVector:
+        """Вектор факторов заявки с замером каждого фактора (выборочно, см. detail_clock)"""
+        sc = scorecard
+        started = stage_clock()
+        now = detail_clock(started)
+        
+        codes = []
+        points = []
+        # Входы факторов вычисляются по мере обхода, поэтому отсечка фактора включает и расчет входа
+        inputs = zip(sc.factors, self._factor_inputs(request, sc, bureau), _FACTOR_STAGES)
+        for factor, (value, missing), factor_stage in inputs:
+            code = factor.code(value, missing)
+            codes.append(code)
+            points.append(factor.points_for(code, value))
+            if now: now = factor_stage.lap(now)
         
         # Добавляем небольшой случайный элемент
-        random_factor = random.randint(-15, 15)
+        random_factor = self._random_adjustment(request, sc)
+        vector = FactorVector(codes, points, random_factor, self._total_score(points, random_factor, sc),
+                              _salary_missing(request.user_salary))
+        if started:
+            _STAGE_CALCULATE_SCORE.lap(started)
+        return vector
+    
+    def _total_score(self, points: Sequence[int], random_factor: int, scorecard: CompiledScorecard) -> int:
+        """Итоговый балл по баллам факторов (в порядке скоркарты) и случайной корректировке"""
+        sc = scorecard
+        if sc.apply_weights:
+            score = sc.base_score + sum(p * factor.weight for p, factor in zip(points, sc.factors))
+        else:
+            score = sc.base_score + sum(points)
         score += random_factor
+        return max(sc.min_score, min(sc.max_score, int(score)))
+    
+    def _factor_inputs(self, request: ScoringRequest, scorecard: CompiledScorecard,
+                       bureau: Optional[BureauScores] = None) -> Iterator[Tuple[float, bool]]:
+        """
+        Входные значения факторов в порядке скоркарты: (значение, зарплата не указана).
+        Риски паспорта и ИНН берутся из данных бюро, без них - из хэшей номеров документов
+        """
+        salary = request.user_salary
+        missing = _salary_missing(salary)
+        yield request.loan_amount, False
+        yield request.loan_term, False
+        yield _passport_input(request, bureau), False
+        yield _inn_input(request, bureau), False
+        yield (request.application_id % 21) - 10, False
+        yield self._income_ratio(request.loan_amount, request.loan_term, salary, scorecard), missing
+        yield salary or 0.0, missing
+    
+    def _factor_input(self, index: int, request: ScoringRequest, scorecard: CompiledScorecard,
+                      bureau: Optional[BureauScores] = None) -> Tuple[float, bool]:
+        """Входное значение одного фактора (то же, что дает _factor_inputs)"""
+        salary = request.user_salary
+        if index == LOAN_AMOUNT_RATIO:
+            return request.loan_amount, False
+        if index == LOAN_TERM_RATIO:
+            return request.loan_term, False
+        if index == PASSPORT_RISK:
+            return _passport_input(request, bureau), False
+        if index == INN_RISK:
+            return _inn_input(request, bureau), False
+        if index == APPLICATION_RISK:
+            return (request.application_id % 21) - 10, False
+        if index == INCOME_SUFFICIENCY:
+            return (self._income_ratio(request.loan_amount, request.loan_term, salary, scorecard),
+                    _salary_missing(salary))
+        return salary or 0.0, _salary_missing(salary)
+    
+    def _factor_vector(self, request: ScoringRequest, scorecard: CompiledScorecard,
+                       bureau: Optional[BureauScores] = None) -> Tuple[List[int], List[int]]:
+        """Коды полос и баллы факторов без построения описаний"""
+        codes = []
+        points = []
+        for factor, (value, missing) in zip(scorecard.factors, self._factor_inputs(request, scorecard, bureau)):
+            code = factor.code(value, missing)
+            codes.append(code)
+            points.append(factor.points_for(code, value))
+        return codes, points
+    
+    def _describe_score(self, vector: FactorVector, scorecard: CompiledScorecard) -> Dict[str, Any]:
+        """Детализация балла по факторам"""
+        return {
+            'score': vector.score,
+            'risk_level': scorecard.risk_level_ladder.lookup(vector.score),
+            'details': self._score_details(vector, scorecard),
+            'risk_factors': self._risk_factor_details(vector, scorecard)
+        }
+    
+    @staticmethod
+    def _score_details(vector: FactorVector, scorecard: CompiledScorecard) -> Dict[str, Dict[str, Any]]:
+        score_details = {
+            factor.name: {
+                'score': points,
+                'description': factor.descriptions[code],
+                'weight': factor.weight
+            }
+            for factor, code, points in zip(scorecard.factors, vector.codes, vector.points)
+        }
         score_details['random_factor'] = {
-            'score': random_factor,
-            'description': 'Случайная корректировка',
+            'score': vector.random_factor,
+            'description': RANDOM_FACTOR_DESCRIPTION,
             'weight': 1.0
         }
-        
-        final_score = max(300, min(850, int(score)))
-        
-        return {
-            'score': final_score,
-            'details': score_details,
-            'risk_factors': self._identify_risk_factors(factors, final_score, request.user_salary)
-        }
+        return score_details
+    
+    @staticmethod
+    def _risk_factor_details(vector: FactorVector, scorecard: CompiledScorecard) -> List[Dict[str, Any]]:
+        """Ключевые факторы риска в виде ответа API"""
+        risk_factors = []
+        factors = scorecard.factors
+        for index, severity in vector.risks:
+            if index < len(factors):
+                description = factors[index].descriptions[vector.codes[index]]
+                impact = vector.points[index]
+            else:
+                description, impact = EXTRA_RISKS[index]
+            risk_factors.append({
+                'factor': RISK_FACTOR_NAMES[index],
+                'severity': SEVERITY_NAMES[severity],
+                'description': description,
+                'impact': impact
+            })
+        return risk_factors
     
-    def _calculate_amount_ratio(self, amount: float) -> tuple:
+    def _calculate_amount_ratio(self, amount: float, scorecard: Optional[CompiledScorecard] = None) -> tuple:
         """Коэффициент на основе суммы кредита"""
-        if amount <= 100000:
-            return 50, "Низкая сумма кредита - минимальный риск"
-        elif amount <= 500000:
-            return 30, "Средняя сумма кредита - умеренный риск"
-        elif amount <= 1000000:
-            return 10, "Высокая сумма кредита - повышенный риск"
-        else:
-            return -20, "Очень высокая сумма кредита - высокий риск"
+        return (scorecard or self.scorecard).factor('loan_amount_ratio').evaluate(amount)
     
-    def _calculate_term_ratio(self, term: int) -> tuple:
+    def _calculate_term_ratio(self, term: int, scorecard: Optional[CompiledScorecard] = None) -> tuple:
         """Коэффициент на основе срока кредита"""
-        if term <= 12:
-            return 40, "Короткий срок - низкий риск"
-        elif term <= 36:
-            return 20, "Средний срок - умеренный риск"
-        else:
-            return -10, "Длительный срок - повышенный риск"
+        return (scorecard or self.scorecard).factor('loan_term_ratio').evaluate(term)
     
-    def _calculate_passport_risk(self, passport: str) -> tuple:
+    def _calculate_passport_risk(self, passport: str, scorecard: Optional[CompiledScorecard] = None) -> tuple:
         """Оценка риска на основе паспортных данных"""
-        hash_val = int(hashlib.md5(passport.encode()).hexdigest(), 16)
-        risk_score = (hash_val % 41) - 20
-        
-        if risk_score > 10:
-            return risk_score, "Паспортные данные: низкий риск"
-        elif risk_score > 0:
-            return risk_score, "Паспортные данные: умеренный риск"
-        else:
-            return risk_score, "Паспортные данные: требуется дополнительная проверка"
+        return (scorecard or self.scorecard).factor('passport_risk').evaluate(passport_hash_score(passport))
     
-    def _calculate_inn_risk(self, inn: str) -> tuple:
+    def _calculate_inn_risk(self, inn: str, scorecard: Optional[CompiledScorecard] = None) -> tuple:
         """Оценка риска на основе ИНН"""
-        hash_val = int(hashlib.sha256(inn.encode()).hexdigest(), 16)
-        risk_score = (hash_val % 31) - 15
-        
-        if risk_score > 5:
-            return risk_score, "ИНН: низкий риск"
-        elif risk_score > -5:
-            return risk_score, "ИНН: стандартный риск"
-        else:
-            return risk_score, "ИНН: повышенный риск"
+        return (scorecard or self.scorecard).factor('inn_risk').evaluate(inn_hash_score(inn))
     
-    def _calculate_application_risk(self, app_id: int) -> tuple:
+    def _calculate_application_risk(self, app_id: int, scorecard: Optional[CompiledScorecard] = None) -> tuple:
         """Фактор на основе ID заявки"""
-        risk_score = (app_id % 21) - 10
-        
-        if risk_score > 0:
-            return risk_score, "Заявка: низкий риск"
-        else:
-            return risk_score, "Заявка: стандартный риск"
+        return (scorecard or self.scorecard).factor('application_risk').evaluate((app_id % 21) - 10)
     
-    def _calculate_income_sufficiency(self, amount: float, term: int, salary: Optional[float]) -> tuple:
+    def _calculate_income_sufficiency(self, amount: float, term: int, salary: Optional[float],
+                                      scorecard: Optional[CompiledScorecard] = None) -> tuple:
         """Оценка достаточности дохода с учетом реальной зарплаты"""
-        if not salary or salary <= 0:
-            # Если зарплата не указана, используем консервативную оценку
-            monthly_payment = amount / term if term > 0 else 0
-            income_sufficiency_ratio = monthly_payment / 50000  # Предполагаемый средний доход
-            
-            if income_sufficiency_ratio < 0.3:
-                return 20, "Низкая доля платежа в доходе (зарплата не указана)"
-            elif income_sufficiency_ratio < 0.5:
-                return 5, "Умеренная доля платежа в доходе (зарплата не указана)"
-            elif income_sufficiency_ratio < 0.7:
-                return -15, "Высокая доля платежа в доходе (зарплата не указана)"
-            else:
-                return -35, "Очень высокая доля платежа в доходе (зарплата не указана)"
+        sc = scorecard or self.scorecard
+        missing = _salary_missing(salary)
+        return sc.factor('income_sufficiency').evaluate(self._income_ratio(amount, term, salary, sc), missing)
+    
+    @staticmethod
+    def _income_ratio(amount: float, term: int, salary: Optional[float], scorecard: CompiledScorecard) -> float:
+        """Доля платежа в доходе"""
+        monthly_payment = amount / term if term > 0 else 0
+        # Если зарплата не указана, используем консервативную оценку по предполагаемому доходу
+        income = scorecard.assumed_income if not salary or salary <= 0 else float(salary)
+        return monthly_payment / income
+    
+    def _calculate_salary_stability(self, salary: Optional[float],
+                                    scorecard: Optional[CompiledScorecard] = None) -> tuple:
+        """Оценка стабильности дохода"""
+        missing = _salary_missing(salary)
+        return (scorecard or self.scorecard).factor('salary_stability').evaluate(salary or 0.0, missing)
+    
+    def evaluate_application(self, request: ScoringRequest, detail: ScoringDetail = ScoringDetail.FULL,
+                             bureau: Optional[BureauScores] = None) -> ScoringResult:
+        """Полная оценка кредитной заявки с детальными причинами; bureau - данные кредитного бюро"""
+        sc = self.scorecard
+        started = stage_clock()
+        if detail == ScoringDetail.SUMMARY:
+            result = self._evaluate_summary(request, sc, bureau)
         else:
-            # Расчет на основе реальной зарплаты
-            monthly_payment = amount / term if term > 0 else 0
-            income_sufficiency_ratio = monthly_payment / float(salary)
+            vector = self._score_vector(request, sc, bureau)
             
-            if income_sufficiency_ratio < 0.2:
-                return 40, "Отличное соотношение платежа к доходу"
-            elif income_sufficiency_ratio < 0.35:
-                return 25, "Хорошее соотношение платежа к доходу"
-            elif income_sufficiency_ratio < 0.5:
-                return 10, "Удовлетворительное соотношение платежа к доходу"
-            elif income_sufficiency_ratio < 0.65:
-                return -10, "Повышенная доля платежа в доходе"
-            else:
-                return -30, "Критическая доля платежа в доходе"
+            # Определяем статус по таблице решений скоркарты
+            now = stage_clock()
+            decision = self._decide(request, vector.score, sc)
+            if now: _STAGE_DECISION.lap(now)
+            
+            result = self._build_result(request, vector, decision, sc)
+        
+        decisions_total.inc(result.status.value)
+        if started:
+            _STAGE_EVALUATE.lap(started)
+        return result
     
-    def _calculate_salary_stability(self, salary: Optional[float]) -> tuple:
-        """Оценка стабильности дохода"""
-        if not salary or salary <= 0:
-            return -20, "Зарплата не указана - повышенный риск"
-        elif salary < 30000:
-            return -10, "Низкий уровень дохода"
-        elif salary < 70000:
-            return 10, "Средний уровень дохода"
-        elif salary < 150000:
-            return 25, "Высокий уровень дохода"
+    def score_application(self, request: ScoringRequest, detail: ScoringDetail = ScoringDetail.FULL,
+                          bureau: Optional[BureauScores] = None) -> Tuple[ScoringResult, FactorVector]:
+        """Оценка заявки вместе с вектором факторов - для последующей повторной оценки (rescore)"""
+        sc = self.scorecard
+        started = stage_clock()
+        vector = self._score_vector(request, sc, bureau)
+        result = self._finish(request, vector, detail, sc)
+        if started:
+            _STAGE_EVALUATE.lap(started)
+        return result, vector
+    
+    def rescore(self, request: ScoringRequest, vector: FactorVector, changed: Iterable[str],
+                detail: ScoringDetail = ScoringDetail.FULL) -> Tuple[ScoringResult, FactorVector]:
+        """
+        Повторная оценка измененной заявки по вектору факторов ее прошлой оценки.
+        changed - имена полей заявки, измененных с прошлой оценки. Пересчитываются только факторы,
+        зависящие от этих полей (хэши паспорта и ИНН при правке суммы, срока или зарплаты
+        не считаются заново), затем балл и решение. Вектор должен быть построен текущей скоркартой.
+        Случайная корректировка в детерминированном режиме выводится из отпечатка новой заявки,
+        как в /evaluate, иначе сохраняется прошлая.
+        """
+        sc = self.scorecard
+        started = stage_clock()
+        stale = set()
+        for field in changed:
+            stale.update(FACTORS_BY_FIELD.get(field, ()))
+        
+        codes = list(vector.codes)
+        points = list(vector.points)
+        for index in stale:
+            factor = sc.factors[index]
+            value, missing = self._factor_input(index, request, sc)
+            codes[index] = factor.code(value, missing)
+            points[index] = factor.points_for(codes[index], value)
+        
+        if self.config.deterministic_scoring:
+            random_factor = self._random_adjustment(request, sc)
         else:
-            return 35, "Очень высокий уровень дохода"
-    
-    def _get_factor_weight(self, factor_name: str) -> float:
-        """Веса факторов"""
-        weights = {
-            'loan_amount_ratio': 2.0,
-            'loan_term_ratio': 1.5,
-            'income_sufficiency': 2.5,  # ✅ Повышенный вес для дохода
-            'salary_stability': 1.8,    # ✅ Новый вес для стабильности зарплаты
-            'passport_risk': 1.2,
-            'inn_risk': 1.0,
-            'application_risk': 0.8
-        }
-        return weights.get(factor_name, 1.0)
+            random_factor = vector.random_factor
+        rescored = FactorVector(codes, points, random_factor, self._total_score(points, random_factor, sc),
+                                _salary_missing(request.user_salary))
+        result = self._finish(request, rescored, detail, sc)
+        if started:
+            _STAGE_RESCORE.lap(started)
+        return result, rescored
     
-    def _identify_risk_factors(self, factors: Dict[str, tuple], score: int, salary: Optional[float]) -> List[Dict[str, Any]]:
-        """Идентификация ключевых факторов риска"""
-        risk_factors = []
+    def _finish(self, request: ScoringRequest, vector: FactorVector, detail: ScoringDetail,
+                scorecard: CompiledScorecard) -> ScoringResult:
+        """Решение и результат по готовому вектору факторов"""
+        decision = self._decide(request, vector.score, scorecard)
+        if detail == ScoringDetail.SUMMARY:
+            result = self._build_summary_result(request, vector, decision, scorecard)
+        else:
+            result = self._build_result(request, vector, decision, scorecard)
+        decisions_total.inc(result.status.value)
+        return result
+    
+    def _evaluate_summary(self, request: ScoringRequest, scorecard: CompiledScorecard,
+                          bureau: Optional[BureauScores] = None) -> ScoringResult:
+        """
+        Краткая оценка: только решение и компактный вектор факторов.
+        Описания, факторы риска, причины и рекомендации не строятся.
+        """
+        sc = scorecard
+        now = stage_clock()
+        codes, points = self._factor_vector(request, sc, bureau)
+        random_factor = self._random_adjustment(request, sc)
+        vector = FactorVector(codes, points, random_factor, self._total_score(points, random_factor, sc),
+                              _salary_missing(request.user_salary))
+        if now: now = _STAGE_FACTOR_VECTOR.lap(now)
+        
+        decision = self._decide(request, vector.score, sc)
+        if now: now = _STAGE_DECISION.lap(now)
+        
+        result = self._build_summary_result(request, vector, decision, sc)
+        if now: _STAGE_BUILD_RESULT.lap(now)
+        return result
+    
+    def _build_summary_result(self, request: ScoringRequest, vector: FactorVector, decision: Decision,
+                              scorecard: CompiledScorecard) -> ScoringResult:
+        # Результат собран движком из проверенных значений, повторная валидация не нужна
+        return ScoringResult.model_construct(
+            application_id=request.application_id,
+            user_id=request.user_id,
+            status=decision.status,
+            score=vector.score,
+            approved_amount=decision.approved_amount,
+            approved_term=decision.approved_term,
+            interest_rate=decision.interest_rate,
+            monthly_payment=decision.monthly_payment,
+            # Все поля передаются явно: model_construct ставит поля по умолчанию в конец, а порядок полей - часть API
+            rejection_reason=None,
+            insurance_required=decision.insurance_required,
+            details={
+                "factor_vector": {
+                    "scorecard_version": scorecard.version,
+                    "codes": vector.codes,
+                    "points": vector.points,
+                    "random_factor": vector.random_factor
+                }
+            }
+        )
+    
+    def explain(self, request: ScoringRequest, vector: ScoringFactorVector) -> ScoringResult:
+        """
+        Полный результат с пояснениями по сохраненному вектору факторов.
+        Хэши документов не пересчитываются, случайная корректировка берется из вектора.
+        """
+        sc = self.scorecard
+        if vector.scorecard_version != sc.version:
+            raise StaleFactorVector(
+                f"Factor vector was built with scorecard {vector.scorecard_version}, current is {sc.version}"
+            )
+        if len(vector.codes) != len(sc.factors) or len(vector.points) != len(sc.factors):
+            raise ValueError(f"Factor vector must contain {len(sc.factors)} codes and points")
+        
+        for factor, code in zip(sc.factors, vector.codes):
+            if not 0 <= code < len(factor.descriptions):
+                raise ValueError(f"Invalid band code {code} for factor {factor.name}")
+        
+        score = self._total_score(vector.points, vector.random_factor, sc)
+        factor_vector = FactorVector(list(vector.codes), list(vector.points), vector.random_factor, score,
+                                     _salary_missing(request.user_salary))
+        decision = self._decide(request, score, sc)
+        return self._build_result(request, factor_vector, decision, sc)
+    
+    def evaluate_many(self, requests: Sequence[ScoringRequest], detail: ScoringDetail = ScoringDetail.FULL,
+                      bureau: Optional[Sequence[BureauScores]] = None) -> List[ScoringResult]:
+        """
+        Пакетная оценка заявок: факторы, баллы и решения считаются массивами для всего пакета.
+        Случайные корректировки берутся из того же генератора и в том же порядке,
+        что и при последовательных вызовах evaluate_application (или из отпечатков заявок
+        в детерминированном режиме).
+        """
+        return self.score_many(requests, detail, bureau)[0]
+    
+    @stage('evaluate_many').timed
+    def score_many(self, requests: Sequence[ScoringRequest], detail: ScoringDetail = ScoringDetail.FULL,
+                   bureau: Optional[Sequence[BureauScores]] = None) -> Tuple[List[ScoringResult], List[FactorVector]]:
+        """
+        Пакетная оценка (как evaluate_many) вместе с векторами факторов заявок.
+        bureau - данные бюро по заявкам в том же порядке
+        """
+        n = len(requests)
+        if n == 0:
+            return [], []
+        sc = self.scorecard
+        
+        amounts = np.fromiter((r.loan_amount for r in requests), dtype=float, count=n)
+        terms = np.fromiter((r.loan_term for r in requests), dtype=np.int64, count=n)
+        salaries = np.fromiter((r.user_salary or 0.0 for r in requests), dtype=float, count=n)
+        app_ids = np.fromiter((r.application_id for r in requests), dtype=np.int64, count=n)
+        has_salary = salaries > 0
+        missing_salary = ~has_salary
+        
+        monthly = np.where(terms > 0, amounts / np.maximum(terms, 1), 0.0)
+        
+        # Хэши не векторизуются, поэтому считаются одним проходом, а полосы - массивом
+        if bureau is not None:
+            passport_values = np.fromiter((b.passport for b in bureau), dtype=np.int64, count=n)
+            inn_values = np.fromiter((b.inn for b in bureau), dtype=np.int64, count=n)
+        else:
+            passport_values = np.fromiter(
+                (passport_hash_score(r.passport_number) for r in requests), dtype=np.int64, count=n
+            )
+            inn_values = np.fromiter((inn_hash_score(r.inn) for r in requests), dtype=np.int64, count=n)
+        values = {
+            'loan_amount_ratio': amounts,
+            'loan_term_ratio': terms,
+            'passport_risk': passport_values,
+            'inn_risk': inn_values,
+            'application_risk': app_ids % 21 - 10,
+            'income_sufficiency': monthly / np.where(has_salary, salaries, sc.assumed_income),
+            'salary_stability': salaries,
+        }
+        missing = {
+            'income_sufficiency': missing_salary,
+            'salary_stability': missing_salary,
+        }
         
-        for factor_name, (factor_score, description) in factors.items():
-            if factor_score < -10:
-                risk_factors.append({
-                    'factor': factor_name,
-                    'severity': 'high',
-                    'description': description,
-                    'impact': factor_score
-                })
-            elif factor_score < 0:
-                risk_factors.append({
-                    'factor': factor_name,
-                    'severity': 'medium',
-                    'description': description,
-                    'impact': factor_score
-                })
-        
-        # Дополнительные риски на основе общего балла и зарплаты
-        if score < 500:
-            risk_factors.append({
-                'factor': 'overall_score',
-                'severity': 'high',
-                'description': 'Общий кредитный рейтинг слишком низкий',
-                'impact': -50
-            })
+        codes = {}
+        points = {}
+        total = np.zeros(n, dtype=float if sc.apply_weights else np.int64)
+        for factor in sc.factors:
+            codes[factor.name], points[factor.name] = factor.evaluate_many(
+                values[factor.name], missing.get(factor.name)
+            )
+            total = total + (points[factor.name] * factor.weight if sc.apply_weights else points[factor.name])
+        
+        random_factors = np.fromiter((self._random_adjustment(r, sc) for r in requests), dtype=np.int64, count=n)
+        
+        raw_scores = np.trunc(sc.base_score + total + random_factors).astype(np.int64)
+        scores = np.clip(raw_scores, sc.min_score, sc.max_score)
+        
+        status_codes = sc.status_ladder.index_many(scores)
+        approved = sc.approved_mask[status_codes]
+        for code, count in enumerate(np.bincount(status_codes, minlength=len(sc.status_values)).tolist()):
+            if count:
+                decisions_total.inc(sc.status_values[code].value, amount=count)
+        limited = sc.limited_mask[status_codes]
+        
+        approved_amounts = np.where(limited, np.minimum(amounts, sc.limited_max_amount), amounts)
+        approved_terms = np.where(limited, np.minimum(terms, sc.limited_max_term), terms)
+        interest_rates = self._calculate_interest_rates(scores, approved_terms, sc)
+        insurance = approved & (
+            (approved_amounts > sc.insurance_amount_over) | (scores < sc.insurance_score_below) |
+            (has_salary & (salaries < sc.insurance_salary_below))
+        )
         
-        if not salary or salary <= 0:
-            risk_factors.append({
-                'factor': 'salary_missing',
-                'severity': 'medium',
-                'description': 'Зарплата не указана - невозможно оценить платежеспособность',
-                'impact': -20
-            })
+        code_matrix = np.column_stack([codes[factor.name] for factor in sc.factors]).tolist()
+        point_matrix = np.column_stack([points[factor.name] for factor in sc.factors]).tolist()
+        
+        monthly_payments = self._calculate_monthly_payments(approved_amounts, interest_rates, approved_terms, approved)
+        
+        approved_flags = approved.tolist()
+        missing_flags = missing_salary.tolist()
+        results = []
+        vectors = []
+        for i, request in enumerate(requests):
+            status = sc.status_values[status_codes[i]]
+            if approved_flags[i]:
+                decision = Decision(
+                    status,
+                    approved_amount=float(approved_amounts[i]),
+                    approved_term=int(approved_terms[i]),
+                    interest_rate=float(interest_rates[i]),
+                    monthly_payment=monthly_payments[i],
+                    insurance_required=bool(insurance[i])
+                )
+            else:
+                decision = declined(status)
+            
+            vector = FactorVector(code_matrix[i], point_matrix[i], int(random_factors[i]), int(scores[i]),
+                                  missing_flags[i])
+            vectors.append(vector)
+            if detail == ScoringDetail.SUMMARY:
+                results.append(self._build_summary_result(request, vector, decision, sc))
+            else:
+                results.append(self._build_result(request, vector, decision, sc))
         
-        return risk_factors
+        return results, vectors
     
-    def evaluate_application(self, request: ScoringRequest) -> ScoringResult:
-        """Полная оценка кредитной заявки с детальными причинами"""
-        scoring_result = self.calculate_score(request)
-        score = scoring_result['score']
+    def evaluate_offer_grid(self, applicant: OfferGridRequest,
+                            bureau: Optional[BureauScores] = None) -> List[Dict[str, Any]]:
+        """
+        Сетка предложений сумма x срок для одного заявителя.
+        Факторы, зависящие только от заявителя, считаются один раз; сумма, срок, доля платежа,
+        решение, ставка и платеж - массивами по всей сетке. Ячейки в детерминированном режиме
+        совпадают с /evaluate для той же суммы и срока; в случайном режиме на всю сетку берется
+        одна случайная корректировка, чтобы соседние ячейки были сопоставимы.
+        """
+        sc = self.scorecard
+        amounts = np.asarray(applicant.amounts, dtype=float)
+        terms = np.asarray(applicant.terms, dtype=np.int64)
+        grid_amounts = np.repeat(amounts, len(terms))
+        grid_terms = np.tile(terms, len(amounts))
+        
+        salary = applicant.user_salary
+        has_salary = bool(salary) and salary > 0
+        income = float(salary) if has_salary else sc.assumed_income
+        
+        points = {
+            'loan_amount_ratio': sc.factor('loan_amount_ratio').evaluate_many(grid_amounts)[1],
+            'loan_term_ratio': sc.factor('loan_term_ratio').evaluate_many(grid_terms)[1],
+            'passport_risk': sc.factor('passport_risk').evaluate(_passport_input(applicant, bureau))[0],
+            'inn_risk': sc.factor('inn_risk').evaluate(_inn_input(applicant, bureau))[0],
+            'application_risk': self._calculate_application_risk(applicant.application_id, sc)[0],
+            'income_sufficiency': sc.factor('income_sufficiency').evaluate_many(
+                grid_amounts / grid_terms / income, np.full(len(grid_amounts), not has_salary)
+            )[1],
+            'salary_stability': self._calculate_salary_stability(salary, sc)[0],
+        }
+        total = 0
+        for factor in sc.factors:
+            total = total + (points[factor.name] * factor.weight if sc.apply_weights else points[factor.name])
+        
+        if self.config.deterministic_scoring:
+            random_factors = np.fromiter(
+                (self._adjustment_from_fingerprint(
+                    self._fingerprint(applicant.application_id, applicant.user_id, applicant.inn,
+                                      applicant.passport_number, amount, term, salary, self.random_seed),
+                    sc.random_spread
+                ) for amount, term in zip(grid_amounts.tolist(), grid_terms.tolist())),
+                dtype=np.int64, count=len(grid_amounts)
+            )
+        else:
+            random_factors = random.randint(-sc.random_spread, sc.random_spread)
+        
+        scores = np.clip(np.trunc(sc.base_score + total + random_factors).astype(np.int64), sc.min_score, sc.max_score)
+        
+        status_codes = sc.status_ladder.index_many(scores)
+        approved = sc.approved_mask[status_codes]
+        for code, count in enumerate(np.bincount(status_codes, minlength=len(sc.status_values)).tolist()):
+            if count:
+                decisions_total.inc(sc.status_values[code].value, amount=count)
+        limited = sc.limited_mask[status_codes]
+        approved_amounts = np.where(limited, np.minimum(grid_amounts, sc.limited_max_amount), grid_amounts)
+        approved_terms = np.where(limited, np.minimum(grid_terms, sc.limited_max_term), grid_terms)
+        interest_rates = self._calculate_interest_rates(scores, approved_terms, sc)
+        monthly_payments = self._calculate_monthly_payments(approved_amounts, interest_rates, approved_terms, approved)
+        insurance = approved & (
+            (approved_amounts > sc.insurance_amount_over) | (scores < sc.insurance_score_below) |
+            (has_salary and income < sc.insurance_salary_below)
+        )
         
-        # Определяем статус и причины
-        if score >= 750:
-            status = ScoringStatus.APPROVED
-            rejection_reasons = []
-            approval_details = self._get_approval_details(request, score)
-        elif score >= 650:
-            status = ScoringStatus.APPROVED
+        offers = []
+        for i in range(len(grid_amounts)):
+            is_approved = bool(approved[i])
+            offers.append({
+                'loan_amount': float(grid_amounts[i]),
+                'loan_term': int(grid_terms[i]),
+                'status': sc.status_values[status_codes[i]],
+                'score': int(scores[i]),
+                'approved_amount': float(approved_amounts[i]) if is_approved else None,
+                'approved_term': int(approved_terms[i]) if is_approved else None,
+                'interest_rate': float(interest_rates[i]) if is_approved else None,
+                'monthly_payment': monthly_payments[i] if is_approved else None,
+                'insurance_required': bool(insurance[i])
+            })
+        return offers
+    
+    def _build_result(self, request: ScoringRequest, vector: FactorVector, decision: Decision,
+                      scorecard: CompiledScorecard) -> ScoringResult:
+        """Формирование результата скоринга с причинами и рекомендациями"""
+        sc = scorecard
+        status = decision.status
+        score = vector.score
+        started = stage_clock()
+        now = detail_clock(started)
+        
+        # Тексты и словари собираются только здесь, на границе с API
+        score_details = self._score_details(vector, sc)
+        if now: now = _STAGE_SCORE_DETAILS.lap(now)
+        risk_factors = self._risk_factor_details(vector, sc)
+        if now: now = _STAGE_RISK_FACTORS.lap(now)
+        
+        if status == ScoringStatus.APPROVED:
             rejection_reasons = []
-            approval_details = self._get_approval_details(request, score, limited=True)
-        elif score >= 550:
-            status = ScoringStatus.MANUAL_REVIEW
-            rejection_reasons = self._get_rejection_reasons(scoring_result, manual_review=True)
-            approval_details = None
         else:
-            status = ScoringStatus.REJECTED
-            rejection_reasons = self._get_rejection_reasons(scoring_result)
-            approval_details = None
-        
-        # Формируем результат
-        result = ScoringResult(
+            rejection_reasons = [
+                REJECTION_REASONS[code]
+                for code in vector.rejection_reasons(manual_review=status == ScoringStatus.MANUAL_REVIEW)
+            ]
+        if now: now = _STAGE_REJECTION_REASONS.lap(now)
+        
+        risk_level = sc.risk_level_ladder.lookup(score)
+        recommendations = [
+            RECOMMENDATIONS[code] for code in vector.recommendations(status, risk_level, request.user_salary)
+        ]
+        if now: now = _STAGE_RECOMMENDATIONS.lap(now)
+        
+        # Формируем результат (значения сформированы движком, поэтому без повторной валидации)
+        result = ScoringResult.model_construct(
             application_id=request.application_id,
             user_id=request.user_id,
             status=status,
             score=score,
-            approved_amount=approval_details['approved_amount'] if approval_details else None,
-            approved_term=approval_details['approved_term'] if approval_details else None,
-            interest_rate=approval_details['interest_rate'] if approval_details else None,
-            monthly_payment=approval_details['monthly_payment'] if approval_details else None,
+            approved_amount=decision.approved_amount,
+            approved_term=decision.approved_term,
+            interest_rate=decision.interest_rate,
+            monthly_payment=decision.monthly_payment,
             rejection_reason="; ".join(rejection_reasons) if rejection_reasons else None,
-            insurance_required=approval_details['insurance_required'] if approval_details else False,
+            insurance_required=decision.insurance_required,
             details={
                 "calculated_score": score,
-                "risk_level": self._get_risk_level(score),
-                "score_details": scoring_result['details'],
-                "risk_factors": scoring_result['risk_factors'],
+                "risk_level": risk_level,
+                "score_details": score_details,
+                "risk_factors": risk_factors,
                 "rejection_reasons": rejection_reasons,
                 "user_salary_used": request.user_salary if request.user_salary else "не указана",
                 "decision_timestamp": datetime.utcnow().isoformat(),
-                "recommendations": self._get_recommendations(scoring_result, status, request.user_salary)
+                "recommendations": recommendations
             }
         )
+        if started: _STAGE_BUILD_RESULT.lap(started)
         
         return result
     
-    def _get_approval_details(self, request: ScoringRequest, score: int, limited: bool = False) -> Dict[str, Any]:
-        """Детали одобренного кредита"""
-        if limited:
+    def _decide(self, request: ScoringRequest, score: int, scorecard: CompiledScorecard) -> Decision:
+        """Решение по таблице статусов скоркарты и условия кредита для одобренной заявки"""
+        sc = scorecard
+        band = sc.status_band(score)
+        if band.status != ScoringStatus.APPROVED:
+            return declined(band.status)
+        
+        if band.limited:
             # Ограниченное одобрение для среднего балла
-            approved_amount = min(request.loan_amount, 1000000)
-            approved_term = min(request.loan_term, 36)
+            approved_amount = min(request.loan_amount, sc.limited_max_amount)
+            approved_term = min(request.loan_term, sc.limited_max_term)
         else:
             approved_amount = request.loan_amount
             approved_term = request.loan_term
         
-        interest_rate = self._calculate_interest_rate(score, approved_term)
+        interest_rate = self._calculate_interest_rate(score, approved_term, sc)
         monthly_payment = self._calculate_monthly_payment(approved_amount, interest_rate, approved_term)
         
         # Страховка требуется для высоких сумм или низкого скоринга
-        insurance_required = (
-            approved_amount > 500000 or 
-            score < 700 or 
-            (request.user_salary and request.user_salary < 50000)
+        insurance_required = bool(
+            approved_amount > sc.insurance_amount_over or 
+            score < sc.insurance_score_below or 
+            (request.user_salary and request.user_salary < sc.insurance_salary_below)
         )
         
-        return {
-            'approved_amount': approved_amount,
-            'approved_term': approved_term,
-            'interest_rate': interest_rate,
-            'monthly_payment': monthly_payment,
-            'insurance_required': insurance_required
-        }
-    
-    def _get_rejection_reasons(self, scoring_result: Dict[str, Any], manual_review: bool = False) -> List[str]:
-        """Детальные причины отказа"""
-        score = scoring_result['score']
-        risk_factors = scoring_result['risk_factors']
-        
-        reasons = []
-        
-        # Основные причины на основе балла
-        if score < 500:
-            reasons.append("Недостаточный кредитный рейтинг")
-        elif score < 550:
-            reasons.append("Низкий уровень кредитоспособности")
-        
-        # Конкретные факторы риска
-        high_risk_factors = [f for f in risk_factors if f['severity'] == 'high']
-        medium_risk_factors = [f for f in risk_factors if f['severity'] == 'medium']
-        
-        for risk_factor in high_risk_factors:
-            if risk_factor['factor'] == 'income_sufficiency':
-                reasons.append("Недостаточный уровень дохода для запрашиваемой суммы")
-            elif risk_factor['factor'] == 'salary_missing':
-                reasons.append("Не указана зарплата - невозможно оценить платежеспособность")
-            elif risk_factor['factor'] == 'loan_amount_ratio':
-                reasons.append("Запрашиваемая сумма превышает допустимые лимиты")
-            elif risk_factor['factor'] == 'overall_score':
-                reasons.append("Общий уровень риска превышает допустимые значения")
-        
-        for risk_factor in medium_risk_factors[:2]:  # Берем до 2 средних факторов
-            if risk_factor['factor'] == 'loan_term_ratio':
-                reasons.append("Запрашиваемый срок кредита несет повышенные риски")
-            elif risk_factor['factor'] == 'passport_risk':
-                reasons.append("Требуется дополнительная проверка паспортных данных")
-            elif risk_factor['factor'] == 'salary_stability':
-                reasons.append("Уровень дохода недостаточен для комфортного обслуживания кредита")
-        
-        # Если причины не найдены, добавляем общие
-        if not reasons:
-            if manual_review:
-                reasons.append("Требуется ручная проверка данных заявителя")
-            else:
-                reasons.append("Несоответствие требованиям кредитной политики банка")
-        
-        return reasons
+        return Decision(
+            band.status,
+            approved_amount=float(approved_amount),
+            approved_term=int(approved_term),
+            interest_rate=float(interest_rate),
+            monthly_payment=monthly_payment,
+            insurance_required=insurance_required
+        )
     
-    def _get_recommendations(self, scoring_result: Dict[str, Any], status: ScoringStatus, user_salary: Optional[float]) -> List[str]:
-        """Рекомендации для заявителя с учетом зарплаты"""
-        recommendations = []
-        score = scoring_result['score']
-        risk_factors = scoring_result['risk_factors']
-        
-        if status == ScoringStatus.REJECTED:
-            if score < 550:
-                recommendations.append("Рекомендуем обратиться за кредитом с меньшей суммой")
-                recommendations.append("Рассмотрите возможность увеличения срока кредита")
-            
-            if not user_salary:
-                recommendations.append("Укажите вашу зарплату для более точной оценки платежеспособности")
-            
-            high_risk_factors = [f for f in risk_factors if f['severity'] == 'high']
-            for risk_factor in high_risk_factors:
-                if risk_factor['factor'] == 'income_sufficiency':
-                    recommendations.append("Предоставьте документы, подтверждающие дополнительный доход")
-                elif risk_factor['factor'] == 'salary_missing':
-                    recommendations.append("Укажите вашу зарплату в личном кабинете")
-        
-        elif status == ScoringStatus.MANUAL_REVIEW:
-            recommendations.append("Подготовьте дополнительные документы, подтверждающие доход")
-            recommendations.append("Будьте готовы к звонку от кредитного специалиста")
-            if not user_salary:
-                recommendations.append("Рекомендуем указать зарплату для ускорения проверки")
-        
-        elif status == ScoringStatus.APPROVED:
-            if scoring_result['details']['risk_level'] == 'MEDIUM':
-                recommendations.append("Рассмотрите возможность страхования кредита для снижения ставки")
-        
-        if not recommendations:
-            recommendations.append("Для уточнения деталей обратитесь в отделение банка")
-        
-        return recommendations
-    
-    def _get_risk_level(self, score: int) -> str:
-        if score >= 750:
-            return "LOW"
-        elif score >= 650:
-            return "MEDIUM"
-        elif score >= 550:
-            return "HIGH"
-        else:
-            return "VERY_HIGH"
+    def _get_risk_level(self, score: int, scorecard: Optional[CompiledScorecard] = None) -> str:
+        return (scorecard or self.scorecard).risk_level_ladder.lookup(score)
     
-    def _calculate_interest_rate(self, score: int, term: int) -> float:
+    def _calculate_interest_rate(self, score: int, term: int, scorecard: Optional[CompiledScorecard] = None) -> float:
+        sc = scorecard or self.scorecard
         base_rate = self.config.base_interest_rate
         
-        # Корректировка на основе скорингового балла
-        if score >= 800:
-            rate_adjustment = -4.0
-        elif score >= 750:
-            rate_adjustment = -2.5
-        elif score >= 700:
-            rate_adjustment = -1.5
-        elif score >= 650:
-            rate_adjustment = -0.5
-        else:
-            rate_adjustment = 1.0
-        
-        # Корректировка на основе срока
-        if term > 36:
-            term_adjustment = 1.5
-        elif term > 24:
-            term_adjustment = 0.5
-        else:
-            term_adjustment = 0.0
+        # Корректировки на основе скорингового балла и срока
+        rate_adjustment = sc.score_rate_ladder.lookup(score)
+        term_adjustment = sc.term_rate_ladder.lookup(term)
         
-        return max(5.0, base_rate + rate_adjustment + term_adjustment)
+        return max(sc.min_interest_rate, base_rate + rate_adjustment + term_adjustment)
+    
+    def _calculate_interest_rates(self, scores: np.ndarray, terms: np.ndarray,
+                                  scorecard: Optional[CompiledScorecard] = None) -> np.ndarray:
+        """Векторный вариант _calculate_interest_rate"""
+        sc = scorecard or self.scorecard
+        rate_adjustments = sc.score_rate_ladder.lookup_many(scores)
+        term_adjustments = sc.term_rate_ladder.lookup_many(terms)
+        return np.maximum(sc.min_interest_rate, self.config.base_interest_rate + rate_adjustments + term_adjustments)
+    
+    def _calculate_monthly_payments(self, amounts: np.ndarray, rates: np.ndarray, terms: np.ndarray,
+                                    mask: Optional[np.ndarray] = None) -> List[Optional[float]]:
+        """
+        Векторный вариант _calculate_monthly_payment (None там, где mask ложна).
+        Аннуитетные коэффициенты берутся из кэша по уникальным парам (ставка, срок),
+        поэтому результаты совпадают с поштучным расчетом до копейки.
+        """
+        if mask is None:
+            mask = np.ones(len(amounts), dtype=bool)
+        payments: List[Optional[float]] = [None] * len(amounts)
+        if not mask.any():
+            return payments
+        
+        pairs, inverse = np.unique(np.column_stack([rates[mask], terms[mask]]), axis=0, return_inverse=True)
+        factors = np.array([annuity_terms(rate, int(term)) for rate, term in pairs.tolist()])
+        
+        inverse = inverse.reshape(-1)
+        raw = amounts[mask] * factors[inverse, 0] / factors[inverse, 1]
+        for i, payment in zip(np.flatnonzero(mask).tolist(), raw.tolist()):
+            payments[i] = round(payment, 2)
+        return payments
     
     def _calculate_monthly_payment(self, amount: float, rate: float, term: int) -> float:
-        monthly_rate = rate / 100 / 12
-        payment = amount * (monthly_rate * (1 + monthly_rate) ** term) / ((1 + monthly_rate) ** term - 1)
-        return round(payment, 2)
\ No newline at end of file
+        return monthly_payment(amount, rate, term)
+    
+    def build_schedule(self, amount: float, rate: float, term: int) -> AmortizationSchedule:
+        """График погашения; платеж совпадает с monthly_payment в результатах скоринга"""
+        schedule = amortization_schedule(amount, rate, term)
+        payments = schedule['payment']
+        rows = [
+            ScheduleRow(month=month, payment=payment, principal=principal, interest=interest, balance=balance)
+            for month, payment, principal, interest, balance in zip(
+                schedule['month'].tolist(), payments.tolist(), schedule['principal'].tolist(),
+                schedule['interest'].tolist(), schedule['balance'].tolist()
+            )
+        ]
+        total_payment = round(float(payments.sum()), 2)
+        return AmortizationSchedule(
+            loan_amount=amount,
+            interest_rate=rate,
+            loan_term=term,
+            monthly_payment=self._calculate_monthly_payment(amount, rate, term),
+            total_payment=total_payment,
+            total_interest=round(total_payment - amount, 2),
+            rows=rows
+        )
@@ -0,0 +1,55 @@
+"""
+Сегменты портфеля для аналитики: полосы суммы, срока и зарплаты, корзины балла.
+
+Сумма и срок делятся по верхним границам включительно, зарплата - по нижним, отдельно "не указана".
+Номера полос считаются массивами numpy для целого пакета.
+"""
+from typing import List, Sequence
+
+import numpy as np
+
+AMOUNT_EDGES = (100000, 300000, 500000, 1000000, 3000000)
+TERM_EDGES = (12, 24, 36, 60)
+SALARY_EDGES = (30000, 60000, 100000)
+
+# Гистограмма баллов: корзины по 10 баллов на [0, 1000]
+SCORE_BIN = 10
+SCORE_BINS = 1000 // SCORE_BIN + 1
+
+
+def band_labels(edges: Sequence[float]) -> List[str]:
+    labels = [f"<={edges[0]:g}"]
+    labels += [f"{low:g}-{high:g}" for low, high in zip(edges, edges[1:])]
+    labels.append(f">{edges[-1]:g}")
+    return labels
+
+
+AMOUNT_LABELS = band_labels(AMOUNT_EDGES)
+TERM_LABELS = band_labels(TERM_EDGES)
+SALARY_LABELS = ['missing'] + band_labels(SALARY_EDGES)
+
+
+def amount_bands(amounts: np.ndarray) -> np.ndarray:
+    return np.searchsorted(AMOUNT_EDGES, amounts, side='left')
+
+
+def term_bands(terms: np.ndarray) -> np.ndarray:
+    return np.searchsorted(TERM_EDGES, terms, side='left')
+
+
+def salary_bands(salaries: np.ndarray) -> np.ndarray:
+    """Полосы зарплаты; 0 - не указана (0 или меньше)"""
+    return np.where(salaries > 0, np.searchsorted(SALARY_EDGES, salaries, side='right') + 1, 0)
+
+
+def score_bins(scores: np.ndarray) -> np.ndarray:
+    return np.clip(scores // SCORE_BIN, 0, SCORE_BINS - 1)
+
+
+def score_percentile(hist: np.ndarray, q: float) -> float:
+    """Перцентиль балла по гистограмме корзин SCORE_BIN (верхняя граница корзины)"""
+    total = hist.sum()
+    if not total:
+        return 0.0
+    index = int(np.searchsorted(np.cumsum(hist), q * total))
+    return float(min(index * SCORE_BIN + SCORE_BIN, 1000))
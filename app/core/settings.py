@@ -0,0 +1,107 @@
+import os
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class Settings(BaseModel):
+    """Настройки сервиса. Каждое поле можно переопределить переменной окружения SCORING_<ИМЯ_ПОЛЯ>"""
+
+    # Режим исполнения скоринга: inline - в event loop, thread/process - в пуле исполнителей
+    execution_mode: Literal["inline", "thread", "process"] = "inline"
+    executor_workers: int = 4
+    executor_max_queue: int = 256
+
+    # Фоновые задания (/jobs) исполняются отдельным пулом, чтобы не отнимать мощность у интерактивного /evaluate
+    jobs_execution_mode: Literal["inline", "thread", "process"] = "process"
+    jobs_workers: int = 2
+    jobs_max_queue: int = 100
+    jobs_chunk_size: int = 1000
+    # Время хранения результатов завершенного задания, секунд
+    jobs_ttl: float = 3600.0
+    jobs_retry_after: int = 5
+
+    # Детерминированный скоринг: случайная корректировка выводится из отпечатка заявки
+    deterministic_scoring: bool = False
+    # Кэш результатов работает только в детерминированном режиме; размер 0 отключает кэш
+    result_cache_size: int = 10000
+    result_cache_ttl: float = 300.0
+    # Имя сегмента общей памяти с кэшем результатов; задает app.serve для своих воркеров,
+    # пустое значение - кэш в памяти процесса. Слот вмещает одно решение в JSON
+    shared_result_cache: str = ""
+    result_cache_slot_bytes: int = 4096
+
+    # Окно идемпотентности /evaluate, секунд: повтор той же заявки в окне получает сохраненное решение
+    # (в любом режиме скоринга); 0 отключает окно. Одинаковые конкурентные запросы схлопываются всегда
+    idempotency_window: float = 0.0
+    idempotency_cache_size: int = 10000
+
+    # Векторы факторов последних оценок по application_id для PATCH /evaluate/{application_id};
+    # размер 0 отключает повторную оценку
+    rescore_cache_size: int = 10000
+    rescore_cache_ttl: float = 1800.0
+
+    # Аудит решений: каталог сегментов; пустое значение отключает аудит
+    audit_dir: str = ""
+    audit_max_queue: int = 100000
+    # Переполнение очереди: drop - отбросить запись, block - ждать места до audit_block_timeout секунд
+    audit_queue_policy: Literal["drop", "block"] = "drop"
+    audit_block_timeout: float = 1.0
+    audit_batch_size: int = 1024
+    audit_flush_interval: float = 0.2
+    # Интервал fsync, секунд: 0 - после каждой порции, отрицательное значение - без fsync
+    audit_fsync_interval: float = 1.0
+    audit_segment_bytes: int = 64 * 1024 * 1024
+
+    # Кредитное бюро: базовый URL; пустое значение - риски паспорта и ИНН по хэшам номеров
+    bureau_url: str = ""
+    # Таймаут одного вызова бюро, секунд; при ошибке или таймауте используется оценка по хэшу
+    bureau_timeout: float = 0.5
+    bureau_pool_size: int = 32
+    # Кэш ответов бюро по номеру документа
+    bureau_cache_size: int = 100000
+    bureau_cache_ttl: float = 3600.0
+    # Автомат отключения: ошибок подряд до отключения и пауза до пробного вызова, секунд
+    bureau_breaker_failures: int = 5
+    bureau_breaker_reset: float = 10.0
+    # Адаптивный лимит одновременных запросов (AIMD по задержке) и сброс нагрузки
+    admission_enabled: bool = True
+    admission_initial_limit: int = 32
+    admission_min_limit: int = 4
+    admission_max_limit: int = 512
+    # Очередь сверх лимита и максимальное ожидание в ней для запросов без срока, секунд
+    admission_max_queue: int = 512
+    admission_queue_timeout: float = 1.0
+    # Порог задержки: admission_target_latency секунд или базовая задержка * admission_latency_tolerance
+    admission_target_latency: float = 0.0
+    admission_latency_tolerance: float = 2.0
+    admission_backoff: float = 0.9
+    # Заголовок с оставшимся у клиента временем, мс
+    admission_deadline_header: str = "X-Request-Timeout-Ms"
+    admission_retry_after: int = 1
+    # Запуск через app.serve: число процессов (0 - по числу ядер) и размер пакета прогрева
+    # каждого процесса перед приемом запросов (0 - без прогрева)
+    serve_workers: int = 0
+    warmup_requests: int = 256
+    # Имя сегмента общей памяти со скоркартой, замененной через /api/v1/admin; задает app.serve
+    # для своих воркеров, пустое значение - скоркарта только в памяти процесса
+    shared_scorecard: str = ""
+    # Путь к JSON-скоркарте; пустое значение - скоркарта по умолчанию
+    scorecard_path: str = ""
+    # Токен для административных эндпоинтов (заголовок X-Admin-Token); пустое значение - без проверки
+    admin_token: str = ""
+
+    # Гистограммы этапов и счетчики для /metrics; переключаются на лету через /api/v1/admin/metrics
+    metrics_enabled: bool = True
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        values = {}
+        for name in cls.model_fields:
+            raw = os.getenv(f"SCORING_{name.upper()}")
+            if raw is not None:
+                values[name] = raw
+        return cls(**values)
+
+
+settings = Settings.from_env()
@@ -0,0 +1,31 @@
+"""
+Синтетические заявки для прогрева процесса перед приемом запросов.
+
+Заявки покрывают все полосы суммы, срока и зарплаты (включая заявки без зарплаты), поэтому
+при прогреве проходят все ветки решения: одобрение, ручная проверка и отказ.
+Набор детерминирован: одинаковый размер дает одинаковые заявки.
+"""
+import random
+from typing import List
+
+from app.schemas.scoring import ScoringRequest
+
+_AMOUNTS = (50000, 200000, 400000, 800000, 2000000, 5000000)
+_TERMS = (6, 12, 24, 36, 60, 84)
+_SALARIES = (None, 25000, 50000, 80000, 150000, 400000)
+
+
+def sample_requests(n: int) -> List[ScoringRequest]:
+    rng = random.Random(n)
+    return [
+        ScoringRequest(
+            application_id=900000000 + i,
+            user_id=900000000 + i,
+            inn=f"{rng.randrange(10 ** 12):012d}",
+            passport_number=f"{rng.randrange(10 ** 10):010d}",
+            loan_amount=_AMOUNTS[i % len(_AMOUNTS)],
+            loan_term=_TERMS[i // len(_AMOUNTS) % len(_TERMS)],
+            user_salary=_SALARIES[rng.randrange(len(_SALARIES))],
+        )
+        for i in range(n)
+    ]
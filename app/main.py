@@ -1,9 +1,27 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from typing import Any, Dict
+import logging
 import uvicorn
 import os
 
-from app.api.routes.scoring import router as scoring_router
+from app.api.routes.scoring import (
+    router as scoring_router, scoring_executor, job_manager, audit_sink, bureau_client, admission_limiter,
+    result_cache, warm_up
+)
+from app.api.routes.admin import router as admin_router, shared_scorecard, sync_shared_scorecard
+from app.api.admission import AdmissionMiddleware
+from app.api.scorecard_sync import ScorecardSyncMiddleware
+from app.core.cache import SharedResultCache
+from app.core.metrics import metrics
+from app.core.settings import settings
+
+metrics.enabled = settings.metrics_enabled
+logger = logging.getLogger(__name__)
+
+# Готовность процесса к трафику: выставляется после прогрева, снимается при остановке
+readiness: Dict[str, Any] = {"ready": False, "warmup_seconds": None}
 
 app = FastAPI(
     title="Scoring Service",
@@ -11,6 +29,23 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Скоркарта, замененная в другом воркере app.serve, применяется до обработки запроса.
+# Добавлен первым, поэтому выполняется уже после допуска запроса
+if shared_scorecard is not None:
+    app.add_middleware(ScorecardSyncMiddleware, sync=sync_shared_scorecard, paths=("/api/v1",))
+
+# Лимит одновременных запросов и сброс нагрузки. Health, готовность, метрики, админка и потоковый скоринг
+# (у него свое ожидание места в очереди исполнителя) обслуживаются всегда.
+# Добавлен до CORS, чтобы ответы 503 тоже получали CORS-заголовки
+if settings.admission_enabled:
+    app.add_middleware(
+        AdmissionMiddleware,
+        limiter=admission_limiter,
+        deadline_header=settings.admission_deadline_header,
+        exempt=("/health", "/ready", "/metrics", "/api/v1/admin", "/api/v1/scoring/evaluate/stream"),
+        retry_after=settings.admission_retry_after
+    )
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -22,6 +57,34 @@ app.add_middleware(
 
 # Роутеры
 app.include_router(scoring_router, prefix="/api/v1/scoring", tags=["scoring"])
+app.include_router(admin_router, prefix="/api/v1/admin", tags=["admin"])
+
+@app.on_event("startup")
+async def start_executor():
+    audit_sink.start()
+    bureau_client.start()
+    scoring_executor.start()
+    job_manager.start()
+    # Перезапущенный воркер берет скоркарту, замененную после старта сервиса, до прогрева
+    await sync_shared_scorecard()
+    # uvicorn начинает принимать соединения только после startup, поэтому первые запросы идут в прогретый процесс
+    if settings.warmup_requests > 0:
+        readiness["warmup_seconds"] = round(await warm_up(settings.warmup_requests), 3)
+        logger.info(f"Warm-up finished in {readiness['warmup_seconds']}s")
+    readiness["ready"] = True
+
+@app.on_event("shutdown")
+async def stop_executor():
+    readiness["ready"] = False
+    await job_manager.shutdown()
+    scoring_executor.shutdown()
+    bureau_client.close()
+    # Очередь аудита дописывается после остановки исполнителей, чтобы не потерять последние решения
+    audit_sink.close()
+    if isinstance(result_cache, SharedResultCache):
+        result_cache.close()
+    if shared_scorecard is not None:
+        shared_scorecard.close()
 
 @app.get("/")
 async def root():
@@ -31,3 +94,19 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "scoring"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Готовность к трафику: 200 после прогрева процесса, до него и при остановке - 503"""
+    if not readiness["ready"]:
+        return JSONResponse({"status": "warming_up", "service": "scoring"}, status_code=503)
+    return {
+        "status": "ready",
+        "service": "scoring",
+        "pid": os.getpid(),
+        "warmup_seconds": readiness["warmup_seconds"]
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Гистограммы этапов и счетчики в текстовом формате Prometheus"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
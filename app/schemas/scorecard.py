@@ -0,0 +1,98 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List
+
+from app.schemas.scoring import ScoringStatus
+
+# Факторы, которые умеет вычислять движок; скоркарта задает для них полосы и веса
+SCORECARD_FACTORS = (
+    'loan_amount_ratio',
+    'loan_term_ratio',
+    'passport_risk',
+    'inn_risk',
+    'application_risk',
+    'income_sufficiency',
+    'salary_stability',
+)
+
+def _check_uppers(uppers: List[Optional[float]], where: str) -> None:
+    if not uppers:
+        raise ValueError(f"{where}: at least one band is required")
+    if uppers[-1] is not None or any(u is None for u in uppers[:-1]):
+        raise ValueError(f"{where}: only the last band must have no upper bound")
+    bounds = uppers[:-1]
+    if any(a >= b for a, b in zip(bounds, bounds[1:])):
+        raise ValueError(f"{where}: upper bounds must be strictly increasing")
+
+class ScorecardBand(BaseModel):
+    upper: Optional[float] = None  # None - последняя полоса без верхней границы
+    points: Optional[int] = None  # None - баллы равны значению фактора (факторы на основе хэша)
+    description: str
+
+class ScorecardFactor(BaseModel):
+    name: str
+    weight: float = 1.0
+    upper_inclusive: bool = True  # True: value <= upper, False: value < upper
+    bands: List[ScorecardBand]
+    missing_bands: Optional[List[ScorecardBand]] = None  # полосы для заявок без зарплаты
+
+    @model_validator(mode='after')
+    def check_bands(self) -> 'ScorecardFactor':
+        _check_uppers([b.upper for b in self.bands], self.name)
+        if self.missing_bands is not None:
+            _check_uppers([b.upper for b in self.missing_bands], f"{self.name}.missing_bands")
+        return self
+
+class StatusBand(BaseModel):
+    upper: Optional[float] = None  # score < upper
+    status: ScoringStatus
+    limited: bool = False  # ограниченное одобрение: сумма и срок урезаются до лимитов
+
+class RiskLevelBand(BaseModel):
+    upper: Optional[float] = None  # score < upper
+    level: str
+
+class RateBand(BaseModel):
+    upper: Optional[float] = None
+    adjustment: float
+
+class Scorecard(BaseModel):
+    """Скоркарта: полосы факторов, веса и таблицы решений"""
+    name: str = "default"
+    base_score: int = 500
+    min_score: int = 300
+    max_score: int = 850
+    random_spread: int = Field(15, ge=0)
+    apply_weights: bool = False  # False - веса только информационные, баллы суммируются как есть
+    assumed_income: float = Field(50000, gt=0)  # предполагаемый доход, если зарплата не указана
+
+    factors: List[ScorecardFactor]
+
+    status_bands: List[StatusBand]  # по баллу, score < upper
+    risk_level_bands: List[RiskLevelBand]  # по баллу, score < upper
+    score_rate_bands: List[RateBand]  # надбавка к ставке по баллу, score < upper
+    term_rate_bands: List[RateBand]  # надбавка к ставке по сроку, term <= upper
+
+    limited_max_amount: float = 1000000
+    limited_max_term: int = 36
+    min_interest_rate: float = 5.0
+
+    insurance_amount_over: float = 500000
+    insurance_score_below: int = 700
+    insurance_salary_below: float = 50000
+
+    @model_validator(mode='after')
+    def check_scorecard(self) -> 'Scorecard':
+        names = [f.name for f in self.factors]
+        if sorted(names) != sorted(SCORECARD_FACTORS):
+            raise ValueError(f"factors must be exactly: {', '.join(SCORECARD_FACTORS)}")
+        for factor_name in ('income_sufficiency', 'salary_stability'):
+            factor = next(f for f in self.factors if f.name == factor_name)
+            if factor.missing_bands is None:
+                raise ValueError(f"{factor_name}: missing_bands are required")
+        _check_uppers([b.upper for b in self.status_bands], "status_bands")
+        _check_uppers([b.upper for b in self.risk_level_bands], "risk_level_bands")
+        _check_uppers([b.upper for b in self.score_rate_bands], "score_rate_bands")
+        _check_uppers([b.upper for b in self.term_rate_bands], "term_rate_bands")
+        if self.min_score > self.max_score:
+            raise ValueError("min_score must not exceed max_score")
+        return self
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field, PositiveFloat, PositiveInt
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from enum import Enum
 
@@ -8,6 +8,10 @@ class ScoringStatus(str, Enum):
     REJECTED = "rejected"
     MANUAL_REVIEW = "manual_review"
 
+class ScoringDetail(str, Enum):
+    SUMMARY = "summary"  # только решение, без пояснений
+    FULL = "full"
+
 class ScoringRequest(BaseModel):
     application_id: int
     user_id: int
@@ -17,6 +21,12 @@ class ScoringRequest(BaseModel):
     loan_term: int = Field(..., gt=0)
     user_salary: Optional[float] = Field(None, ge=0)  # ✅ Добавляем зарплату
 
+class ScoringRequestPatch(BaseModel):
+    """Измененные поля заявки для повторной оценки; остальные поля берутся из прошлой оценки"""
+    loan_amount: Optional[float] = Field(None, gt=0)
+    loan_term: Optional[int] = Field(None, gt=0)
+    user_salary: Optional[float] = Field(None, ge=0)
+
 class ScoringResult(BaseModel):
     application_id: int
     user_id: int
@@ -36,10 +46,133 @@ class ScoringResponse(BaseModel):
     error: Optional[str] = None
     timestamp: datetime
 
+class ScoringFactorVector(BaseModel):
+    """Компактный вектор факторов: коды полос и баллы в порядке факторов скоркарты"""
+    scorecard_version: str
+    codes: List[int]
+    points: List[int]
+    random_factor: int
+
+class ScoringExplainRequest(BaseModel):
+    request: ScoringRequest
+    factor_vector: ScoringFactorVector
+
+class ScoringBatchRequest(BaseModel):
+    requests: List[ScoringRequest] = Field(..., min_length=1, max_length=10000)
+
+class ScoringBatchResponse(BaseModel):
+    success: bool
+    data: List[ScoringResult] = []
+    error: Optional[str] = None
+    timestamp: datetime
+    # Аналитика портфеля пакета (только при analytics=true)
+    portfolio: Optional[Dict[str, Any]] = None
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class ScoringJobRequest(BaseModel):
+    requests: List[ScoringRequest] = Field(..., min_length=1, max_length=100000)
+
+class ScoringJob(BaseModel):
+    job_id: str
+    status: JobStatus
+    detail: ScoringDetail
+    total: int
+    processed: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+class ScoringJobResponse(BaseModel):
+    success: bool
+    data: Optional[ScoringJob] = None
+    error: Optional[str] = None
+    timestamp: datetime
+
+class ScoringJobResultsPage(BaseModel):
+    job_id: str
+    status: JobStatus
+    offset: int
+    limit: int
+    total: int
+    processed: int
+    next_offset: Optional[int] = None
+    results: List[ScoringResult] = []
+
+class ScoringJobResultsResponse(BaseModel):
+    success: bool
+    data: Optional[ScoringJobResultsPage] = None
+    error: Optional[str] = None
+    timestamp: datetime
+
+class OfferGridRequest(BaseModel):
+    """Один заявитель и набор сумм и сроков для расчета сетки предложений"""
+    application_id: int
+    user_id: int
+    inn: str = Field(..., pattern=r'^\d{12}$')
+    passport_number: str = Field(..., pattern=r'^\d{10}$')
+    user_salary: Optional[float] = Field(None, ge=0)
+    amounts: List[PositiveFloat] = Field(..., min_length=1, max_length=100)
+    terms: List[PositiveInt] = Field(..., min_length=1, max_length=100)
+
+class OfferCell(BaseModel):
+    loan_amount: float
+    loan_term: int
+    status: ScoringStatus
+    score: int
+    approved_amount: Optional[float] = None
+    approved_term: Optional[int] = None
+    interest_rate: Optional[float] = None
+    monthly_payment: Optional[float] = None
+    insurance_required: bool = False
+
+class OfferGrid(BaseModel):
+    application_id: int
+    user_id: int
+    amounts: List[float]
+    terms: List[int]
+    offers: List[OfferCell]  # по строкам: для каждой суммы все сроки по порядку
+
+class OfferGridResponse(BaseModel):
+    success: bool
+    data: Optional[OfferGrid] = None
+    error: Optional[str] = None
+    timestamp: datetime
+
+class ScheduleRow(BaseModel):
+    month: int
+    payment: float
+    principal: float
+    interest: float
+    balance: float
+
+class AmortizationSchedule(BaseModel):
+    loan_amount: float
+    interest_rate: float
+    loan_term: int
+    monthly_payment: float
+    total_payment: float
+    total_interest: float
+    rows: List[ScheduleRow]
+
+class ScheduleResponse(BaseModel):
+    success: bool
+    data: Optional[AmortizationSchedule] = None
+    error: Optional[str] = None
+    timestamp: datetime
+
 class ScoringConfig(BaseModel):
     min_score_approval: int = 650
     max_loan_amount: float = 5000000
     min_loan_amount: float = 10000
     max_loan_term: int = 60
     min_loan_term: int = 6
-    base_interest_rate: float = 12.5
\ No newline at end of file
+    base_interest_rate: float = 12.5
+    deterministic_scoring: bool = False
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Промышленный запуск сервиса: несколько процессов uvicorn на одном порту.
+
+    python -m app.serve --host 0.0.0.0 --port 8001 --workers 4
+
+Каждый воркер строит движок и прогревает его при старте (SCORING_WARMUP_REQUESTS заявок) и начинает
+принимать соединения только после прогрева; /ready отвечает 200 только прогретым процессом.
+В детерминированном режиме родительский процесс создает кэш решений в multiprocessing.shared_memory
+и передает воркерам его имя через SCORING_SHARED_RESULT_CACHE: решение, посчитанное одним воркером,
+переиспользуют все, и кэш не дублируется в каждом процессе. Сегмент удаляется при остановке.
+
+Скоркарта и конфигурация читаются каждым воркером из настроек (SCORING_SCORECARD_PATH и др.).
+Горячая замена скоркарты через /api/v1/admin публикуется в сегменте общей памяти (SharedScorecard,
+имя передается через SCORING_SHARED_SCORECARD): каждый воркер сверяет поколение скоркарты перед
+запросом и применяет замену до скоринга. Запросы, принятые после публикации, оцениваются новой
+скоркартой в любом воркере; уже обрабатываемые дорабатывают со старой. Пока воркер пересоздает
+пулы процессов исполнителей (execution_mode=process), его новые запросы ждут окончания замены.
+"""
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+import uvicorn
+
+from app.core.cache import SharedResultCache
+from app.core.scorecard import SharedScorecard, load_scorecard
+from app.core.settings import settings
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m app.serve', description='Запуск сервиса скоринга')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--workers', type=int, default=settings.serve_workers,
+                        help='Число процессов (по умолчанию SCORING_SERVE_WORKERS или число ядер)')
+    parser.add_argument('--log-level', default='info')
+    parser.add_argument('--no-shared-cache', action='store_true', help='Кэш решений в памяти каждого процесса')
+    args = parser.parse_args(argv)
+    workers = args.workers or os.cpu_count() or 1
+
+    # Ошибка в скоркарте должна остановить запуск до старта воркеров
+    if settings.scorecard_path:
+        load_scorecard(settings.scorecard_path)
+
+    shared_scorecard = None
+    if workers > 1:
+        shared_scorecard = SharedScorecard(f"scoring-scorecard-{os.getpid()}", create=True)
+        os.environ['SCORING_SHARED_SCORECARD'] = shared_scorecard.name
+
+    shared_cache = None
+    if (workers > 1 and not args.no_shared_cache and settings.deterministic_scoring
+            and settings.result_cache_size > 0):
+        shared_cache = SharedResultCache(
+            f"scoring-results-{os.getpid()}",
+            dumps=bytes,
+            loads=bytes,
+            max_size=settings.result_cache_size,
+            ttl=settings.result_cache_ttl,
+            slot_bytes=settings.result_cache_slot_bytes,
+            create=True,
+        )
+        os.environ['SCORING_SHARED_RESULT_CACHE'] = shared_cache.name
+
+    try:
+        uvicorn.run('app.main:app', host=args.host, port=args.port, workers=workers, log_level=args.log_level)
+    finally:
+        for segment in (shared_cache, shared_scorecard):
+            if segment is not None:
+                segment.close()
+                segment.unlink()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
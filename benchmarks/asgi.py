@@ -0,0 +1,160 @@
+"""
+Бенчмарк HTTP-пути без сети: запросы подаются прямо в ASGI-приложение.
+
+Измеряется весь стек FastAPI - маршрутизация, валидация, скоринг, сериализация ответа -
+без затрат на сокеты и HTTP-парсер сервера. Запросы отправляются несколькими конкурентными
+клиентами; в отчет идут запросы в секунду и перцентили задержки p50/p95/p99 - медианы
+по repeats повторам, чтобы единичный всплеск задержки на общей машине не решал исход сравнения.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from benchmarks.generator import generate_payloads
+
+
+class ASGIDriver:
+    """Минимальный клиент ASGI: lifespan и POST-запросы с телом целиком"""
+
+    def __init__(self, app):
+        self.app = app
+        self._lifespan_queue: Optional[asyncio.Queue] = None
+        self._lifespan_task: Optional[asyncio.Task] = None
+
+    async def startup(self) -> None:
+        self._lifespan_queue = asyncio.Queue()
+        started = asyncio.get_running_loop().create_future()
+
+        async def receive():
+            return await self._lifespan_queue.get()
+
+        async def send(message):
+            if message['type'] in ('lifespan.startup.complete', 'lifespan.startup.failed') and not started.done():
+                started.set_result(message)
+
+        self._lifespan_task = asyncio.create_task(
+            self.app({'type': 'lifespan', 'asgi': {'version': '3.0'}}, receive, send)
+        )
+        await self._lifespan_queue.put({'type': 'lifespan.startup'})
+        message = await started
+        if message['type'] == 'lifespan.startup.failed':
+            raise RuntimeError(message.get('message', 'ASGI startup failed'))
+
+    async def shutdown(self) -> None:
+        if self._lifespan_task is None:
+            return
+        await self._lifespan_queue.put({'type': 'lifespan.shutdown'})
+        await self._lifespan_task
+        self._lifespan_task = None
+
+    async def post(self, path: str, body: bytes) -> Tuple[int, bytes]:
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+            'root_path': '', 'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+            'headers': [(b'host', b'testserver'), (b'content-type', b'application/json'),
+                        (b'content-length', str(len(body)).encode())],
+        }
+        sent = False
+        status = 0
+        chunks: List[bytes] = []
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            await asyncio.Event().wait()
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+        await self.app(scope, receive, send)
+        return status, b''.join(chunks)
+
+
+def median_summary(runs: Sequence[Dict[str, float]]) -> Dict[str, float]:
+    """Медиана каждой метрики по повторам; ошибки суммируются"""
+    summary = {key: round(float(np.median([run[key] for run in runs])), 3) for key in runs[0]}
+    summary['requests'] = runs[0]['requests']
+    summary['errors'] = sum(run['errors'] for run in runs)
+    return summary
+
+
+def summarize(latencies: Sequence[float], elapsed: float, errors: int) -> Dict[str, float]:
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) if len(values) else (0.0, 0.0, 0.0)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed if elapsed else 0.0, 1),
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+    }
+
+
+async def _drive(driver: ASGIDriver, path: str, bodies: Sequence[bytes], concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    position = 0
+
+    async def client():
+        nonlocal position, errors
+        while position < len(bodies):
+            body = bodies[position]
+            position += 1
+            started = time.perf_counter()
+            status, payload = await driver.post(path, body)
+            latencies.append(time.perf_counter() - started)
+            if status != 200 or b'"success":true' not in payload:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+async def run_asgi_async(app, count: int = 2000, concurrency: int = 16, seed: int = 42,
+                         repeats: int = 1) -> Dict[str, Dict[str, float]]:
+    bodies = [json.dumps(payload).encode() for payload in generate_payloads(count, seed)]
+    warmup = bodies[:min(len(bodies), 100)]
+    targets = {
+        'evaluate': '/api/v1/scoring/evaluate',
+        'simulate.approved': '/api/v1/scoring/simulate/approved',
+        'simulate.rejected': '/api/v1/scoring/simulate/rejected',
+    }
+
+    driver = ASGIDriver(app)
+    await driver.startup()
+    try:
+        results = {}
+        for name, path in targets.items():
+            await _drive(driver, path, warmup, concurrency)
+            runs = [await _drive(driver, path, bodies, concurrency) for _ in range(max(1, repeats))]
+            results[name] = median_summary(runs)
+        return results
+    finally:
+        await driver.shutdown()
+
+
+def run_asgi(count: int = 2000, concurrency: int = 16, seed: int = 42, repeats: int = 1,
+             metrics_enabled: Optional[bool] = None) -> Dict[str, Dict[str, Any]]:
+    from app.main import app
+    from app.core.metrics import metrics
+    if metrics_enabled is not None:
+        metrics.enabled = metrics_enabled
+    # Построчные INFO-логи маршрутов заглушаются: иначе замер упирается в вывод на консоль
+    logging.disable(logging.INFO)
+    try:
+        return asyncio.run(run_asgi_async(app, count, concurrency, seed, repeats))
+    finally:
+        logging.disable(logging.NOTSET)
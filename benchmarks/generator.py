@@ -0,0 +1,79 @@
+"""
+Генератор правдоподобных синтетических заявок для бенчмарков.
+
+ИНН физлица - 12 цифр с корректными контрольными разрядами, паспорт - серия (код региона + год выдачи)
+и шестизначный номер. Зарплата - логнормальная с медианой около 60 тыс. и долей заявок без зарплаты,
+сумма - логнормальная с медианой около 300 тыс., срок - из типичного набора сроков кредита.
+Генерация детерминирована при заданном seed.
+"""
+import math
+import random
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.schemas.scoring import ScoringConfig, ScoringRequest
+
+# Весовые коэффициенты контрольных разрядов ИНН физического лица
+INN_WEIGHTS_11 = (7, 2, 4, 10, 3, 5, 9, 4, 6, 8)
+INN_WEIGHTS_12 = (3, 7, 2, 4, 10, 3, 5, 9, 4, 6, 8)
+
+LOAN_TERMS = (6, 12, 18, 24, 36, 48, 60)
+LOAN_TERM_WEIGHTS = (5, 25, 10, 25, 20, 8, 7)
+
+SALARY_MISSING_SHARE = 0.15
+
+
+def _check_digit(digits: List[int], weights: tuple) -> int:
+    return sum(d * w for d, w in zip(digits, weights)) % 11 % 10
+
+
+def generate_inn(rng: random.Random) -> str:
+    """ИНН физлица: код региона, номер инспекции, номер записи и два контрольных разряда"""
+    digits = [*divmod(rng.randint(1, 99), 10)] + [rng.randint(0, 9) for _ in range(8)]
+    digits.append(_check_digit(digits, INN_WEIGHTS_11))
+    digits.append(_check_digit(digits, INN_WEIGHTS_12))
+    return ''.join(map(str, digits))
+
+
+def is_valid_inn(inn: str) -> bool:
+    if len(inn) != 12 or not inn.isdigit():
+        return False
+    digits = [int(c) for c in inn]
+    return (digits[10] == _check_digit(digits[:10], INN_WEIGHTS_11)
+            and digits[11] == _check_digit(digits[:11], INN_WEIGHTS_12))
+
+
+def generate_passport(rng: random.Random) -> str:
+    """Серия: код региона и две последние цифры года выдачи, затем номер"""
+    return f"{rng.randint(1, 99):02d}{rng.randint(0, 24):02d}{rng.randint(100000, 999999)}"
+
+
+def _lognormal(rng: random.Random, median: float, sigma: float, low: float, high: float) -> float:
+    return min(high, max(low, rng.lognormvariate(math.log(median), sigma)))
+
+
+def generate_payload(rng: random.Random, application_id: int,
+                     config: Optional[ScoringConfig] = None) -> Dict[str, Any]:
+    config = config or ScoringConfig()
+    salary = None
+    if rng.random() >= SALARY_MISSING_SHARE:
+        salary = round(_lognormal(rng, 60000, 0.6, 15000, 1500000), -2)
+    amount = round(_lognormal(rng, 300000, 0.9, config.min_loan_amount, config.max_loan_amount), -3)
+    return {
+        'application_id': application_id,
+        'user_id': rng.randint(1, 10 ** 7),
+        'inn': generate_inn(rng),
+        'passport_number': generate_passport(rng),
+        'loan_amount': amount,
+        'loan_term': rng.choices(LOAN_TERMS, LOAN_TERM_WEIGHTS)[0],
+        'user_salary': salary,
+    }
+
+
+def generate_payloads(count: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    for application_id in range(1, count + 1):
+        yield generate_payload(rng, application_id)
+
+
+def generate_requests(count: int, seed: int = 42) -> List[ScoringRequest]:
+    return [ScoringRequest(**payload) for payload in generate_payloads(count, seed)]
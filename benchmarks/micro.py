@@ -0,0 +1,59 @@
+"""
+Микробенчмарки ScoringEngine: каждая факторная функция, calculate_score и evaluate_application.
+
+Каждая функция прогоняется по одному и тому же набору синтетических заявок несколько раз,
+в отчет идет медиана и минимум времени на одну операцию в наносекундах.
+"""
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.core.metrics import metrics
+from app.core.scoring_engine import ScoringEngine
+from app.schemas.scoring import ScoringConfig, ScoringDetail, ScoringRequest
+
+from benchmarks.generator import generate_requests
+
+
+def measure(func: Callable[[Any], Any], inputs: Sequence[Any], repeats: int = 5) -> Dict[str, float]:
+    """Время на один вызов func(x) по всем inputs: медиана и минимум по повторам, нс"""
+    func(inputs[0])
+    per_op = []
+    for _ in range(repeats):
+        started = time.perf_counter_ns()
+        for item in inputs:
+            func(item)
+        per_op.append((time.perf_counter_ns() - started) / len(inputs))
+    return {
+        'ns_per_op': round(statistics.median(per_op), 1),
+        'min_ns_per_op': round(min(per_op), 1),
+        'ops': len(inputs) * repeats,
+    }
+
+
+def engine_cases(engine: ScoringEngine) -> Dict[str, Callable[[ScoringRequest], Any]]:
+    scorecard = engine.scorecard
+    return {
+        'factor.loan_amount_ratio': lambda r: engine._calculate_amount_ratio(r.loan_amount, scorecard),
+        'factor.loan_term_ratio': lambda r: engine._calculate_term_ratio(r.loan_term, scorecard),
+        'factor.passport_risk': lambda r: engine._calculate_passport_risk(r.passport_number, scorecard),
+        'factor.inn_risk': lambda r: engine._calculate_inn_risk(r.inn, scorecard),
+        'factor.application_risk': lambda r: engine._calculate_application_risk(r.application_id, scorecard),
+        'factor.income_sufficiency': lambda r: engine._calculate_income_sufficiency(
+            r.loan_amount, r.loan_term, r.user_salary, scorecard
+        ),
+        'factor.salary_stability': lambda r: engine._calculate_salary_stability(r.user_salary, scorecard),
+        'calculate_score': engine.calculate_score,
+        'evaluate_application.full': lambda r: engine.evaluate_application(r, ScoringDetail.FULL),
+        'evaluate_application.summary': lambda r: engine.evaluate_application(r, ScoringDetail.SUMMARY),
+    }
+
+
+def run_micro(count: int = 2000, repeats: int = 5, seed: int = 42,
+              metrics_enabled: Optional[bool] = None) -> Dict[str, Dict[str, float]]:
+    if metrics_enabled is not None:
+        metrics.enabled = metrics_enabled
+    # Детерминированный режим: одинаковые входы дают одинаковую работу в каждом повторе
+    engine = ScoringEngine(ScoringConfig(deterministic_scoring=True))
+    requests: List[ScoringRequest] = generate_requests(count, seed)
+    return {name: measure(func, requests, repeats) for name, func in engine_cases(engine).items()}
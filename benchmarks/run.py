@@ -0,0 +1,181 @@
+"""
+Запуск бенчмарков и проверка регрессий относительно сохраненного базового замера.
+
+    python -m benchmarks.run                       # все наборы, сравнение с benchmarks/baseline.json
+    python -m benchmarks.run --suite micro -o results.json
+    python -m benchmarks.run --update-baseline     # перезаписать базовый замер
+
+Наборы прогоняются дважды: со сбором метрик (SCORING_METRICS_ENABLED, по умолчанию включен)
+и без него (--metrics). Оба прогона сравниваются с одним базовым замером - сделанным без
+инструментирования, - поэтому порог ловит и цену самих метрик. Базовый замер обновляется
+только явно (--update-baseline, записывается прогон без метрик).
+
+Результаты пишутся в JSON. Запуск завершается с кодом 1, если хотя бы одна метрика
+ухудшилась сильнее порога (--threshold, доля от базового значения), и с кодом 2, если
+параметры прогона (--count, --repeats, --concurrency, --seed) не совпадают с параметрами
+базового замера: такое сравнение ничего не проверяет. Базовый замер зависит от машины,
+поэтому сравнивать имеет смысл прогоны на одном и том же окружении.
+"""
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+# Метрики, по которым проверяются регрессии: имя -> чем больше, тем лучше.
+# Для микробенчмарков - лучший из повторов: он меньше всего зависит от соседей по машине
+GATED_METRICS = {
+    'min_ns_per_op': False,
+    'rps': True,
+    'p99_ms': False,
+}
+
+# Параметры, которые должны совпадать с базовым замером
+COMPARED_PARAMS = ('count', 'repeats', 'concurrency', 'seed')
+
+# Секции результатов: без сбора метрик и с ним
+METRICS_MODES = {'off': ('suites', False), 'on': ('suites_metrics_on', True)}
+
+
+def run_suites(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        'created_at': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'params': {'count': args.count, 'repeats': args.repeats, 'concurrency': args.concurrency, 'seed': args.seed},
+    }
+    modes = ('off', 'on') if args.metrics == 'both' else (args.metrics,)
+    for mode in modes:
+        section, enabled = METRICS_MODES[mode]
+        suites = results[section] = {}
+        if args.suite in ('micro', 'all'):
+            from benchmarks.micro import run_micro
+            suites['micro'] = run_micro(args.count, args.repeats, args.seed, metrics_enabled=enabled)
+        if args.suite in ('asgi', 'all'):
+            from benchmarks.asgi import run_asgi
+            suites['asgi'] = run_asgi(args.count, args.concurrency, args.seed, args.asgi_repeats,
+                                      metrics_enabled=enabled)
+    return results
+
+
+def params_mismatch(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    base_params = baseline.get('params', {})
+    return [
+        f"{name}={current['params'][name]} (baseline {base_params[name]})"
+        for name in COMPARED_PARAMS
+        if name in base_params and base_params[name] != current['params'][name]
+    ]
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Сравнение каждой секции прогона с базой по GATED_METRICS; change > 0 означает ухудшение"""
+    rows = []
+    for mode, (section, _) in METRICS_MODES.items():
+        rows += _compare_section(current.get(section, {}), baseline, threshold, f"metrics_{mode}.")
+    return rows
+
+
+def _compare_section(suites: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+                     prefix: str) -> List[Dict[str, Any]]:
+    rows = []
+    for suite, cases in suites.items():
+        for case, metrics in cases.items():
+            base_metrics = baseline.get('suites', {}).get(suite, {}).get(case)
+            if not base_metrics:
+                continue
+            for metric, higher_is_better in GATED_METRICS.items():
+                value = metrics.get(metric)
+                base = base_metrics.get(metric)
+                if value is None or not base:
+                    continue
+                change = (base - value) / base if higher_is_better else (value - base) / base
+                rows.append({
+                    'name': f"{prefix}{suite}.{case}.{metric}",
+                    'baseline': base,
+                    'current': value,
+                    'change': round(change, 4),
+                    'regression': change > threshold,
+                })
+    return rows
+
+
+def _print_report(results: Dict[str, Any], comparison: Optional[List[Dict[str, Any]]]) -> None:
+    for mode, (section, _) in METRICS_MODES.items():
+        for suite, cases in results.get(section, {}).items():
+            print(f"[{suite}, metrics {mode}]")
+            for case, metrics in cases.items():
+                print(f"  {case:32s} " + "  ".join(f"{k}={v}" for k, v in metrics.items()))
+    if comparison:
+        print("[baseline]")
+        for row in comparison:
+            mark = 'REGRESSION' if row['regression'] else 'ok'
+            print(f"  {row['name']:60s} {row['baseline']:>12} -> {row['current']:>12} "
+                  f"({-row['change'] * 100:+.1f}%) {mark}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description='Бенчмарки сервиса скоринга')
+    parser.add_argument('--suite', choices=('micro', 'asgi', 'all'), default='all')
+    parser.add_argument('--count', type=int, default=2000, help='Число синтетических заявок')
+    parser.add_argument('--repeats', type=int, default=5, help='Повторы микробенчмарков')
+    parser.add_argument('--concurrency', type=int, default=16, help='Конкурентных клиентов в ASGI-бенчмарке')
+    parser.add_argument('--asgi-repeats', type=int, default=3, help='Повторы ASGI-бенчмарка (в отчет идет медиана)')
+    parser.add_argument('--metrics', choices=('off', 'on', 'both'), default='both',
+                        help='Прогон без сбора метрик, с ним или оба')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('-o', '--output', help='Файл для результатов в JSON')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Файл базового замера')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Допустимое ухудшение метрики относительно базы (доля)')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Сохранить результаты как базовый замер (нужен прогон без метрик)')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.update_baseline and args.metrics == 'on':
+        print("baseline is recorded without metrics collection: use --metrics off or both", file=sys.stderr)
+        return 2
+
+    baseline = None
+    baseline_path = Path(args.baseline)
+    if not args.update_baseline and baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+        current_params = {'params': {name: getattr(args, name) for name in COMPARED_PARAMS}}
+        mismatch = params_mismatch(current_params, baseline)
+        if mismatch:
+            print(f"run parameters differ from the baseline: {', '.join(mismatch)}; "
+                  f"rerun with the baseline parameters or pass --update-baseline", file=sys.stderr)
+            return 2
+
+    results = run_suites(args)
+
+    comparison = None
+    if baseline is not None:
+        comparison = compare(results, baseline, args.threshold)
+        results['comparison'] = {'baseline': str(baseline_path), 'threshold': args.threshold, 'metrics': comparison}
+
+    _print_report(results, comparison)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+    if args.update_baseline:
+        recorded = {key: value for key, value in results.items() if key != 'suites_metrics_on'}
+        baseline_path.write_text(json.dumps(recorded, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"baseline written to {baseline_path}")
+        return 0
+
+    regressions = [row for row in comparison or [] if row['regression']]
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.threshold * 100:.0f}%", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
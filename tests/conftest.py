@@ -0,0 +1,68 @@
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+# Настройки читаются при импорте приложения: детерминированный скоринг, без прогрева и пулов процессов
+os.environ.setdefault("SCORING_DETERMINISTIC_SCORING", "true")
+os.environ.setdefault("SCORING_WARMUP_REQUESTS", "0")
+os.environ.setdefault("SCORING_EXECUTION_MODE", "inline")
+os.environ.setdefault("SCORING_JOBS_EXECUTION_MODE", "inline")
+
+GOLDEN_DIR = Path(__file__).parent / "golden"
+# Поля, которые меняются от запуска к запуску
+VOLATILE_FIELDS = {"timestamp", "decision_timestamp"}
+
+
+def pytest_addoption(parser):
+    parser.addoption("--update-golden", action="store_true", help="Перезаписать эталонные ответы в tests/golden")
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(params=["orjson", "json"])
+def serializer(request, monkeypatch):
+    """Быстрый путь ответа с orjson и с json из стандартной библиотеки"""
+    from app.api import responses
+
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(responses, "orjson", None)
+    return request.param
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: "<volatile>" if key in VOLATILE_FIELDS else _normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    return value
+
+
+@pytest.fixture
+def golden(request):
+    """Сверка ответа с эталоном tests/golden/<name>.json: код, заголовки ошибок и тело с порядком полей"""
+    update = request.config.getoption("--update-golden")
+
+    def check(name: str, response) -> None:
+        actual = {"status_code": response.status_code, "body": _normalize(response.json())}
+        if "retry-after" in response.headers:
+            actual["retry_after"] = response.headers["retry-after"]
+        text = json.dumps(actual, ensure_ascii=False, indent=2) + "\n"
+        path = GOLDEN_DIR / f"{name}.json"
+        if update:
+            GOLDEN_DIR.mkdir(exist_ok=True)
+            path.write_text(text, encoding="utf-8")
+        assert text == path.read_text(encoding="utf-8")
+
+    return check
@@ -0,0 +1,56 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.core.amortization import amortization_schedule, monthly_payment
+from app.core.scoring_engine import ScoringEngine
+from app.schemas.scoring import ScoringConfig, ScoringRequest, ScoringStatus
+
+
+def _check_schedule(schedule, amount: float, payment: float, term: int) -> None:
+    cents = {key: np.rint(values * 100).astype(np.int64) for key, values in schedule.items() if key != 'month'}
+    assert schedule['month'].tolist() == list(range(1, term + 1))
+    assert schedule['payment'][0] == payment
+    assert (cents['payment'][:-1] == round(payment * 100)).all()
+    assert cents['principal'].sum() == round(amount * 100)
+    assert (cents['payment'] == cents['principal'] + cents['interest']).all()
+    assert cents['balance'][-1] == 0
+    for key in ('payment', 'principal', 'interest', 'balance'):
+        assert (cents[key] >= 0).all(), key
+
+
+@pytest.fixture(scope="module")
+def approved():
+    rng = random.Random(9)
+    engine = ScoringEngine(ScoringConfig(deterministic_scoring=True))
+    results = [
+        engine.evaluate_application(ScoringRequest(
+            application_id=i,
+            user_id=i,
+            inn=f"{rng.randrange(10 ** 12):012d}",
+            passport_number=f"{rng.randrange(10 ** 10):010d}",
+            loan_amount=round(rng.uniform(10000, 1500000), 2),
+            loan_term=rng.randrange(6, 61),
+            user_salary=round(rng.uniform(30000, 500000), 2),
+        ))
+        for i in range(3000)
+    ]
+    return [r for r in results if r.status == ScoringStatus.APPROVED]
+
+
+def test_schedule_matches_decision_monthly_payment(approved):
+    assert len(approved) > 50
+    for result in approved:
+        schedule = amortization_schedule(result.approved_amount, result.interest_rate, result.approved_term)
+        _check_schedule(schedule, result.approved_amount, result.monthly_payment, result.approved_term)
+
+
+@pytest.mark.parametrize("amount, term", [(12000.0, 12), (10000.0, 3), (999.99, 7)])
+def test_zero_rate_schedule(amount, term):
+    payment = monthly_payment(amount, 0.0, term)
+    schedule = amortization_schedule(amount, 0.0, term)
+
+    assert payment == round(amount / term, 2)
+    _check_schedule(schedule, amount, payment, term)
+    assert (schedule['interest'] == 0).all()
@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+import pytest
+
+from app.bureau_stub import start_stub_server
+from app.core.bureau import BureauClient, BureauScores, CircuitBreaker, inn_hash_score, passport_hash_score
+from app.schemas.scoring import ScoringRequest
+
+SHIFT = 5
+
+
+def _request(index: int) -> ScoringRequest:
+    return ScoringRequest(application_id=index, user_id=index, inn=f"{index:012d}", passport_number=f"{index:010d}",
+                          loan_amount=100000.0, loan_term=12, user_salary=50000.0)
+
+
+def _hash_scores(request: ScoringRequest) -> BureauScores:
+    return BureauScores(passport_hash_score(request.passport_number), inn_hash_score(request.inn))
+
+
+@pytest.fixture
+def stub():
+    server = start_stub_server(port=0, shift=SHIFT)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_client(stub):
+    clients = []
+
+    def make(**kwargs):
+        client = BureauClient(f"http://127.0.0.1:{stub.server_address[1]}", **kwargs)
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+def test_stub_scores_and_cache_hit(stub, make_client):
+    client = make_client()
+    request = _request(1)
+    expected = BureauScores(*(score + SHIFT for score in _hash_scores(request)))
+
+    assert asyncio.run(client.lookup(request)) == expected
+    assert stub.requests == 2
+    assert asyncio.run(client.lookup(request)) == expected
+    assert stub.requests == 2
+    assert client.cache.hits == 2
+
+
+def test_concurrent_duplicates_coalesce(stub, make_client):
+    stub.latency = 0.05
+    client = make_client()
+    request = _request(2)
+
+    async def lookups():
+        return await asyncio.gather(*(client.lookup(request) for _ in range(5)))
+
+    results = asyncio.run(lookups())
+    assert len(set(results)) == 1
+    assert stub.requests == 2
+
+
+def test_timeout_falls_back_to_hash_scores(stub, make_client):
+    stub.latency = 0.3
+    client = make_client(timeout=0.05)
+    request = _request(3)
+
+    assert asyncio.run(client.lookup(request)) == _hash_scores(request)
+    # Запасные значения не кэшируются
+    assert len(client.cache) == 0
+    assert client.breaker.failures == 2
+
+
+def test_breaker_opens_and_recovers(stub, make_client):
+    stub.latency = 0.3
+    client = make_client(timeout=0.05, failure_threshold=2, reset_timeout=0.2)
+
+    asyncio.run(client.lookup(_request(4)))
+    assert client.breaker.state == 'open'
+
+    requests_before = stub.requests
+    request = _request(5)
+    assert asyncio.run(client.lookup(request)) == _hash_scores(request)
+    assert stub.requests == requests_before
+    assert client.breaker.rejected == 2
+
+    stub.latency = 0.0
+    time.sleep(0.25)
+    request = _request(6)
+    asyncio.run(client.lookup(request))
+    assert client.breaker.state == 'closed'
+    assert asyncio.run(client.lookup(request)) == BureauScores(*(score + SHIFT for score in _hash_scores(request)))
+
+
+def test_breaker_state_transitions():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    assert breaker.allow() and breaker.state == 'closed'
+
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == 'half_open'
+    # В состоянии half_open разрешен только один пробный вызов
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.failures == 0
+    assert breaker.opens == 2
+
+
+def test_lookup_many_preserves_order(stub, make_client):
+    client = make_client()
+    batch = [_request(index) for index in (7, 8, 7, 9, 8)]
+    # Часть документов уже в кэше
+    asyncio.run(client.lookup(batch[1]))
+
+    results = asyncio.run(client.lookup_many(batch))
+    assert results == [BureauScores(*(score + SHIFT for score in _hash_scores(r))) for r in batch]
+    assert stub.requests == 6
@@ -0,0 +1,21 @@
+import pytest
+
+from app.cli import main, replay_engine_spec
+
+
+def test_replay_spec_accepts_engine_fields():
+    spec = replay_engine_spec(None, None, ["base_interest_rate=13.5"])
+    assert spec["config"] == {"base_interest_rate": 13.5}
+
+
+@pytest.mark.parametrize("override", ["min_score_approval=700", "max_loan_amount=100000", "min_loan_term=3"])
+def test_replay_spec_rejects_fields_the_engine_ignores(override):
+    with pytest.raises(ValueError, match=override.partition("=")[0]):
+        replay_engine_spec(None, None, [override])
+
+
+def test_replay_exits_2_on_unused_override(tmp_path, capsys):
+    corpus = tmp_path / "requests.jsonl"
+    corpus.write_text("")
+    assert main(["replay", str(corpus), "--workers", "1", "--old-set", "min_score_approval=600"]) == 2
+    assert "min_score_approval" in capsys.readouterr().err
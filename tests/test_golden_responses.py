@@ -0,0 +1,99 @@
+"""
+Контракт API: ответы сверяются с эталонами в tests/golden, снятыми с ответов через response_model.
+Эталоны обновляются запуском python -m pytest --update-golden
+"""
+import pytest
+
+from app.core.jobs import JobQueueFull
+
+APPROVED = {"application_id": 19, "user_id": 9269833, "inn": "196204505314", "passport_number": "8807799330",
+            "loan_amount": 96000.0, "loan_term": 12, "user_salary": 75600.0}
+REJECTED = {"application_id": 2, "user_id": 109032, "inn": "982654235183", "passport_number": "1212201414",
+            "loan_amount": 618000.0, "loan_term": 18, "user_salary": 63700.0}
+REJECTED_NO_SALARY = {"application_id": 5, "user_id": 3539705, "inn": "735376724234",
+                      "passport_number": "3223688637", "loan_amount": 203000.0, "loan_term": 24, "user_salary": None}
+MANUAL_REVIEW = {"application_id": 40, "user_id": 2118619, "inn": "827109477783", "passport_number": "4405153872",
+                 "loan_amount": 114000.0, "loan_term": 12}
+APPLICATIONS = {
+    "approved": APPROVED,
+    "rejected": REJECTED,
+    "rejected_no_salary": REJECTED_NO_SALARY,
+    "manual_review": MANUAL_REVIEW,
+}
+
+
+@pytest.mark.parametrize("detail", ["full", "summary"])
+@pytest.mark.parametrize("case", APPLICATIONS)
+def test_evaluate(client, serializer, golden, case, detail):
+    response = client.post("/api/v1/scoring/evaluate", params={"detail": detail}, json=APPLICATIONS[case])
+    golden(f"evaluate_{detail}_{case}", response)
+
+
+def test_evaluate_detail_header(client, serializer, golden):
+    response = client.post("/api/v1/scoring/evaluate", headers={"X-Scoring-Detail": "summary"}, json=APPROVED)
+    golden("evaluate_summary_approved", response)
+
+
+@pytest.mark.parametrize("detail", ["full", "summary"])
+def test_evaluate_batch(client, serializer, golden, detail):
+    response = client.post("/api/v1/scoring/evaluate/batch", params={"detail": detail},
+                           json={"requests": list(APPLICATIONS.values())})
+    golden(f"evaluate_batch_{detail}", response)
+
+
+def test_config(client, serializer, golden):
+    golden("config", client.get("/api/v1/scoring/config"))
+
+
+@pytest.mark.parametrize("status", ["approved", "rejected", "manual"])
+def test_simulate(client, serializer, golden, status):
+    golden(f"simulate_{status}", client.post(f"/api/v1/scoring/simulate/{status}", json=APPROVED))
+
+
+def test_simulate_unknown_status(client, serializer, golden):
+    golden("simulate_unknown_status", client.post("/api/v1/scoring/simulate/pending", json=APPROVED))
+
+
+@pytest.mark.parametrize("case", APPLICATIONS)
+def test_explain(client, serializer, golden, case):
+    summary = client.post("/api/v1/scoring/evaluate", params={"detail": "summary"}, json=APPLICATIONS[case]).json()
+    response = client.post("/api/v1/scoring/explain", json={
+        "request": APPLICATIONS[case],
+        "factor_vector": summary["data"]["details"]["factor_vector"],
+    })
+    golden(f"explain_{case}", response)
+
+
+def test_explain_stale_scorecard(client, serializer, golden):
+    summary = client.post("/api/v1/scoring/evaluate", params={"detail": "summary"}, json=APPROVED).json()
+    factor_vector = {**summary["data"]["details"]["factor_vector"], "scorecard_version": "stale"}
+    response = client.post("/api/v1/scoring/explain", json={"request": APPROVED, "factor_vector": factor_vector})
+    golden("explain_stale_scorecard", response)
+
+
+def test_explain_invalid_band_code(client, serializer, golden):
+    summary = client.post("/api/v1/scoring/evaluate", params={"detail": "summary"}, json=APPROVED).json()
+    factor_vector = summary["data"]["details"]["factor_vector"]
+    factor_vector = {**factor_vector, "codes": [99] + factor_vector["codes"][1:]}
+    response = client.post("/api/v1/scoring/explain", json={"request": APPROVED, "factor_vector": factor_vector})
+    golden("explain_invalid_band_code", response)
+
+
+def test_evaluate_invalid_request(client, serializer, golden):
+    response = client.post("/api/v1/scoring/evaluate", json={**APPROVED, "inn": "123", "loan_amount": -1})
+    golden("evaluate_invalid_request", response)
+
+
+def test_evaluate_batch_empty(client, serializer, golden):
+    golden("evaluate_batch_empty", client.post("/api/v1/scoring/evaluate/batch", json={"requests": []}))
+
+
+def test_jobs_queue_full(client, serializer, golden, monkeypatch):
+    from app.api.routes.scoring import job_manager
+
+    def submit(requests, detail):
+        raise JobQueueFull("Job queue is full")
+
+    monkeypatch.setattr(job_manager, "submit", submit)
+    response = client.post("/api/v1/scoring/jobs", json={"requests": [APPROVED]})
+    golden("jobs_queue_full", response)
@@ -0,0 +1,62 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.core.portfolio import PortfolioStats, SKETCH_ACCURACY
+from app.core.scoring_engine import ScoringEngine
+from app.schemas.scoring import ScoringConfig, ScoringDetail, ScoringRequest
+
+
+@pytest.fixture(scope="module")
+def scored():
+    rng = random.Random(21)
+    requests = [
+        ScoringRequest(
+            application_id=i,
+            user_id=i,
+            inn=f"{rng.randrange(10 ** 12):012d}",
+            passport_number=f"{rng.randrange(10 ** 10):010d}",
+            loan_amount=round(rng.uniform(10000, 3000000), 2),
+            loan_term=rng.choice((6, 9, 12, 18, 24, 36, 48, 60)),
+            user_salary=None if rng.random() < 0.15 else round(rng.uniform(15000, 400000), 2),
+        )
+        for i in range(6000)
+    ]
+    engine = ScoringEngine(ScoringConfig(deterministic_scoring=True))
+    results, vectors = engine.score_many(requests, ScoringDetail.SUMMARY)
+    return requests, results, vectors
+
+
+def test_merged_chunks_match_single_pass(scored):
+    requests, results, vectors = scored
+    single = PortfolioStats()
+    single.update(requests, results, vectors)
+
+    chunks = []
+    for start in range(0, len(requests), 700):
+        part = PortfolioStats()
+        end = start + 700
+        part.update(requests[start:end], results[start:end], vectors[start:end])
+        chunks.append(part)
+    random.Random(7).shuffle(chunks)
+    merged = PortfolioStats()
+    for part in chunks:
+        merged.merge(part)
+
+    assert merged.count == single.count == len(requests)
+    assert merged.report() == single.report()
+
+
+@pytest.mark.parametrize("q", [0.5, 0.9])
+def test_rate_quantiles_within_sketch_accuracy(scored, q):
+    requests, results, vectors = scored
+    stats = PortfolioStats()
+    stats.update(requests, results, vectors)
+    rates = np.array([r.interest_rate for r in results if r.interest_rate is not None])
+    assert len(rates) > 100
+
+    reported = stats.report()["total"]["interest_rate"][f"p{round(q * 100)}"]
+    exact = np.quantile(rates, q, method="inverted_cdf")
+    # Отчет округляет значение до сотых
+    assert abs(reported - exact) <= SKETCH_ACCURACY * exact + 0.005
@@ -0,0 +1,99 @@
+import json
+import os
+import time
+
+import pytest
+
+from app.core.cache import SHARED_CACHE_WAYS, SharedResultCache, _SLOT_HEADER
+
+
+def _dumps(value):
+    return json.dumps(value).encode()
+
+
+@pytest.fixture
+def segment():
+    """Фабрика сегментов: владелец (create=True) и подключение к нему, как у воркеров app.serve"""
+    created = []
+
+    def make(max_size=64, ttl=300.0, slot_bytes=256):
+        name = f"scoring-results-test-{os.getpid()}-{len(created)}"
+        owner = SharedResultCache(name, _dumps, json.loads, max_size=max_size, ttl=ttl,
+                                  slot_bytes=slot_bytes, create=True)
+        worker = SharedResultCache(name, _dumps, json.loads, ttl=ttl, slot_bytes=slot_bytes)
+        created.append((owner, worker))
+        return owner, worker
+
+    yield make
+    for owner, worker in created:
+        worker.close()
+        owner.close()
+        owner.unlink()
+
+
+def test_set_and_get_across_handles(segment):
+    owner, worker = segment()
+    owner.sync_version("v1")
+    worker.sync_version("v1")
+
+    owner.set("a", {"score": 700})
+    assert worker.get("a") == {"score": 700}
+    assert worker.get("b") is None
+    assert (worker.hits, worker.misses) == (1, 1)
+    assert len(owner) == len(worker) == 1
+
+
+def test_version_change_hides_old_entries(segment):
+    owner, worker = segment()
+    owner.sync_version("v1")
+    owner.set("a", 1)
+
+    worker.sync_version("v2")
+    assert worker.get("a") is None
+    worker.set("a", 2)
+
+    assert owner.get("a") == 1
+    owner.sync_version("v2")
+    assert owner.get("a") == 2
+    assert owner.invalidations == 1
+
+
+def test_ttl_expiry(segment):
+    owner, worker = segment(ttl=0.05)
+    owner.set("a", 1)
+    assert worker.get("a") == 1
+    time.sleep(0.1)
+    assert worker.get("a") is None
+    assert len(worker) == 0
+
+
+def test_eviction_when_set_is_full(segment):
+    # Один набор: все ключи попадают в него, вытесняется запись с самым ранним сроком
+    owner, worker = segment(max_size=SHARED_CACHE_WAYS)
+    for index in range(SHARED_CACHE_WAYS + 1):
+        owner.set(f"k{index}", index)
+
+    assert owner.evictions == 1
+    assert worker.get("k0") is None
+    assert [worker.get(f"k{index}") for index in range(1, SHARED_CACHE_WAYS + 1)] == list(
+        range(1, SHARED_CACHE_WAYS + 1)
+    )
+
+
+def test_oversized_value_is_not_stored(segment):
+    owner, worker = segment(slot_bytes=64)
+    owner.set("a", "x" * 64)
+
+    assert owner.oversized == 1
+    assert worker.get("a") is None
+    assert len(worker) == 0
+
+
+def test_corrupted_payload_is_a_miss(segment):
+    owner, worker = segment(max_size=SHARED_CACHE_WAYS)
+    owner.set("a", {"score": 700})
+    # Единственный набор, первый свободный слот - нулевой
+    owner._buf[_SLOT_HEADER.size] ^= 0xFF
+
+    assert worker.get("a") is None
+    assert (worker.hits, worker.misses) == (0, 1)
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import time
+
+import httpx
+import pytest
+
+from app.api.scorecard_sync import ScorecardSyncMiddleware
+from app.core.scorecard import SharedScorecard, compile_scorecard, default_scorecard
+from app.core.scoring_engine import ScoringEngine
+from app.schemas.scoring import ScoringRequest
+
+APPLICATION = {"application_id": 8001, "user_id": 9269833, "inn": "196204505314", "passport_number": "8807799330",
+               "loan_amount": 96000.0, "loan_term": 12, "user_salary": 75600.0}
+
+
+@pytest.fixture
+def segments():
+    owner = SharedScorecard(f"scoring-scorecard-test-{os.getpid()}", create=True)
+    worker = SharedScorecard(owner.name)
+    yield owner, worker
+    worker.close()
+    owner.close()
+    owner.unlink()
+
+
+def test_nothing_published(segments):
+    _, worker = segments
+    assert not worker.changed()
+    assert worker.read() is None
+
+
+def test_publish_reaches_other_processes(segments):
+    owner, worker = segments
+    definition = default_scorecard().definition.model_copy(update={"base_score": 480})
+
+    assert owner.publish(definition) == 1
+    # Издатель отмечает поколение примененным сам, после замены в своих исполнителях
+    assert owner.changed()
+    owner.generation = 1
+    assert not owner.changed()
+    assert worker.changed()
+
+    generation, published = worker.read()
+    worker.generation = generation
+    assert generation == 1
+    assert published == definition
+    assert not worker.changed()
+
+    assert worker.publish(default_scorecard().definition) == 2
+    assert owner.changed()
+
+
+def test_publish_rejects_oversized_definition():
+    shared = SharedScorecard(f"scoring-scorecard-small-{os.getpid()}", size=256, create=True)
+    try:
+        with pytest.raises(ValueError):
+            shared.publish(default_scorecard().definition)
+    finally:
+        shared.close()
+        shared.unlink()
+
+
+@pytest.fixture
+def synced(client, monkeypatch):
+    """
+    Приложение за ScorecardSyncMiddleware, как в воркере app.serve; owner - сегмент, в который
+    публикует "другой воркер". Запросы выполняются одновременно в event loop клиента
+    """
+    from app.api.routes import admin
+    from app.main import app
+
+    owner = SharedScorecard(f"scoring-scorecard-sync-{os.getpid()}", create=True)
+    worker = SharedScorecard(owner.name)
+    monkeypatch.setattr(admin, "shared_scorecard", worker)
+    previous = admin.scoring_engine.scorecard
+    wrapped = ScorecardSyncMiddleware(app, sync=admin.sync_shared_scorecard, paths=("/api/v1",))
+
+    def call(*requests):
+        async def send_all():
+            async with httpx.AsyncClient(app=wrapped, base_url="http://testserver") as http:
+                return await asyncio.gather(*(http.request(method, url, json=body) for method, url, body in requests))
+        return client.portal.call(send_all)
+
+    yield owner, call
+    client.portal.call(admin.apply_scorecard, previous)
+    worker.close()
+    owner.close()
+    owner.unlink()
+
+
+def test_sync_applies_published_scorecard(synced):
+    from app.api.routes.scoring import scoring_engine
+
+    owner, call = synced
+    compiled = compile_scorecard(default_scorecard().definition.model_copy(update={"base_score": 470}))
+    owner.publish(compiled.definition)
+
+    config, evaluated = call(("GET", "/api/v1/scoring/config", None), ("POST", "/api/v1/scoring/evaluate", APPLICATION))
+    assert config.json()["scorecard_version"] == compiled.version
+    expected = ScoringEngine(scoring_engine.config, compiled).evaluate_application(ScoringRequest(**APPLICATION))
+    assert evaluated.json()["data"]["score"] == expected.score
+    assert evaluated.json()["data"]["status"] == expected.status.value
+
+
+def test_requests_wait_for_executor_reload(synced, monkeypatch):
+    from app.api.routes.scoring import scoring_executor
+
+    owner, call = synced
+    events = []
+
+    def slow_reload():
+        # Пересоздание пула процессов
+        time.sleep(0.3)
+        events.append("reloaded")
+
+    run = scoring_executor.run
+
+    async def recording_run(method, *args, **kwargs):
+        events.append(method)
+        return await run(method, *args, **kwargs)
+
+    monkeypatch.setattr(scoring_executor, "reload", slow_reload)
+    monkeypatch.setattr(scoring_executor, "run", recording_run)
+    owner.publish(default_scorecard().definition.model_copy(update={"base_score": 490}))
+
+    responses = call(*(
+        ("POST", "/api/v1/scoring/evaluate", {**APPLICATION, "application_id": 9000 + i}) for i in range(4)
+    ))
+    assert [r.status_code for r in responses] == [200] * 4
+    # Ни одна заявка не ушла в исполнитель до окончания замены
+    assert events[0] == "reloaded"
+    assert events.count("reloaded") == 1
+    assert len(events) == 5